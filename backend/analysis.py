@@ -7,45 +7,102 @@ and genre classification using CNN.
 import sys
 import json
 import os
-import librosa
-import subprocess
+import glob
+import time
+import argparse
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 from utils.audio_features import (
+    FeatureContext,
     detect_bpm_with_perceptual_weighting,
     detect_key,
+    estimate_key,
+    estimate_tempo,
     calculate_energy,
     calculate_loudness,
-    calculate_spectral_centroid
+    calculate_spectral_centroid,
+    save_full_features
 )
-from utils.cnn_classifier import classify_genre
-from utils.mastering_analysis import analyze_mastering
-
-# Optional imports for lyrics extraction
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
+from utils.audio_io import (
+    ANALYSIS_DURATION,
+    PCM_CACHE_ENV,
+    STREAMING_MIN_DURATION,
+    DecodedAudio,
+    get_duration,
+    stream_analysis_blocks
+)
+from utils.cnn_classifier import TFLITE_RUNTIME_AVAILABLE, classify_genre, model_available
+from utils.excerpt import EXCERPT_MODES, representative_excerpt, to_track_time
+from utils.mastering_analysis import analyze_mastering, analyze_mastering_streaming
+from utils import result_cache
+from utils.profiling import StageTimer, measure
+from utils.scheduler import run_stages
+from utils.sections import SECTION_BLOCK_SECONDS, analyze_sections, track_genre
+from utils.serialization import dumps, finite
+from utils.separation import separate_stems
+
+# Optional dependencies for lyrics extraction. Only their presence is checked here;
+# whisper/demucs (and torch behind them) are imported when the lyrics stage runs.
+WHISPER_AVAILABLE = importlib.util.find_spec('whisper') is not None
+if not WHISPER_AVAILABLE:
     # Write to stderr so it doesn't interfere with JSON output
     sys.stderr.write("Warning: Whisper not available. Lyrics extraction will be disabled.\n")
 
-try:
-    import demucs
-    DEMUCS_AVAILABLE = True
-except ImportError:
-    DEMUCS_AVAILABLE = False
+DEMUCS_AVAILABLE = importlib.util.find_spec('demucs') is not None
+if not DEMUCS_AVAILABLE:
     # Write to stderr so it doesn't interfere with JSON output
     sys.stderr.write("Warning: Demucs not available. Lyrics extraction will be disabled.\n")
 
+# Whisper model sizes that can be selected (base is fast, small is more accurate)
+WHISPER_MODEL_SIZES = ('tiny', 'base', 'small')
+DEFAULT_WHISPER_MODEL = os.environ.get('AKIBEAT_WHISPER_MODEL', 'base')
+LYRICS_LANGUAGE = 'tr'
+
+# Loaded Whisper models, kept resident for the life of the process
+_whisper_models = {}
+_whisper_lock = threading.Lock()
+
+
+def get_whisper_model(model_size=None):
+    """
+    Load a Whisper model once per process and reuse it on later calls.
+    
+    Args:
+        model_size: 'tiny', 'base' or 'small' (default: DEFAULT_WHISPER_MODEL)
+    
+    Returns:
+        Loaded Whisper model
+    """
+    model_size = model_size or DEFAULT_WHISPER_MODEL
+    if model_size not in WHISPER_MODEL_SIZES:
+        raise ValueError(f"Unsupported Whisper model size: {model_size}")
+    
+    with _whisper_lock:
+        model = _whisper_models.get(model_size)
+        if model is None:
+            import whisper
+            sys.stderr.write(f"Whisper modeli yükleniyor ({model_size})...\n")
+            model = whisper.load_model(model_size)
+            _whisper_models[model_size] = model
+    return model
+
 
-def extract_lyrics(file_path):
+def extract_lyrics(file_path, model_size=None, use_cache=True, timer=None):
     """
     Extract lyrics from audio file using Whisper (transcription).
     If Demucs is available, it will first separate vocals for better accuracy.
     Otherwise, it will transcribe directly from the audio file.
+    Transcripts are cached by audio content and model size, so re-analysis
+    never re-transcribes the same track.
     
     Args:
         file_path: Path to audio file
+        model_size: Whisper model size ('tiny', 'base', 'small'; default: DEFAULT_WHISPER_MODEL)
+        use_cache: Read and write the on-disk transcript cache
+        timer: Optional StageTimer (records lyrics.demucs / lyrics.whisper)
     
     Returns:
         Extracted lyrics text or empty string if extraction fails
@@ -53,47 +110,37 @@ def extract_lyrics(file_path):
     if not WHISPER_AVAILABLE:
         return ""
     
+    model_size = model_size or DEFAULT_WHISPER_MODEL
+    
+    cache_key = None
+    if use_cache:
+        try:
+            cache_key = result_cache.make_key(
+                file_path,
+                {'model': model_size, 'language': LYRICS_LANGUAGE, 'vocals_separated': DEMUCS_AVAILABLE},
+                include_code_version=False
+            )
+            cached = result_cache.get(cache_key, namespace='lyrics')
+            if cached is not None:
+                sys.stderr.write("Sözler önbellekten yüklendi\n")
+                return cached['text']
+        except Exception as e:
+            sys.stderr.write(f"Söz önbelleği okunamadı: {str(e)}\n")
+            cache_key = None
+    
     try:
-        # Get directory and filename
-        file_dir = os.path.dirname(os.path.abspath(file_path))
-        file_basename = os.path.basename(file_path)
-        file_name_without_ext = os.path.splitext(file_basename)[0]
-        
         audio_file_to_transcribe = file_path
+        vocals_separated = False
         
         # 1. Aşama: Vokal Ayrıştırma (Demucs) - Opsiyonel, daha iyi sonuç için
         if DEMUCS_AVAILABLE:
             try:
                 sys.stderr.write(f"Vokaller ayrıştırılıyor (Demucs)...\n")
-                result = subprocess.run(
-                    ["demucs", "-d", "cpu", file_path],
-                    capture_output=True,
-                    text=True,
-                    cwd=file_dir,
-                    timeout=300  # 5 dakika timeout
-                )
-                
-                if result.returncode == 0:
-                    # Demucs creates: separated/htdemucs/filename/vocals.wav
-                    separated_path = os.path.join(file_dir, "separated", "htdemucs", file_name_without_ext, "vocals.wav")
-                    
-                    # Alternative path if file structure is different
-                    if not os.path.exists(separated_path):
-                        # Try to find vocals.wav in separated folder
-                        for root, dirs, files in os.walk(os.path.join(file_dir, "separated")):
-                            if "vocals.wav" in files:
-                                separated_path = os.path.join(root, "vocals.wav")
-                                break
-                    
-                    if os.path.exists(separated_path):
-                        audio_file_to_transcribe = separated_path
-                        sys.stderr.write(f"Vokaller ayrıştırıldı: {separated_path}\n")
-                    else:
-                        sys.stderr.write(f"Vokal dosyası bulunamadı, orijinal dosya kullanılacak\n")
-                else:
-                    sys.stderr.write(f"Demucs hatası (orijinal dosya kullanılacak): {result.stderr[:200]}\n")
-            except subprocess.TimeoutExpired:
-                sys.stderr.write("Demucs zaman aşımına uğradı, orijinal dosya kullanılacak\n")
+                with measure(timer, 'lyrics.demucs'):
+                    stems = separate_stems(file_path, use_cache=use_cache)
+                audio_file_to_transcribe = stems['vocals']
+                vocals_separated = True
+                sys.stderr.write(f"Vokaller ayrıştırıldı: {audio_file_to_transcribe}\n")
             except Exception as e:
                 sys.stderr.write(f"Demucs hatası (orijinal dosya kullanılacak): {str(e)}\n")
         else:
@@ -101,12 +148,22 @@ def extract_lyrics(file_path):
         
         # 2. Aşama: Yazıya Dökme (Whisper)
         sys.stderr.write(f"Transkripsiyon yapılıyor: {audio_file_to_transcribe}\n")
-        # Load Whisper model (base is fast, small is more accurate)
-        model = whisper.load_model("base")
-        result = model.transcribe(audio_file_to_transcribe, language="tr")  # Turkish language
+        # Resident Whisper model (loaded once per process)
+        with measure(timer, 'lyrics.whisper_load'):
+            model = get_whisper_model(model_size)
+        with measure(timer, 'lyrics.whisper'):
+            result = model.transcribe(audio_file_to_transcribe, language=LYRICS_LANGUAGE)  # Turkish language
         
         lyrics = result["text"].strip()
         sys.stderr.write(f"Sözler çıkarıldı ({len(lyrics)} karakter): {lyrics[:100]}...\n")
+        
+        # A fallback transcript of the full mix is not stored under the separated-vocals key
+        if cache_key and vocals_separated == DEMUCS_AVAILABLE:
+            try:
+                result_cache.put(cache_key, {'text': lyrics, 'model': model_size}, namespace='lyrics')
+            except Exception as e:
+                sys.stderr.write(f"Söz önbelleğine yazılamadı: {str(e)}\n")
+        
         return lyrics
         
     except Exception as e:
@@ -114,149 +171,426 @@ def extract_lyrics(file_path):
         return ""
 
 
-def analyze_audio(file_path):
+def get_model_path():
+    """
+    Returns:
+        Path of the trained CNN model file (may not exist). The exported
+        TFLite model is preferred when it exists and a TFLite runtime is installed.
+    """
+    models_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+    tflite_path = os.path.join(models_dir, 'cnn_model.tflite')
+    if TFLITE_RUNTIME_AVAILABLE and os.path.exists(tflite_path):
+        return tflite_path
+    return os.path.join(models_dir, 'cnn_model.h5')
+
+
+def get_analysis_params(whisper_model=None, sections=False, excerpt_mode='start'):
+    """
+    Parameters that change the analysis output, used in the result cache key.
+    
+    Args:
+        whisper_model: Whisper model size used for lyrics
+        sections: Section mode (whole-track features and per-section results)
+        excerpt_mode: Excerpt selection ('start' or 'representative')
+    
+    Returns:
+        JSON-serializable dictionary
+    """
+    model_path = get_model_path()
+    return {
+        'excerpt_duration': ANALYSIS_DURATION,
+        'excerpt_mode': excerpt_mode,
+        'streaming_min_duration': STREAMING_MIN_DURATION,
+        'whisper': WHISPER_AVAILABLE,
+        'whisper_model': (whisper_model or DEFAULT_WHISPER_MODEL) if WHISPER_AVAILABLE else None,
+        'demucs': DEMUCS_AVAILABLE,
+        'sections': sections,
+        'cnn_model': os.path.basename(model_path) if os.path.exists(model_path) else None,
+        'cnn_model_mtime': os.path.getmtime(model_path) if os.path.exists(model_path) else None
+    }
+
+
+def analyze_audio(file_path, use_cache=True, whisper_model=None, on_event=None, timings=False, trace_memory=False,
+                  profile_path=None, full_features_path=None, sections=False, excerpt_mode='start'):
     """
     Analyze audio file and return comprehensive analysis results.
+    Results are cached on disk by file content, analysis parameters and code
+    version, so re-opening a track returns immediately.
     
     Args:
         file_path: Path to audio file (MP3, WAV, etc.)
+        use_cache: Read and write the on-disk result cache
+        whisper_model: Whisper model size for lyrics ('tiny', 'base', 'small')
+        on_event: Optional callback(stage, fields) receiving partial results as each
+            stage finishes ('technical', 'mastering', 'genre', 'lyrics'; not called on a cache hit)
+        timings: Add a 'timings' block (per-stage wall and CPU time; never cached)
+        trace_memory: Also record per-stage peak memory with tracemalloc (much slower run)
+        profile_path: Write a cProfile (pstats) of the run to this path; the result
+            cache is not read and stages run one at a time so the profile stays clean
+        full_features_path: Also write the per-frame MFCC/chroma matrices to this .npz
+            sidecar (the result cache is not read; the result gets a 'full_features' path)
+        sections: Section mode: BPM, key, energy, loudness and spectral centroid cover the
+            whole track (one streaming pass) and the result gets a 'sections' list
+            (start, end, label and features of each section)
+        excerpt_mode: 'start' analyzes the first ANALYSIS_DURATION seconds; 'representative'
+            the loudest, busiest windows of the whole track (same total length, found by a
+            cheap level scan); the result then lists them in 'excerpt_windows'
     
     Returns:
         Dictionary with analysis results
     """
+    timer = None
+    if timings or profile_path:
+        timer = StageTimer(memory=timings and trace_memory, profile=profile_path is not None)
     try:
-        # Load audio file
-        y, sr = librosa.load(file_path, sr=22050, duration=60)  # Load first 60 seconds for speed
+        cache_key = None
+        if use_cache:
+            try:
+                cache_key = result_cache.make_key(file_path, get_analysis_params(whisper_model, sections, excerpt_mode))
+                cached = result_cache.get(cache_key) if profile_path is None and full_features_path is None else None
+                if cached is not None:
+                    sys.stderr.write("Analiz sonucu önbellekten yüklendi\n")
+                    if timings:
+                        cached['timings'] = {'cache_hit': True, **timer.report()}
+                    return cached
+            except Exception as e:
+                sys.stderr.write(f"Önbellek okunamadı: {str(e)}\n")
+                cache_key = None
+        
+        results = _analyze_audio_uncached(file_path, use_cache=use_cache, whisper_model=whisper_model,
+                                          on_event=on_event, timer=timer, full_features_path=full_features_path,
+                                          sections=sections, excerpt_mode=excerpt_mode)
+        # The sidecar path is specific to this run and is not cached
+        full_features = results.pop('full_features', None)
+        
+        if cache_key and 'error' not in results:
+            try:
+                result_cache.put(cache_key, finite(results))
+            except Exception as e:
+                sys.stderr.write(f"Önbelleğe yazılamadı: {str(e)}\n")
+        
+        if full_features_path is not None:
+            results['full_features'] = full_features
+        if timings:
+            results['timings'] = {'cache_hit': False, **timer.report()}
+        if profile_path:
+            try:
+                if timer.dump_profile(profile_path):
+                    sys.stderr.write(f"Profil kaydedildi: {profile_path}\n")
+            except OSError as e:
+                sys.stderr.write(f"Profil kaydedilemedi: {str(e)}\n")
+        
+        return results
+    finally:
+        if timer is not None:
+            timer.close()
+
+
+def profile_path_for(file_path, profile_dir):
+    """
+    Per-job cProfile output path inside profile_dir.
+    
+    Args:
+        file_path: Analyzed audio file
+        profile_dir: Directory for .pstats files (created if missing)
+    
+    Returns:
+        Path like <profile_dir>/<track>-<timestamp>-<pid>.pstats
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.pstats")
+
+
+def _analyze_audio_uncached(file_path, use_cache=True, whisper_model=None, on_event=None, timer=None,
+                            full_features_path=None, sections=False, excerpt_mode='start'):
+    """
+    Run the full analysis pipeline for one file (no result caching).
+    
+    Args:
+        file_path: Path to audio file (MP3, WAV, etc.)
+        use_cache: Allow the per-stage caches (transcripts, decoded PCM)
+        whisper_model: Whisper model size for lyrics
+        on_event: Optional callback(stage, fields) for partial results
+        timer: Optional StageTimer recording per-stage timings
+        full_features_path: Optional .npz path for the per-frame MFCC/chroma matrices
+        sections: Section mode (see analyze_audio)
+        excerpt_mode: Excerpt selection (see analyze_audio)
+    
+    Returns:
+        Dictionary with analysis results
+    """
+    try:
+        # Decode once at native rate; the 22.05 kHz excerpt and the mastering
+        # view are derived from the same buffer. Long files (DJ mixes) only
+        # decode the excerpt and stream the mastering analysis in blocks.
+        duration = get_duration(file_path)
+        stream_mastering = duration is not None and duration > STREAMING_MIN_DURATION
+        
+        def decode_stage():
+            return DecodedAudio(file_path, max_duration=ANALYSIS_DURATION if stream_mastering else None,
+                                use_cache=use_cache)
+        
+        # Representative excerpt: windows picked by a level scan of the whole file,
+        # sliced from the full decode or read window by window (long files)
+        def excerpt_stage(decode=None):
+            sys.stderr.write("Temsili bölümler seçiliyor...\n")
+            return representative_excerpt(file_path, decoded=decode)
+        
+        # Section mode: one streaming pass over the whole track at the analysis rate.
+        # Reuses the full decode when there is one; long files are read block by block.
+        def sections_stage(decode=None):
+            sys.stderr.write("Bölüm analizi yapılıyor...\n")
+            blocks = stream_analysis_blocks(file_path, block_seconds=SECTION_BLOCK_SECONDS, decoded=decode)
+            result = analyze_sections(blocks, timer=timer)
+            sys.stderr.write(f"Bölüm analizi tamamlandı ({len(result['sections'])} bölüm)\n")
+            return result
         
         # 1. ADIM: Teknik Veri Hesaplama (BPM, Loudness, Spectral Centroid)
-        sys.stderr.write("Teknik veriler hesaplanıyor...\n")
-        bpm = detect_bpm_with_perceptual_weighting(y, sr)
-        key = detect_key(y, sr)
-        energy = calculate_energy(y, sr)
-        loudness = calculate_loudness(y, sr)
-        spectral_centroid = calculate_spectral_centroid(y, sr)
-        
-        # Calculate spectral magnitude for visualization (20 bins)
-        stft = librosa.stft(y, n_fft=2048, hop_length=512)
-        magnitude = np.abs(stft)
-        magnitude_mean = np.mean(magnitude, axis=1)
-        # Downsample to 20 bins for frontend visualization
-        bins = 20
-        step = len(magnitude_mean) // bins
-        spectral_magnitude = [float(magnitude_mean[i * step]) for i in range(bins)]
-        # Normalize to 0-1 range
-        max_mag = max(spectral_magnitude) if spectral_magnitude else 1.0
-        spectral_magnitude = [v / (max_mag + 1e-10) for v in spectral_magnitude]
+        def features_stage(decode=None, sections=None, excerpt=None):
+            sys.stderr.write("Teknik veriler hesaplanıyor...\n")
+            if excerpt is not None:
+                y, sr, windows = excerpt
+            else:
+                y, sr = decode.excerpt  # First 60 seconds at 22.05 kHz for speed
+                windows = None
+            # One shared spectral context: every extractor reuses the same STFT
+            ctx = FeatureContext(y, sr)
+            with measure(timer, 'features.stft'):
+                ctx.magnitude
+            
+            # Calculate spectral magnitude for visualization (20 bins)
+            magnitude_mean = np.mean(ctx.magnitude, axis=1)
+            # Downsample to 20 bins for frontend visualization
+            bins = 20
+            step = len(magnitude_mean) // bins
+            spectral_magnitude = [float(magnitude_mean[i * step]) for i in range(bins)]
+            # Normalize to 0-1 range
+            max_mag = max(spectral_magnitude) if spectral_magnitude else 1.0
+            spectral_magnitude = [v / (max_mag + 1e-10) for v in spectral_magnitude]
+            
+            features = {'ctx': ctx, 'spectral_magnitude': spectral_magnitude}
+            if sections is not None:
+                features['sections'] = sections['sections']
+            if sections is not None and sections['track']:
+                # Whole-track values from the section pass instead of the excerpt estimates
+                track = sections['track']
+                features['tempo'] = track['tempo']
+                features['bpm'] = track['bpm']
+                features['key'] = {'key': track['key'], 'confidence': track['key_confidence'],
+                                   'timeline': track['key_timeline']}
+                for name in ('energy', 'loudness', 'spectral_centroid'):
+                    features[name] = track[name]
+            else:
+                # No section pass, or nothing to segment (empty input): excerpt estimates
+                with measure(timer, 'features.tempo'):
+                    features['tempo'] = estimate_tempo(y, sr, ctx=ctx)
+                    features['bpm'] = features['tempo']['bpm']
+                with measure(timer, 'features.key'):
+                    features['key'] = estimate_key(y, sr, ctx=ctx)
+                with measure(timer, 'features.energy_loudness'):
+                    features['energy'] = calculate_energy(y, sr, ctx=ctx)
+                    features['loudness'] = calculate_loudness(y, sr, ctx=ctx)
+                with measure(timer, 'features.spectral_centroid'):
+                    features['spectral_centroid'] = calculate_spectral_centroid(y, sr, ctx=ctx)
+                if windows is not None:
+                    # Beat and key-timeline times back on the track's timeline
+                    tempo, key = features['tempo'], features['key']
+                    features['tempo'] = {**tempo, 'beats': to_track_time(tempo['beats'], windows)}
+                    features['key'] = {**key, 'timeline': [
+                        {**section, 'start': to_track_time([section['start']], windows)[0],
+                         'end': to_track_time([section['end']], windows, ends=True)[0]}
+                        for section in key['timeline']
+                    ]}
+            if windows is not None:
+                features['excerpt_windows'] = [{'start': round(start, 2), 'end': round(end, 2)}
+                                               for start, end in windows]
+            if full_features_path:
+                with measure(timer, 'features.full_features'):
+                    try:
+                        features['full_features'] = save_full_features(full_features_path, y, sr, ctx=ctx)
+                    except OSError as e:
+                        sys.stderr.write(f"Özellik dosyası yazılamadı: {str(e)}\n")
+                        features['full_features'] = None
+            return features
         
         # 2. ADIM: Mastering Analizi (Tür Tahmininden Önce)
         # Mastering verilerini önce al ki tür tahmini bu verileri kullanabilsin
-        mastering_data = {}
-        try:
-            sys.stderr.write("Mastering analizi başlatılıyor...\n")
-            mastering_data = analyze_mastering(file_path, genre=None)  # Genre henüz bilinmiyor
-            sys.stderr.write("Mastering analizi tamamlandı\n")
-        except Exception as e:
-            sys.stderr.write(f"Mastering analizi hatası: {str(e)}\n")
-            mastering_data = {}
+        def mastering_stage(decode=None):
+            try:
+                sys.stderr.write("Mastering analizi başlatılıyor...\n")
+                # Genre henüz bilinmiyor
+                if stream_mastering:
+                    mastering_data = analyze_mastering_streaming(file_path, genre=None, timer=timer)
+                else:
+                    with measure(timer, 'mastering.resample'):
+                        mastering_y, mastering_sr = decode.mastering
+                    mastering_data = analyze_mastering(file_path, genre=None, y=mastering_y, sr=mastering_sr, timer=timer)
+                sys.stderr.write("Mastering analizi tamamlandı\n")
+                return mastering_data
+            except Exception as e:
+                sys.stderr.write(f"Mastering analizi hatası: {str(e)}\n")
+                return {}
         
         # 3. ADIM: Genre Classification (Mastering Verileri ile)
-        sys.stderr.write("Tür sınıflandırması yapılıyor...\n")
-        model_path = None
-        try:
-            import os
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            model_path = os.path.join(script_dir, 'models', 'cnn_model.h5')
-        except:
-            pass
-        
-        # Genre classification with mastering data for better accuracy
-        try:
-            import inspect
-            sig = inspect.signature(classify_genre)
-            if 'mastering_data' in sig.parameters:
-                genre_result = classify_genre(y, sr, model_path, mastering_data=mastering_data)
-            else:
-                genre_result = classify_genre(y, sr, model_path)
-        except Exception as e:
-            sys.stderr.write(f"Tür sınıflandırma hatası: {str(e)}\n")
-            genre_result = classify_genre(y, sr, model_path)
-        
-        # 4. ADIM: Mastering Tavsiyelerini Genre ile Güncelle
-        detected_genre = genre_result.get('genre', '')
-        if mastering_data and not mastering_data.get('error') and detected_genre:
+        def genre_stage(features, mastering, sections=None):
+            sys.stderr.write("Tür sınıflandırması yapılıyor...\n")
+            ctx = features['ctx']
+            y, sr = ctx.y, ctx.sr
+            model_path = None
             try:
-                # Re-generate recommendations with genre awareness
-                from utils.mastering_analysis import generate_mastering_recommendations
-                mastering_data['recommendations'] = generate_mastering_recommendations(
-                    mastering_data, genre=detected_genre
-                )
+                model_path = get_model_path()
             except:
                 pass
+            
+            # Section mode without a CNN model: rules on whole-track tempo and centroid
+            if sections is not None and not model_available(model_path):
+                genre_result = track_genre(sections, mastering)
+                if genre_result is not None:
+                    return genre_result
+            
+            # Genre classification with mastering data for better accuracy
+            try:
+                import inspect
+                sig = inspect.signature(classify_genre)
+                if 'mastering_data' in sig.parameters:
+                    return classify_genre(y, sr, model_path, mastering_data=mastering, ctx=ctx)
+                return classify_genre(y, sr, model_path, ctx=ctx)
+            except Exception as e:
+                sys.stderr.write(f"Tür sınıflandırma hatası: {str(e)}\n")
+                return classify_genre(y, sr, model_path, ctx=ctx)
         
-        # Extract lyrics (this may take longer)
-        lyrics = ""
-        if WHISPER_AVAILABLE:
+        # 4. ADIM: Mastering Tavsiyelerini Genre ile Güncelle
+        def recommendations_stage(genre, mastering):
+            detected_genre = genre.get('genre', '')
+            if mastering and not mastering.get('error') and detected_genre:
+                try:
+                    # Re-generate recommendations with genre awareness
+                    from utils.mastering_analysis import generate_mastering_recommendations
+                    mastering['recommendations'] = generate_mastering_recommendations(
+                        mastering, genre=detected_genre
+                    )
+                except:
+                    pass
+            return mastering
+        
+        # Extract lyrics (this may take longer); only needs the file path
+        def lyrics_stage():
+            if not WHISPER_AVAILABLE:
+                sys.stderr.write("Söz çıkarma atlandı (Whisper yüklü değil)\n")
+                return ""
             sys.stderr.write("Söz çıkarma başlatılıyor...\n")
             try:
-                lyrics = extract_lyrics(file_path)
+                lyrics = extract_lyrics(file_path, model_size=whisper_model, use_cache=use_cache, timer=timer)
                 if lyrics:
                     sys.stderr.write(f"Sözler başarıyla çıkarıldı ({len(lyrics)} karakter)\n")
                 else:
                     sys.stderr.write("Sözler çıkarılamadı (boş sonuç)\n")
+                return lyrics
             except Exception as e:
                 sys.stderr.write(f"Söz çıkarma hatası: {str(e)}\n")
-                lyrics = ""
-        else:
-            sys.stderr.write("Söz çıkarma atlandı (Whisper yüklü değil)\n")
-        
-        # Helper function to make data JSON serializable
-        def make_json_serializable(obj):
-            """Recursively convert numpy types and other non-serializable types to Python native types."""
-            if isinstance(obj, dict):
-                return {k: make_json_serializable(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [make_json_serializable(item) for item in obj]
-            elif isinstance(obj, (np.integer, np.floating)):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, (np.bool_, bool)):
-                return bool(obj)
-            else:
-                return obj
+                return ""
+        
+        # Result fields contributed by each stage; also sent as partial results
+        # Ensure all values are scalars before rounding (convert to Python native types if needed)
+        def technical_fields(features):
+            bpm, energy, loudness, spectral_centroid = (
+                float(features[name]) if not isinstance(features[name], (int, float)) else features[name]
+                for name in ('bpm', 'energy', 'loudness', 'spectral_centroid')
+            )
+            return {
+                'bpm': round(bpm, 1),
+                # Confidence, half/double candidates, beats and tempogram from the same tempo pass
+                'tempo': {name: value for name, value in features['tempo'].items() if name != 'bpm'},
+                'key': features['key']['key'],
+                'key_confidence': features['key']['confidence'],
+                'key_timeline': features['key']['timeline'],
+                'energy': round(energy, 1),
+                'loudness': round(loudness, 1),
+                'spectral_centroid': round(spectral_centroid, 1),
+                'spectral_magnitude': features['spectral_magnitude'],  # Real spectral data for visualization
+                **{name: features[name] for name in ('excerpt_windows', 'sections') if name in features}
+            }
+        
+        def genre_fields(genre_result):
+            confidence = genre_result['confidence']
+            confidence = float(confidence) if not isinstance(confidence, (int, float)) else confidence
+            return {
+                'genre': genre_result['genre'],
+                'genre_confidence': round(confidence, 2),
+                'genre_probabilities': genre_result['probabilities']
+            }
         
-        # Compile results - ensure all values are scalars before rounding
-        # Convert to Python native types if needed
-        bpm_scalar = float(bpm) if not isinstance(bpm, (int, float)) else bpm
-        energy_scalar = float(energy) if not isinstance(energy, (int, float)) else energy
-        loudness_scalar = float(loudness) if not isinstance(loudness, (int, float)) else loudness
-        spectral_centroid_scalar = float(spectral_centroid) if not isinstance(spectral_centroid, (int, float)) else spectral_centroid
-        confidence_scalar = float(genre_result['confidence']) if not isinstance(genre_result['confidence'], (int, float)) else genre_result['confidence']
+        def mastering_fields(mastering_data):
+            # Shallow copy: the recommendations stage updates the dict in place.
+            # Any NumPy values left are converted when the result is serialized (utils.serialization).
+            return {'mastering': dict(mastering_data) if mastering_data else {}}
         
-        # Ensure mastering data is JSON serializable
-        mastering_data_serialized = make_json_serializable(mastering_data) if mastering_data else {}
+        # Stage name -> (progress event name, result fields)
+        event_fields = {
+            'features': ('technical', technical_fields),
+            'mastering': ('mastering', mastering_fields),
+            'genre': ('genre', genre_fields),
+            # Mastering again, now with genre-aware recommendations
+            'recommendations': ('mastering', mastering_fields),
+            'lyrics': ('lyrics', lambda lyrics: {'lyrics': lyrics})
+        }
+        
+        def stage_complete(name, result):
+            if on_event is not None and name in event_fields:
+                event, fields = event_fields[name]
+                on_event(event, fields(result))
         
+        # Independent stages run concurrently; joins only where a stage needs
+        # another's output (genre needs features + mastering, recommendations need genre).
+        # Streamed mastering reads the file itself and does not wait for the decode.
+        stages = {
+            'decode': (decode_stage, ()),
+            'features': (features_stage, ('decode',)),
+            'mastering': (mastering_stage, () if stream_mastering else ('decode',)),
+            'genre': (genre_stage, ('features', 'mastering')),
+            'recommendations': (recommendations_stage, ('genre', 'mastering')),
+            'lyrics': (lyrics_stage, ())
+        }
+        feature_deps = ('decode',)
+        if excerpt_mode == 'representative':
+            stages['excerpt'] = (excerpt_stage, () if stream_mastering else ('decode',))
+            feature_deps = ('excerpt',)
+        if sections:
+            # Excerpt features and genre take their whole-track values from the section pass
+            stages['sections'] = (sections_stage, () if stream_mastering else ('decode',))
+            feature_deps += ('sections',)
+            stages['genre'] = (genre_stage, ('features', 'mastering', 'sections'))
+        stages['features'] = (features_stage, feature_deps)
+        if not any('decode' in deps for _, deps in stages.values()):
+            # Long files in representative mode read their windows directly
+            del stages['decode']
+        if timer is not None:
+            stages = {name: (timer.wrap(name, func), deps) for name, (func, deps) in stages.items()}
+        # Profiling runs the stages one at a time (one profiler active at once)
+        max_workers = 1 if timer is not None and timer.profile else None
+        stage_results = run_stages(stages, max_workers=max_workers, on_complete=stage_complete)
+        
+        # Compile results
         results = {
-            'bpm': round(bpm_scalar, 1),
-            'key': key,
-            'energy': round(energy_scalar, 1),
-            'loudness': round(loudness_scalar, 1),
-            'spectral_centroid': round(spectral_centroid_scalar, 1),
-            'spectral_magnitude': spectral_magnitude,  # Real spectral data for visualization
-            'genre': genre_result['genre'],
-            'genre_confidence': round(confidence_scalar, 2),
-            'genre_probabilities': genre_result['probabilities'],
-            'lyrics': lyrics,
-            'mastering': mastering_data_serialized
+            **technical_fields(stage_results['features']),
+            **genre_fields(stage_results['genre']),
+            'lyrics': stage_results['lyrics'],
+            **mastering_fields(stage_results['recommendations'])
         }
+        if 'full_features' in stage_results['features']:
+            results['full_features'] = stage_results['features']['full_features']
         
         return results
         
     except Exception as e:
         return {
-            'error': str(e),
+            'error': str(e) or type(e).__name__,
             'bpm': 0,
+            'tempo': {},
             'key': 'Unknown',
+            'key_confidence': 0,
+            'key_timeline': [],
             'energy': 0,
             'loudness': 0,
             'spectral_centroid': 0,
@@ -269,14 +603,351 @@ def analyze_audio(file_path):
         }
 
 
+def warm_up(sr=22050):
+    """
+    Run the feature extractors once on a short synthetic signal.
+    Triggers librosa's numba JIT compilation so the first real job
+    in worker mode does not pay for it.
+    
+    Args:
+        sr: Sample rate used for the warm-up signal
+    """
+    try:
+        t = np.arange(sr * 2) / sr
+        y = (0.1 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        ctx = FeatureContext(y, sr)
+        detect_bpm_with_perceptual_weighting(y, sr, ctx=ctx)
+        detect_key(y, sr, ctx=ctx)
+        calculate_energy(y, sr, ctx=ctx)
+        calculate_spectral_centroid(y, sr, ctx=ctx)
+    except Exception as e:
+        sys.stderr.write(f"Isınma hatası (yok sayıldı): {str(e)}\n")
+
+
+def run_worker():
+    """
+    Long-lived worker mode.
+    Reads newline-delimited JSON jobs from stdin and writes one JSON
+    message per line on stdout, keeping imports and models warm between jobs.
+    
+    Job format:
+        {"id": "<job id>", "file_path": "<path to audio file>", "use_cache": true, "whisper_model": "base",
+         "timings": false, "trace_memory": false, "profile_dir": null, "full_features_path": null,
+         "sections": false, "excerpt": "start"}
+        {"command": "shutdown"}
+    
+    Messages written to stdout:
+        {"event": "ready"}                              - worker is warm and accepting jobs
+        {"id": "<job id>", "event": "partial",
+         "stage": "technical", "data": {...}}           - a stage finished; data holds its result fields
+                                                          (technical, mastering, genre, lyrics)
+        {"id": "<job id>", "result": {...}}             - analysis finished
+        {"id": "<job id>", "error": "<message>"}        - job could not be processed
+    """
+    # Keep the real stdout for protocol messages only; anything else that
+    # prints (libraries, stray debug output) goes to stderr instead
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    
+    def send(message):
+        protocol_out.write(dumps(message) + '\n')
+        protocol_out.flush()
+    
+    warm_up()
+    send({'event': 'ready'})
+    
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            send({'id': None, 'error': f'Invalid job: {str(e)}'})
+            continue
+        
+        if job.get('command') == 'shutdown':
+            break
+        
+        job_id = job.get('id')
+        file_path = job.get('file_path')
+        if not file_path:
+            send({'id': job_id, 'error': 'No file path provided'})
+            continue
+        
+        def send_partial(stage, data, job_id=job_id):
+            send({'id': job_id, 'event': 'partial', 'stage': stage, 'data': data})
+        
+        try:
+            profile_dir = job.get('profile_dir')
+            results = analyze_audio(file_path, use_cache=job.get('use_cache', True),
+                                    whisper_model=job.get('whisper_model'), on_event=send_partial,
+                                    timings=bool(job.get('timings')), trace_memory=bool(job.get('trace_memory')),
+                                    profile_path=profile_path_for(file_path, profile_dir) if profile_dir else None,
+                                    full_features_path=job.get('full_features_path'),
+                                    sections=bool(job.get('sections')),
+                                    excerpt_mode=job.get('excerpt') or 'start')
+            send({'id': job_id, 'result': results})
+        except Exception as e:
+            send({'id': job_id, 'error': str(e)})
+
+
+# Extensions picked up when a batch input is a directory
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.m4a', '.ogg', '.aif', '.aiff')
+
+# Thread pools that would otherwise each use every core in every batch worker
+THREAD_LIMIT_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMBA_NUM_THREADS',
+)
+
+
+def collect_audio_files(inputs):
+    """
+    Expand batch inputs (files, directories, glob patterns) into audio file paths.
+    
+    Args:
+        inputs: List of paths or glob patterns; directories are searched recursively
+    
+    Returns:
+        Sorted list of unique audio file paths
+    """
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in names:
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        files.add(os.path.abspath(os.path.join(root, name)))
+        elif os.path.isfile(item):
+            files.add(os.path.abspath(item))
+        else:
+            for match in glob.glob(item, recursive=True):
+                if os.path.isfile(match) and match.lower().endswith(AUDIO_EXTENSIONS):
+                    files.add(os.path.abspath(match))
+    return sorted(files)
+
+
+def _init_batch_worker(threads):
+    """
+    Pool initializer: pin BLAS/OpenMP/numba thread counts for this worker process.
+    
+    Args:
+        threads: Threads allowed per worker
+    """
+    for name in THREAD_LIMIT_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    try:
+        import numba
+        numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+    except Exception:
+        pass
+
+
+def _analyze_batch_file(file_path, use_cache, whisper_model, timings=False, trace_memory=False, profile_dir=None,
+                        sections=False, excerpt_mode='start'):
+    """
+    Analyze one file inside a batch worker.
+    
+    Returns:
+        Dictionary with file path, wall time, audio duration and analysis results
+    """
+    start = time.perf_counter()
+    results = analyze_audio(file_path, use_cache=use_cache, whisper_model=whisper_model, timings=timings,
+                            trace_memory=trace_memory,
+                            profile_path=profile_path_for(file_path, profile_dir) if profile_dir else None,
+                            sections=sections, excerpt_mode=excerpt_mode)
+    return {
+        'file': file_path,
+        'elapsed': time.perf_counter() - start,
+        'audio_seconds': get_duration(file_path) or 0.0,
+        'result': results
+    }
+
+
+def run_batch(inputs, workers=None, threads_per_worker=1, output=None, summary_path=None, use_cache=True,
+              whisper_model=None, timings=False, trace_memory=False, profile_dir=None, sections=False,
+              excerpt_mode='start'):
+    """
+    Analyze many files across a process pool.
+    Per-file results are streamed as JSON lines as soon as each file finishes.
+    
+    Args:
+        inputs: Files, directories or glob patterns
+        workers: Number of worker processes (default: CPU count / threads_per_worker)
+        threads_per_worker: BLAS/numba threads per worker
+        output: Stream for JSON-lines results (default: stdout)
+        summary_path: Optional path for the JSON summary
+        use_cache: Read and write the on-disk result cache
+        whisper_model: Whisper model size for lyrics
+        timings: Add per-stage timings to every result
+        trace_memory: Include per-stage peak memory in the timings (slower)
+        profile_dir: Write one cProfile (pstats) file per analyzed file into this directory
+        sections: Add the whole-track section pass to every result (see analyze_audio)
+        excerpt_mode: Excerpt selection for every file ('start' or 'representative')
+    
+    Returns:
+        Summary dictionary (file counts, wall time, throughput)
+    """
+    output = output or sys.stdout
+    files = collect_audio_files(inputs)
+    threads_per_worker = max(1, int(threads_per_worker))
+    if not workers:
+        workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+    workers = max(1, min(workers, len(files) or 1))
+    
+    sys.stderr.write(f"Toplu analiz: {len(files)} dosya, {workers} işlemci\n")
+    
+    # Set before the pool starts so spawned workers import numpy/numba with the limits applied
+    for name in THREAD_LIMIT_ENV_VARS:
+        os.environ[name] = str(threads_per_worker)
+    
+    start = time.perf_counter()
+    completed = 0
+    failed = 0
+    audio_seconds = 0.0
+    
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_batch_worker,
+                             initargs=(threads_per_worker,)) as pool:
+        futures = {
+            pool.submit(_analyze_batch_file, path, use_cache, whisper_model, timings, trace_memory, profile_dir,
+                        sections, excerpt_mode): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {'file': futures[future], 'elapsed': 0.0, 'audio_seconds': 0.0, 'result': {'error': str(e)}}
+            
+            completed += 1
+            if 'error' in record['result']:
+                failed += 1
+            else:
+                audio_seconds += record['audio_seconds']
+            
+            output.write(dumps(record) + '\n')
+            output.flush()
+            sys.stderr.write(f"[{completed}/{len(files)}] {record['file']} ({record['elapsed']:.1f} sn)\n")
+    
+    wall_seconds = time.perf_counter() - start
+    summary = {
+        'files': len(files),
+        'succeeded': completed - failed,
+        'failed': failed,
+        'workers': workers,
+        'threads_per_worker': threads_per_worker,
+        'wall_seconds': wall_seconds,
+        'audio_seconds': audio_seconds,
+        'files_per_minute': completed / wall_seconds * 60 if wall_seconds > 0 else 0.0,
+        'audio_seconds_per_second': audio_seconds / wall_seconds if wall_seconds > 0 else 0.0
+    }
+    
+    sys.stderr.write(json.dumps(summary, indent=2) + '\n')
+    if summary_path:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    
+    return summary
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Audio analysis (BPM, key, mastering, genre, lyrics)')
+    parser.add_argument('inputs', nargs='*',
+                        help='Audio file to analyze (with --batch: files, directories or glob patterns)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Run as a long-lived worker reading JSON jobs from stdin')
+    parser.add_argument('--batch', action='store_true',
+                        help='Analyze all inputs across a process pool, one JSON line per file')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Batch worker processes (default: CPU count / threads per worker)')
+    parser.add_argument('--threads-per-worker', type=int, default=1,
+                        help='BLAS/numba threads per batch worker (default: 1)')
+    parser.add_argument('--output', help='Batch: write JSON lines to this file instead of stdout')
+    parser.add_argument('--summary', help='Batch: write the throughput summary to this JSON file')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the on-disk result cache')
+    parser.add_argument('--pcm-cache', action='store_true',
+                        help=f'Cache decoded audio as memory-mapped float32 .npy files (same as {PCM_CACHE_ENV}=1)')
+    parser.add_argument('--whisper-model', choices=WHISPER_MODEL_SIZES, default=None,
+                        help=f'Whisper model size for lyrics (default: {DEFAULT_WHISPER_MODEL})')
+    parser.add_argument('--timings', action='store_true',
+                        help='Add a "timings" block with per-stage wall and CPU time')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='With --timings: also record per-stage peak memory '
+                             '(tracemalloc, Python 3.9+; much slower)')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='Write a cProfile (pstats) file per analyzed file into DIR')
+    parser.add_argument('--full-features', metavar='PATH',
+                        help='Write the per-frame MFCC/chroma matrices to this .npz file (float32; not with --batch)')
+    parser.add_argument('--sections', action='store_true',
+                        help='Whole-track BPM/key/energy/loudness in one streaming pass, plus per-section results')
+    parser.add_argument('--excerpt', choices=EXCERPT_MODES, default='start',
+                        help='Excerpt for the features: the first 60 s, or the most representative windows')
+    parser.add_argument('--pretty', action='store_true', help='Indent the JSON output')
+    parser.add_argument('--events', action='store_true',
+                        help='Write JSON lines: a partial event per finished stage, then {"event": "result", ...}')
+    args = parser.parse_args()
+    
+    if args.pcm_cache:
+        # Through the environment so spawned batch workers inherit it
+        os.environ[PCM_CACHE_ENV] = '1'
+    
+    if args.worker:
+        run_worker()
+        sys.exit(0)
+    
     # Get file path from command line argument
-    if len(sys.argv) < 2:
+    if not args.inputs:
         print(json.dumps({'error': 'No file path provided'}))
         sys.exit(1)
     
-    file_path = sys.argv[1]
-    results = analyze_audio(file_path)
+    if args.batch:
+        if args.full_features:
+            # One .npz path cannot hold the matrices of several files
+            print(json.dumps({'error': '--full-features cannot be combined with --batch'}))
+            sys.exit(1)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as output:
+                run_batch(args.inputs, args.workers, args.threads_per_worker, output, args.summary,
+                          not args.no_cache, args.whisper_model, args.timings, args.trace_memory, args.profile,
+                          args.sections, args.excerpt)
+        else:
+            run_batch(args.inputs, args.workers, args.threads_per_worker, None, args.summary,
+                      not args.no_cache, args.whisper_model, args.timings, args.trace_memory, args.profile,
+                      args.sections, args.excerpt)
+        sys.exit(0)
+    
+    file_path = args.inputs[0]
+    profile_path = profile_path_for(file_path, args.profile) if args.profile else None
+    
+    if args.events:
+        def print_event(stage, data):
+            print(dumps({'event': 'partial', 'stage': stage, 'data': data}), flush=True)
+        
+        results = analyze_audio(file_path, use_cache=not args.no_cache, whisper_model=args.whisper_model,
+                                on_event=print_event, timings=args.timings,
+                                trace_memory=args.trace_memory, profile_path=profile_path,
+                                full_features_path=args.full_features, sections=args.sections,
+                                excerpt_mode=args.excerpt)
+        print(dumps({'event': 'result', 'result': results}))
+        sys.exit(0)
+    
+    results = analyze_audio(file_path, use_cache=not args.no_cache, whisper_model=args.whisper_model,
+                            timings=args.timings, trace_memory=args.trace_memory, profile_path=profile_path,
+                            full_features_path=args.full_features, sections=args.sections,
+                            excerpt_mode=args.excerpt)
     
-    # Output JSON results
-    print(json.dumps(results, indent=2))
+    # Output JSON results (minified unless --pretty)
+    print(dumps(results, pretty=args.pretty))
@@ -0,0 +1,406 @@
+"""
+Micro-benchmarks for utils/audio_features.py, utils/sections.py, utils/excerpt.py,
+utils/mastering_analysis.py and the genre matcher.
+
+Every public function runs on synthetic signals with known ground truth
+(click tracks at a known BPM, chords in a known key, tones and sweeps at a
+known LUFS/peak). Each case reports its median time, throughput in audio
+seconds per second and, where a ground truth exists, accuracy. Results are
+written as JSON and can be diffed against an earlier run:
+
+    python backend/benchmarks/run_benchmarks.py --output backend/benchmarks/baseline.json
+    python backend/benchmarks/run_benchmarks.py --baseline backend/benchmarks/baseline.json
+    python backend/benchmarks/run_benchmarks.py --full --only mastering
+
+Baselines are machine-specific; compare runs from the same machine only.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import librosa  # noqa: E402
+import soundfile as sf  # noqa: E402
+
+from benchmarks import signals  # noqa: E402
+from utils import audio_features, excerpt, genre_signatures, mastering_analysis, sections  # noqa: E402
+from utils.audio_io import ANALYSIS_SR, MASTERING_SR  # noqa: E402
+
+
+# Signal lengths in seconds
+DEFAULT_DURATIONS = (10, 60)
+FULL_DURATIONS = (10, 60, 600, 3600)
+# Cases on signals at least this long are timed once
+SINGLE_RUN_DURATION = 600
+
+# Ground truth of the synthetic signals
+BPM_TRUTH = 128.0
+KEY_TRUTH = 'A Minor'
+LUFS_TRUTH = -14.0
+SWEEP_PEAK_DBFS = -1.0
+
+# Diff thresholds: relative slowdown, and an absolute floor so microsecond cases don't flap
+DEFAULT_THRESHOLD = 0.2
+MIN_REGRESSION_SECONDS = 0.005
+# Accuracy regressions: error growth beyond these
+ACCURACY_TOLERANCE = {'bpm_error': 1.0, 'lufs_error_db': 0.1, 'peak_error_db': 0.1,
+                      'lufs_vs_full_db': 0.1, 'peak_vs_full_db': 0.1}
+
+GENRE_BATCH_SIZE = 10000
+
+
+def _make_signal(kind, duration):
+    """
+    Returns:
+        Tuple of (signal, sample rate) for a signal kind
+    """
+    if kind == 'click':
+        return signals.click_track(BPM_TRUTH, duration, ANALYSIS_SR), ANALYSIS_SR
+    if kind == 'chord':
+        return signals.chord_progression(KEY_TRUTH, duration, ANALYSIS_SR), ANALYSIS_SR
+    if kind == 'tone':
+        return signals.tone_at_lufs(LUFS_TRUTH, duration, MASTERING_SR)[0], MASTERING_SR
+    if kind == 'tone_stereo':
+        return signals.tone_at_lufs(LUFS_TRUTH, duration, MASTERING_SR, channels=2)[0], MASTERING_SR
+    if kind == 'sweep':
+        return signals.log_sweep(duration, MASTERING_SR, SWEEP_PEAK_DBFS), MASTERING_SR
+    raise ValueError(f"Unknown signal kind: {kind}")
+
+
+def _stereo_tone_peak_dbfs():
+    return signals.tone_at_lufs(LUFS_TRUTH, 0.01, MASTERING_SR, channels=2)[1]
+
+
+def _bpm_accuracy(bpm):
+    return {'bpm': round(float(bpm), 2), 'bpm_error': round(abs(float(bpm) - BPM_TRUTH), 2)}
+
+
+def _key_accuracy(key):
+    return {'key': key, 'correct': key == KEY_TRUTH}
+
+
+def _lufs_accuracy(lufs):
+    return {'lufs': round(float(lufs), 3), 'lufs_error_db': round(abs(float(lufs) - LUFS_TRUTH), 3)}
+
+
+def _peak_accuracy(peak_dbtp, truth):
+    return {'peak_dbtp': round(float(peak_dbtp), 3), 'peak_error_db': round(abs(float(peak_dbtp) - truth), 3)}
+
+
+def _mastering_accuracy(result):
+    return {**_lufs_accuracy(result['lufs']), **_peak_accuracy(result['peak']['peak_dbtp'], _stereo_tone_peak_dbfs())}
+
+
+# Signal-length cases: name -> (signal kind, callable(y, sr), accuracy(result) or None)
+SIGNAL_CASES = {
+    'audio_features.detect_bpm_with_perceptual_weighting': (
+        'click', audio_features.detect_bpm_with_perceptual_weighting, _bpm_accuracy),
+    'audio_features.estimate_tempo': (
+        'click', audio_features.estimate_tempo,
+        lambda result: {**_bpm_accuracy(result['bpm']), 'confidence': result['confidence']}),
+    'audio_features.detect_key': ('chord', audio_features.detect_key, _key_accuracy),
+    'audio_features.estimate_key': (
+        'chord', audio_features.estimate_key,
+        lambda result: {**_key_accuracy(result['key']), 'sections': len(result['timeline'])}),
+    'audio_features.calculate_energy': ('chord', audio_features.calculate_energy, None),
+    'audio_features.calculate_loudness': ('chord', audio_features.calculate_loudness, None),
+    'audio_features.calculate_spectral_centroid': ('chord', audio_features.calculate_spectral_centroid, None),
+    'audio_features.extract_mfcc': ('chord', audio_features.extract_mfcc, None),
+    'audio_features.calculate_spectral_rolloff': ('chord', audio_features.calculate_spectral_rolloff, None),
+    'audio_features.calculate_zero_crossing_rate': (
+        'chord', lambda y, sr: audio_features.calculate_zero_crossing_rate(y), None),
+    'audio_features.extract_chroma_features': ('chord', audio_features.extract_chroma_features, None),
+    'audio_features.FeatureContext': ('chord', lambda y, sr: audio_features.FeatureContext(y, sr).mel_db, None),
+    'sections.analyze_sections': (
+        'click', lambda y, sr: sections.analyze_sections([y], sr=sr),
+        lambda result: {**_bpm_accuracy(result['track']['bpm']), 'sections': len(result['sections'])}),
+    'mastering_analysis.calculate_lufs': ('tone_stereo', mastering_analysis.calculate_lufs, _lufs_accuracy),
+    'mastering_analysis.calculate_true_peak': (
+        'sweep', mastering_analysis.calculate_true_peak,
+        lambda result: _peak_accuracy(result['peak_dbtp'], SWEEP_PEAK_DBFS)),
+    'mastering_analysis.calculate_frequency_balance': ('sweep', mastering_analysis.calculate_frequency_balance, None),
+    'mastering_analysis.detect_transients': ('sweep', mastering_analysis.detect_transients, None),
+    'mastering_analysis.analyze_mastering': (
+        'tone_stereo', lambda y, sr: mastering_analysis.analyze_mastering(None, y=y, sr=sr), _mastering_accuracy),
+}
+
+def _streaming_vs_full(result, path):
+    """Streamed mastering results against analyze_mastering on the same file."""
+    full = mastering_analysis.analyze_mastering(path)
+    return {
+        'lufs_vs_full_db': round(abs(result['lufs'] - full['lufs']), 3),
+        'peak_vs_full_db': round(abs(result['peak']['peak_dbtp'] - full['peak']['peak_dbtp']), 3),
+        'num_transients': result['transients']['num_transients'],
+        'num_transients_full': full['transients']['num_transients']
+    }
+
+
+# Cases that stream from a file on disk (the signal is written to a temporary file of
+# the given soundfile format first): name -> (signal kind, callable(path),
+# accuracy(result, path) or None, format)
+FILE_CASES = {
+    'mastering_analysis.analyze_mastering_streaming': (
+        'tone_stereo', mastering_analysis.analyze_mastering_streaming,
+        lambda result, path: _mastering_accuracy(result), 'WAV'),
+    # MP3 decoding is not sample-accurate across reads/seeks in libsndfile
+    'mastering_analysis.analyze_mastering_streaming.mp3': (
+        'tone_stereo', mastering_analysis.analyze_mastering_streaming, _streaming_vs_full, 'MP3'),
+    'excerpt.representative_excerpt': ('click', excerpt.representative_excerpt, None, 'WAV'),
+}
+
+
+def _genre_batch():
+    """Signature centres (denormalized) with small noise, and the genre each one came from."""
+    rng = np.random.default_rng(0)
+    index = rng.integers(0, len(genre_signatures.GENRE_NAMES), GENRE_BATCH_SIZE)
+    normalized = genre_signatures.GENRE_MATRIX[index] + rng.normal(0.0, 0.01, (GENRE_BATCH_SIZE, len(genre_signatures.GENRE_FEATURES)))
+    raw = normalized * genre_signatures.GENRE_FEATURE_SCALES + genre_signatures.GENRE_FEATURE_OFFSETS
+    return raw, index
+
+
+def _genre_top1(raw, index, scores):
+    # Signatures with identical centres are indistinguishable; count a match on any of them
+    best = np.argmax(scores, axis=1)
+    matrix = genre_signatures.GENRE_MATRIX
+    return float(np.mean(np.all(np.isclose(matrix[best], matrix[index]), axis=1)))
+
+
+def _fixed_cases():
+    """
+    Cases whose cost does not depend on signal length.
+
+    Returns:
+        Dictionary of name -> (callable(), calls per timing, accuracy(result) or None)
+    """
+    frequencies = librosa.fft_frequencies(sr=ANALYSIS_SR, n_fft=2048)
+    mastering_frequencies = librosa.fft_frequencies(sr=MASTERING_SR, n_fft=2048)
+    spectrum = np.abs(np.fft.rfft(signals.log_sweep(1.0, MASTERING_SR)[:2048]))
+    mastering_data = mastering_analysis.analyze_mastering(
+        None, y=signals.tone_at_lufs(LUFS_TRUTH, 5.0, MASTERING_SR, channels=2)[0], sr=MASTERING_SR
+    )
+    raw, index = _genre_batch()
+    single = raw[0]
+    return {
+        'audio_features.perceptual_weighting_filter': (
+            lambda: audio_features.perceptual_weighting_filter(frequencies, ANALYSIS_SR), 1, None),
+        'mastering_analysis.k_weighting_sos': (lambda: mastering_analysis.k_weighting_sos(MASTERING_SR), 1, None),
+        'mastering_analysis.k_weighting_filter': (
+            lambda: mastering_analysis.k_weighting_filter(mastering_frequencies, MASTERING_SR), 1, None),
+        'mastering_analysis.frequency_balance_from_spectrum': (
+            lambda: mastering_analysis.frequency_balance_from_spectrum(spectrum, mastering_frequencies), 1, None),
+        'mastering_analysis.generate_mastering_recommendations': (
+            lambda: mastering_analysis.generate_mastering_recommendations(mastering_data, genre='EDM'), 1, None),
+        'genre_signatures.match_genre_by_features_advanced': (
+            lambda: genre_signatures.match_genre_by_features_advanced(*single), 1, None),
+        'genre_signatures.match_genre_by_features': (
+            lambda: genre_signatures.match_genre_by_features(*single), 1, None),
+        'genre_signatures.score_genre_features': (
+            lambda: genre_signatures.score_genre_features(raw), GENRE_BATCH_SIZE,
+            lambda scores: {'top1': round(_genre_top1(raw, index, scores), 4)}),
+    }
+
+
+def time_call(func, repeat):
+    """
+    Run a callable `repeat` times.
+
+    Returns:
+        Tuple of (median seconds, result of the last call)
+    """
+    times = []
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), result
+
+
+def _selected(name, patterns):
+    return not patterns or any(fnmatch.fnmatch(name, f"*{pattern}*") for pattern in patterns)
+
+
+def run_benchmarks(durations=DEFAULT_DURATIONS, repeat=3, only=None):
+    """
+    Run every selected benchmark case.
+
+    Args:
+        durations: Signal lengths in seconds
+        repeat: Timed runs per case (median is kept; long signals run once)
+        only: Optional substrings / wildcard patterns selecting cases
+
+    Returns:
+        Dictionary with run metadata and per-case results keyed by "<case>@<duration>s"
+    """
+    results = {}
+
+    def record(key, seconds, audio_seconds=None, calls=1, accuracy=None):
+        entry = {'seconds': round(seconds, 6)}
+        if audio_seconds is not None:
+            entry['audio_seconds'] = audio_seconds
+            entry['audio_seconds_per_second'] = round(audio_seconds / seconds, 2) if seconds > 0 else None
+        else:
+            entry['calls_per_second'] = round(calls / seconds, 1) if seconds > 0 else None
+        if accuracy:
+            entry['accuracy'] = accuracy
+        results[key] = entry
+        sys.stderr.write(f"{key:<70} {seconds * 1000:10.2f} ms\n")
+
+    for name, (func, calls, accuracy) in _fixed_cases().items():
+        if not _selected(name, only):
+            continue
+        func()  # warm-up
+        seconds, result = time_call(func, max(repeat, 5))
+        record(name, seconds, calls=calls, accuracy=accuracy(result) if accuracy else None)
+
+    signal_cache = {}
+
+    def get_signal(kind, duration):
+        if (kind, duration) not in signal_cache:
+            signal_cache.clear()  # keep one long signal in memory at a time
+            signal_cache[(kind, duration)] = _make_signal(kind, duration)
+        return signal_cache[(kind, duration)]
+
+    for duration in durations:
+        runs = 1 if duration >= SINGLE_RUN_DURATION else repeat
+        for name, (kind, func, accuracy) in SIGNAL_CASES.items():
+            if not _selected(name, only):
+                continue
+            func(*_make_signal(kind, 2))  # warm-up (JIT compilation, caches)
+            y, sr = get_signal(kind, duration)
+            seconds, result = time_call(lambda: func(y, sr), runs)
+            record(f"{name}@{duration}s", seconds, audio_seconds=duration,
+                   accuracy=accuracy(result) if accuracy else None)
+
+        for name, (kind, func, accuracy, file_format) in FILE_CASES.items():
+            if not _selected(name, only):
+                continue
+            if file_format not in sf.available_formats():
+                sys.stderr.write(f"{name}: libsndfile cannot write {file_format}, skipped\n")
+                continue
+            y, sr = get_signal(kind, duration)
+            fd, path = tempfile.mkstemp(suffix='.' + file_format.lower())
+            os.close(fd)
+            try:
+                sf.write(path, y.T, sr, format=file_format, subtype='FLOAT' if file_format == 'WAV' else None)
+                func(path)  # warm-up (page cache)
+                seconds, result = time_call(lambda: func(path), runs)
+                result_accuracy = accuracy(result, path) if accuracy else None
+            finally:
+                os.remove(path)
+            record(f"{name}@{duration}s", seconds, audio_seconds=duration, accuracy=result_accuracy)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'librosa': librosa.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'durations': list(durations),
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def diff_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare a run against a baseline.
+
+    Args:
+        baseline: Earlier run_benchmarks output
+        current: New run_benchmarks output
+        threshold: Relative slowdown reported as a regression (0.2 = 20%)
+
+    Returns:
+        Tuple of (report lines, list of regressions)
+    """
+    lines = []
+    regressions = []
+    for key, entry in current['results'].items():
+        old = baseline['results'].get(key)
+        if old is None:
+            lines.append(f"{key:<70} {'new':>10}")
+            continue
+        ratio = entry['seconds'] / old['seconds'] if old['seconds'] > 0 else float('inf')
+        slower = ratio > 1 + threshold and entry['seconds'] - old['seconds'] > MIN_REGRESSION_SECONDS
+        lines.append(f"{key:<70} {old['seconds'] * 1000:10.2f} -> {entry['seconds'] * 1000:10.2f} ms  "
+                     f"x{ratio:5.2f}{'  SLOWER' if slower else ''}")
+        if slower:
+            regressions.append(f"{key}: {ratio:.2f}x slower")
+
+        old_accuracy = old.get('accuracy', {})
+        for metric, value in entry.get('accuracy', {}).items():
+            previous = old_accuracy.get(metric)
+            if previous is None:
+                continue
+            if metric in ACCURACY_TOLERANCE and value - previous > ACCURACY_TOLERANCE[metric]:
+                regressions.append(f"{key}: {metric} {previous} -> {value}")
+            elif metric == 'correct' and previous and not value:
+                regressions.append(f"{key}: no longer correct ({entry['accuracy']})")
+            elif metric == 'top1' and previous - value > 0.01:
+                regressions.append(f"{key}: top-1 {previous} -> {value}")
+
+    for key in baseline['results']:
+        if key not in current['results']:
+            lines.append(f"{key:<70} {'missing':>10}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the audio feature, mastering and genre functions')
+    parser.add_argument('--durations', type=float, nargs='+', default=None, metavar='SECONDS',
+                        help=f'Signal lengths (default: {" ".join(map(str, DEFAULT_DURATIONS))})')
+    parser.add_argument('--full', action='store_true',
+                        help=f'Use {" ".join(map(str, FULL_DURATIONS))} s signals (the 1 h cases need several GB of RAM)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (median is reported)')
+    parser.add_argument('--only', nargs='+', metavar='PATTERN', help='Only run cases matching these patterns')
+    parser.add_argument('--output', help='Write results JSON here (e.g. to save a baseline)')
+    parser.add_argument('--baseline', help='Compare against this earlier results JSON')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative slowdown reported as a regression (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    durations = args.durations or (FULL_DURATIONS if args.full else DEFAULT_DURATIONS)
+    durations = [int(d) if float(d).is_integer() else d for d in durations]
+    current = run_benchmarks(durations, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+            f.write('\n')
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if args.only:
+            baseline['results'] = {
+                key: entry for key, entry in baseline['results'].items()
+                if _selected(key.split('@')[0], args.only)
+            }
+        lines, regressions = diff_results(baseline, current, args.threshold)
+        print('\n'.join(lines))
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+
+    if not args.output:
+        print(json.dumps(current, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Synthetic benchmark signals with known ground truth:
+- Click tracks at a known BPM
+- Chord progressions in a known key
+- Sine tones and sweeps at a known LUFS and peak level
+"""
+
+import numpy as np
+
+
+KEY_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# Scale degrees (semitones above the tonic) of the I-IV-V-I / i-iv-v-i triads
+_MAJOR_PROGRESSION = [(0, 4, 7), (5, 9, 12), (7, 11, 14), (0, 4, 7)]
+_MINOR_PROGRESSION = [(0, 3, 7), (5, 8, 12), (7, 10, 14), (0, 3, 7)]
+
+
+def click_track(bpm, duration, sr=22050, seed=0):
+    """
+    Percussive click track: a low kick and a noise click on every beat, with an
+    accented downbeat every four beats.
+
+    Args:
+        bpm: Tempo in beats per minute (ground truth)
+        duration: Length in seconds
+        sr: Sample rate
+        seed: Noise seed
+
+    Returns:
+        Mono float32 signal
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * sr)
+    y = np.zeros(n, dtype=np.float32)
+
+    click_len = int(0.08 * sr)
+    t = np.arange(click_len) / sr
+    envelope = np.exp(-t * 60.0)
+    kick = np.sin(2 * np.pi * 60.0 * t) * np.exp(-t * 25.0)
+    click = (0.6 * kick + 0.4 * rng.standard_normal(click_len) * envelope).astype(np.float32)
+
+    beat_period = 60.0 / bpm
+    for i, start in enumerate(np.arange(0.0, duration, beat_period)):
+        begin = int(start * sr)
+        end = min(begin + click_len, n)
+        gain = 1.0 if i % 4 == 0 else 0.6
+        y[begin:end] += gain * click[:end - begin]
+    return 0.5 * y
+
+
+def chord_progression(key, duration, sr=22050, chord_seconds=2.0):
+    """
+    Repeating I-IV-V-I (or i-iv-v-i) triad progression with harmonics and a tonic bass.
+
+    Args:
+        key: Key name as returned by detect_key, e.g. "A Minor" (ground truth)
+        duration: Length in seconds
+        sr: Sample rate
+        chord_seconds: Length of each chord
+
+    Returns:
+        Mono float32 signal
+    """
+    tonic, mode = key.split()
+    root = KEY_NAMES.index(tonic)
+    progression = _MINOR_PROGRESSION if mode == 'Minor' else _MAJOR_PROGRESSION
+    # Tonic around C4 (MIDI 60)
+    tonic_midi = 60 + root
+
+    chord_len = int(chord_seconds * sr)
+    t = np.arange(chord_len) / sr
+    fade = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.02)
+    chords = []
+    for degrees in progression:
+        chord = np.zeros(chord_len)
+        for midi in [tonic_midi + d for d in degrees] + [tonic_midi - 12]:
+            freq = 440.0 * 2 ** ((midi - 69) / 12)
+            for harmonic in range(1, 5):
+                chord += np.sin(2 * np.pi * freq * harmonic * t) / harmonic
+        chords.append(chord * fade)
+    cycle = np.concatenate(chords)
+
+    n = int(duration * sr)
+    y = np.tile(cycle, n // len(cycle) + 1)[:n]
+    return (0.5 * y / np.max(np.abs(y))).astype(np.float32)
+
+
+def tone_at_lufs(lufs, duration, sr=48000, freq=997.0, channels=1):
+    """
+    Steady sine tone at a given integrated loudness.
+    Near 1 kHz the K-weighting gain cancels the -0.691 dB offset of BS.1770,
+    so a sine of amplitude A reads 20*log10(A / sqrt(2)) LUFS per channel,
+    plus 10*log10(channels) when the same tone is on every channel.
+
+    Args:
+        lufs: Target integrated loudness (ground truth)
+        duration: Length in seconds
+        sr: Sample rate
+        freq: Tone frequency (997 Hz avoids sample-aligned peaks)
+        channels: Number of identical channels
+
+    Returns:
+        Tuple of (signal, mono (n,) or (channels, n) float32; sample peak in dBFS)
+    """
+    amplitude = np.sqrt(2.0) * 10 ** ((lufs - 10 * np.log10(channels)) / 20)
+    t = np.arange(int(duration * sr)) / sr
+    y = (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    if channels > 1:
+        y = np.tile(y, (channels, 1))
+    return y, 20 * np.log10(amplitude)
+
+
+def log_sweep(duration, sr=48000, peak_dbfs=-1.0, f_start=20.0, f_end=20000.0):
+    """
+    Logarithmic sine sweep with a known peak level.
+
+    Args:
+        duration: Length in seconds
+        sr: Sample rate
+        peak_dbfs: Peak level (ground truth)
+        f_start: Start frequency in Hz
+        f_end: End frequency in Hz (clipped below Nyquist)
+
+    Returns:
+        Mono float32 signal
+    """
+    f_end = min(f_end, 0.45 * sr)
+    t = np.arange(int(duration * sr)) / sr
+    rate = np.log(f_end / f_start)
+    phase = 2 * np.pi * f_start * duration / rate * (np.exp(t / duration * rate) - 1.0)
+    return (10 ** (peak_dbfs / 20) * np.sin(phase)).astype(np.float32)
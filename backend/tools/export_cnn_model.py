@@ -0,0 +1,98 @@
+"""
+Export the trained genre CNN to a quantized TFLite model.
+
+The exported models/cnn_model.tflite is picked up automatically by the
+analysis when a TFLite runtime (ai-edge-litert or tflite-runtime) is
+installed, so full TensorFlow is only needed on the machine that exports.
+
+    python backend/tools/export_cnn_model.py --calibration path/to/tracks/
+    python backend/tools/export_cnn_model.py --quantization float16
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from analysis import collect_audio_files  # noqa: E402
+from utils.audio_io import ANALYSIS_DURATION, DecodedAudio  # noqa: E402
+from utils.cnn_classifier import (  # noqa: E402
+    CNN_INPUT_SHAPE, TFLITE_QUANTIZATIONS, TFLiteModel, export_tflite_model, get_keras, preprocess_spectrogram
+)
+
+MODELS_DIR = os.path.join(BACKEND_DIR, 'models')
+
+
+def calibration_windows(inputs, max_windows=500):
+    """
+    Representative CNN windows from real tracks, for int8 calibration and accuracy checks.
+
+    Args:
+        inputs: Audio files, directories or glob patterns
+        max_windows: Upper bound on the number of windows (sampled evenly)
+
+    Returns:
+        Array of windows, shape (N, 128, 128, 1)
+    """
+    windows = []
+    for file_path in collect_audio_files(inputs):
+        try:
+            y, sr = DecodedAudio(file_path, max_duration=ANALYSIS_DURATION).excerpt
+        except Exception as e:
+            sys.stderr.write(f"Skipping {file_path}: {e}\n")
+            continue
+        windows.append(preprocess_spectrogram(y, sr, target_shape=CNN_INPUT_SHAPE[:2]))
+    if not windows:
+        return np.empty((0, *CNN_INPUT_SHAPE), dtype=np.float32)
+    windows = np.concatenate(windows)
+    if len(windows) > max_windows:
+        windows = windows[np.linspace(0, len(windows) - 1, max_windows).astype(int)]
+    return windows
+
+
+def compare_models(keras_path, tflite_path, windows):
+    """
+    Agreement of the exported model with the original on the given windows.
+
+    Returns:
+        Dictionary with top-1 agreement and the largest probability difference
+    """
+    reference = np.asarray(get_keras().models.load_model(keras_path)(windows, training=False))
+    exported = TFLiteModel(tflite_path)(windows)
+    return {
+        'top1_agreement': float(np.mean(reference.argmax(axis=1) == exported.argmax(axis=1))),
+        'max_probability_diff': float(np.max(np.abs(reference - exported)))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the genre CNN to a quantized TFLite model')
+    parser.add_argument('--model', default=os.path.join(MODELS_DIR, 'cnn_model.h5'), help='Trained Keras model')
+    parser.add_argument('--output', default=os.path.join(MODELS_DIR, 'cnn_model.tflite'), help='Destination .tflite file')
+    parser.add_argument('--quantization', choices=TFLITE_QUANTIZATIONS, default='int8')
+    parser.add_argument('--calibration', nargs='*', default=[], metavar='PATH',
+                        help='Audio files, directories or glob patterns used for int8 calibration and the accuracy check')
+    parser.add_argument('--max-windows', type=int, default=500, help='Calibration windows to use')
+    args = parser.parse_args(argv)
+
+    windows = calibration_windows(args.calibration, args.max_windows)
+    if args.quantization == 'int8' and len(windows) == 0:
+        parser.error('int8 quantization needs --calibration audio')
+
+    size = export_tflite_model(args.model, args.output, args.quantization, windows)
+    print(f"Exported {args.output} ({size / 1024:.0f} KiB, {args.quantization}); "
+          f"Keras model {os.path.getsize(args.model) / 1024:.0f} KiB")
+
+    if len(windows):
+        comparison = compare_models(args.model, args.output, windows)
+        print(f"Top-1 agreement with the Keras model: {comparison['top1_agreement']:.1%} "
+              f"(max probability difference {comparison['max_probability_diff']:.3f}) on {len(windows)} windows")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Import-time budget for the backend entry points.
+
+Runs `python -X importtime` on each entry point in a fresh interpreter,
+reports the slowest top-level packages and fails when an entry point goes
+over its budget or pulls in a heavy optional dependency (torch, tensorflow,
+whisper, demucs) that should only be imported by the stage that needs it.
+
+    python backend/tools/import_budget.py
+    python backend/tools/import_budget.py --runs 5 --top 15
+    python backend/tools/import_budget.py --update      # re-baseline the budget file
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_budget.json')
+
+# Headroom applied to the measured time when re-baselining with --update
+UPDATE_HEADROOM = 1.5
+
+# "import time:       786 |       2712 | librosa" (nesting shown by two-space indents)
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+def parse_importtime(output):
+    """
+    Parse the stderr of `python -X importtime`.
+
+    Args:
+        output: stderr text
+
+    Returns:
+        List of (module name, nesting depth, self microseconds, cumulative microseconds)
+    """
+    records = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append((name, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return records
+
+
+def measure(module, runs=3):
+    """
+    Import a module in fresh interpreters and keep the fastest run.
+
+    Args:
+        module: Module to import (relative to the backend directory)
+        runs: Number of fresh-interpreter runs
+
+    Returns:
+        Dictionary with total_ms, imported module names and top-level package timings
+    """
+    best = None
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+        records = parse_importtime(proc.stderr)
+        total_us = next((cumulative for name, depth, _, cumulative in records
+                         if name == module and depth == 0), None)
+        if total_us is None:
+            # Module was already imported by the interpreter at start-up
+            total_us = 0
+        if best is None or total_us < best[0]:
+            best = (total_us, records)
+
+    total_us, records = best
+    packages = {}
+    for name, depth, self_us, _ in records:
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+    return {
+        'total_ms': total_us / 1000.0,
+        'modules': {name for name, _, _, _ in records},
+        'packages_ms': {name: us / 1000.0 for name, us in packages.items()}
+    }
+
+
+def load_budget(path=BUDGET_FILE):
+    """
+    Returns:
+        Budget dictionary: {"entry_points": {module: {"max_ms": float, "forbidden": [package, ...]}}}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check(budget, runs=3, top=10, update=False):
+    """
+    Measure every entry point in the budget and print a report.
+
+    Args:
+        budget: Budget dictionary (see load_budget)
+        runs: Fresh-interpreter runs per entry point
+        top: Number of slowest packages to list per entry point
+        update: Rewrite max_ms from the measured times (with UPDATE_HEADROOM)
+
+    Returns:
+        List of budget violations (empty when everything is within budget)
+    """
+    violations = []
+    for module, limits in budget['entry_points'].items():
+        result = measure(module, runs)
+        max_ms = limits.get('max_ms')
+        print(f"{module}: {result['total_ms']:.0f} ms" + (f" (budget {max_ms:.0f} ms)" if max_ms else ''))
+        slowest = sorted(result['packages_ms'].items(), key=lambda item: item[1], reverse=True)[:top]
+        for name, ms in slowest:
+            print(f"    {ms:9.1f} ms  {name}")
+
+        if update:
+            limits['max_ms'] = round(result['total_ms'] * UPDATE_HEADROOM, -1)
+        elif max_ms is not None and result['total_ms'] > max_ms:
+            violations.append(f"{module}: {result['total_ms']:.0f} ms exceeds budget of {max_ms:.0f} ms")
+
+        for package in limits.get('forbidden', []):
+            if package in result['modules']:
+                violations.append(f"{module}: imports '{package}' at start-up")
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check backend start-up import time against its budget')
+    parser.add_argument('--budget', default=BUDGET_FILE, help='Budget JSON file')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh-interpreter runs per entry point (fastest is kept)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest packages to list per entry point')
+    parser.add_argument('--update', action='store_true', help='Rewrite the budgets from this run')
+    args = parser.parse_args(argv)
+
+    budget = load_budget(args.budget)
+    violations = check(budget, runs=args.runs, top=args.top, update=args.update)
+
+    if args.update:
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, indent=2)
+            f.write('\n')
+        print(f"Budget updated: {args.budget}")
+
+    for violation in violations:
+        print(f"OVER BUDGET: {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
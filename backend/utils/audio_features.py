@@ -1,13 +1,107 @@
 """
 Audio feature extraction utilities:
-- FFT-based onset detection with Perceptual Weighting
+- Shared spectral context (one STFT per signal)
+- Single-pass tempo engine on a perceptually weighted onset envelope
+  (BPM, confidence, half/double candidates, beats, tempogram)
 - Chroma feature extraction for key detection
+- Key detection against a precompiled 24-key profile matrix, globally and per window (key timeline)
 - Spectral centroid calculation
 """
 
+from functools import cached_property, partial
+
 import numpy as np
 import librosa
-from scipy import signal
+
+# Tempo search range (BPM) and the centre of the log-normal tempo prior
+TEMPO_RANGE = (60.0, 200.0)
+TEMPO_PRIOR_BPM = 120.0
+# Autocorrelation window of the tempogram (seconds, librosa's default)
+TEMPOGRAM_WINDOW_SECONDS = 8.0
+# BPM grid of the compact tempogram returned with the tempo estimate
+TEMPOGRAM_BPM_GRID = np.arange(40.0, 241.0, 4.0)
+# Long envelopes (whole tracks) are autocorrelated in chunks of this many frames to bound memory
+TEMPOGRAM_CHUNK_FRAMES = 8192
+
+# Key profiles (pitch-class weights from C); each key is a rotation of one of them
+KEY_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+# Window length of the key timeline
+KEY_WINDOW_SECONDS = 8.0
+
+
+class FeatureContext:
+    """
+    Shared spectral context for one audio buffer.
+    Every representation (STFT magnitude, power, mel spectrogram, onset
+    envelope, RMS) is computed on first access and cached, so all extractors
+    and the classifier work from a single transform of the signal.
+    
+    Args:
+        y: Audio time series
+        sr: Sample rate
+        n_fft: FFT size (librosa default)
+        hop_length: Hop length (librosa default)
+    """
+    
+    def __init__(self, y, sr=22050, n_fft=2048, hop_length=512):
+        self.y = y
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+    
+    @cached_property
+    def magnitude(self):
+        """STFT magnitude spectrogram (freq bins x frames)."""
+        return np.abs(librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length))
+    
+    @cached_property
+    def power(self):
+        """STFT power spectrogram."""
+        return self.magnitude ** 2
+    
+    @cached_property
+    def frequencies(self):
+        """Center frequency of each STFT bin in Hz."""
+        return librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft)
+    
+    @cached_property
+    def mel(self):
+        """128-band mel power spectrogram."""
+        return librosa.feature.melspectrogram(S=self.power, sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length)
+    
+    @cached_property
+    def mel_db(self):
+        """Mel spectrogram in dB (ref=1.0, as used by MFCC and onset strength)."""
+        return librosa.power_to_db(self.mel)
+    
+    @cached_property
+    def chroma(self):
+        """12-bin chroma from the power spectrogram (shared by key detection and the classifier)."""
+        return librosa.feature.chroma_stft(S=self.power, sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length)
+    
+    @cached_property
+    def rms(self):
+        """Frame-wise RMS energy."""
+        return librosa.feature.rms(y=self.y, frame_length=self.n_fft, hop_length=self.hop_length)[0]
+    
+    @cached_property
+    def weighted_onset_envelope(self):
+        """
+        Spectral-flux onset envelope of the log STFT, with each bin's flux weighted by
+        perceptual_weighting_filter (kick and cowbell emphasis) when the bins are summed.
+        """
+        weights = perceptual_weighting_filter(self.frequencies, self.sr)
+        return librosa.onset.onset_strength(
+            S=librosa.amplitude_to_db(self.magnitude), sr=self.sr, hop_length=self.hop_length,
+            aggregate=partial(np.average, weights=weights)
+        )
+    
+    @cached_property
+    def tempo(self):
+        """Tempo estimate shared by every consumer (see estimate_tempo)."""
+        return tempo_from_envelope(self.weighted_onset_envelope, self.sr, self.hop_length)
 
 
 def perceptual_weighting_filter(frequencies, sample_rate=22050):
@@ -39,138 +133,324 @@ def perceptual_weighting_filter(frequencies, sample_rate=22050):
     return weights
 
 
-def detect_bpm_with_perceptual_weighting(y, sr=22050):
+def _lag_to_bpm(lag, sr, hop_length):
+    return 60.0 * sr / (hop_length * lag)
+
+
+def tempogram_strength(envelope, sr=22050, hop_length=512, bounds=None):
+    """
+    Autocorrelation tempogram averaged over time: strength of each beat period
+    (lag), normalized so lag 0 is 1.0. Long envelopes are processed in chunks
+    that read win_length frames of context on either side, so every column sees
+    its full autocorrelation window and the result matches a single pass.
+    
+    Args:
+        envelope: Onset strength envelope
+        sr: Sample rate
+        hop_length: Hop length of the envelope frames
+        bounds: Optional frame boundaries [0, ..., len(envelope)]; the average is then
+            taken separately over each segment, all from one tempogram pass
+    
+    Returns:
+        Array of shape (lags,), or (segments, lags) when bounds are given
+    """
+    win_length = librosa.time_to_frames(TEMPOGRAM_WINDOW_SECONDS, sr=sr, hop_length=hop_length).item()
+    segments = list(zip(bounds[:-1], bounds[1:])) if bounds is not None else [(0, len(envelope))]
+    strength = np.zeros((len(segments), win_length))
+    for start in range(0, max(1, len(envelope)), TEMPOGRAM_CHUNK_FRAMES):
+        chunk = envelope[start:start + TEMPOGRAM_CHUNK_FRAMES]
+        # Overlapping context, cut off again after the tempogram
+        context = min(start, win_length)
+        padded = envelope[start - context:start + len(chunk) + win_length]
+        tempogram = librosa.feature.tempogram(onset_envelope=padded, sr=sr, hop_length=hop_length,
+                                              win_length=win_length)[:, context:context + len(chunk)]
+        for i, (lo, hi) in enumerate(segments):
+            lo, hi = max(lo - start, 0), min(hi - start, len(chunk))
+            if lo < hi:
+                strength[i] += np.sum(tempogram[:, lo:hi], axis=1)
+    strength /= np.maximum(1, [hi - lo for lo, hi in segments])[:, np.newaxis]
+    return strength if bounds is not None else strength[0]
+
+
+def tempo_from_envelope(envelope, sr=22050, hop_length=512, beats=True, strength=None):
+    """
+    Tempo estimate from an onset envelope (see estimate_tempo).
+    
+    Args:
+        envelope: Onset strength envelope
+        sr: Sample rate
+        hop_length: Hop length of the envelope frames
+        beats: Also track beats (omitted from the result when False)
+        strength: Optional precomputed tempogram_strength of the envelope
+    
+    Returns:
+        Dictionary with bpm, confidence, candidates, tempogram and (optionally) beats
+    """
+    if strength is None:
+        strength = tempogram_strength(envelope, sr, hop_length)
+    win_length = len(strength)
+    bpms = librosa.tempo_frequencies(win_length, sr=sr, hop_length=hop_length)
+    
+    # Best period inside TEMPO_RANGE under a log-normal prior (as librosa.feature.tempo)
+    log_prior = -0.5 * (np.log2(bpms) - np.log2(TEMPO_PRIOR_BPM)) ** 2
+    in_range = (bpms >= TEMPO_RANGE[0]) & (bpms <= TEMPO_RANGE[1])
+    score = np.where(in_range, np.log1p(1e6 * strength) + log_prior, -np.inf)
+    lag = int(np.argmax(score))
+    
+    # Parabolic interpolation between lags for sub-frame period resolution
+    offset = 0.0
+    if 0 < lag < len(strength) - 1:
+        left, centre, right = strength[lag - 1], strength[lag], strength[lag + 1]
+        curvature = left - 2.0 * centre + right
+        if curvature < 0:
+            offset = float(np.clip(0.5 * (left - right) / curvature, -0.5, 0.5))
+    bpm = _lag_to_bpm(lag + offset, sr, hop_length)
+    
+    def strength_at(candidate_bpm):
+        # bpms decreases with lag; interpolate on the increasing (reversed) axis
+        return float(np.interp(candidate_bpm, bpms[:0:-1], strength[:0:-1]))
+    
+    confidence = float(np.clip(strength[lag], 0.0, 1.0))
+    candidates = [
+        {
+            'bpm': round(bpm * ratio, 2),
+            'strength': round(confidence if ratio == 1.0 else strength_at(bpm * ratio), 3),
+            'ratio': ratio
+        }
+        for ratio in (0.5, 1.0, 2.0)
+    ]
+    
+    result = {
+        'bpm': float(bpm),
+        'confidence': round(confidence, 3),
+        'candidates': candidates
+    }
+    if beats:
+        # Beats on the same envelope, locked to the estimated tempo (no second tempo search)
+        _, beat_frames = librosa.beat.beat_track(onset_envelope=envelope, sr=sr, hop_length=hop_length, bpm=bpm)
+        beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
+        result['beats'] = [round(float(t), 3) for t in beat_times]
+    result['tempogram'] = {
+        'bpm': TEMPOGRAM_BPM_GRID.tolist(),
+        'strength': [round(strength_at(b), 3) for b in TEMPOGRAM_BPM_GRID]
+    }
+    return result
+
+
+def estimate_tempo(y, sr=22050, ctx=None):
+    """
+    Single-pass tempo analysis. One perceptually weighted onset envelope
+    (kick/cowbell bands emphasized) feeds an autocorrelation tempogram, from
+    which the BPM, its confidence and the half/double-tempo candidates are
+    read; beats are tracked on the same envelope at that tempo.
+    
+    Args:
+        y: Audio time series
+        sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
+    
+    Returns:
+        Dictionary with bpm, confidence (0-1 periodicity strength at the chosen tempo),
+        candidates (bpm, strength, ratio for 0.5x/1x/2x), beats (seconds) and a compact
+        tempogram (strength on TEMPOGRAM_BPM_GRID)
+    """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    return ctx.tempo
+
+
+def detect_bpm_with_perceptual_weighting(y, sr=22050, ctx=None):
     """
     Detect BPM using FFT-based onset detection with perceptual weighting.
     
     Args:
         y: Audio time series
         sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
-        Estimated BPM value
-    """
-    # Compute onset strength
-    onset_frames = librosa.onset.onset_detect(
-        y=y,
-        sr=sr,
-        units='time',
-        hop_length=512
-    )
+        Estimated BPM value (from estimate_tempo)
+    """
+    return estimate_tempo(y, sr, ctx=ctx)['bpm']
+
+
+def _standardize(x, axis):
+    # Zero mean, unit norm along axis, so dot products are Pearson correlations
+    x = x - np.mean(x, axis=axis, keepdims=True)
+    return x / (np.linalg.norm(x, axis=axis, keepdims=True) + 1e-12)
+
+
+def compile_key_profiles():
+    """
+    Compile the 24 major/minor key profiles into one matrix.
+    Correlating a chroma vector rotated by -k with a profile equals correlating
+    the chroma with the profile rotated by +k, so every key is a row.
     
-    # Calculate tempo using tempo estimation
-    tempo, beats = librosa.beat.beat_track(
-        y=y,
-        sr=sr,
-        onset_envelope=librosa.onset.onset_strength(y=y, sr=sr),
-        hop_length=512
-    )
+    Returns:
+        Tuple of (key labels, standardized profile matrix of shape (24, 12));
+        rows ordered C Major, C Minor, C# Major, ...
+    """
+    labels = []
+    rows = []
+    for i, name in enumerate(KEY_NAMES):
+        for mode, profile in (('Major', MAJOR_PROFILE), ('Minor', MINOR_PROFILE)):
+            labels.append(f"{name} {mode}")
+            rows.append(np.roll(profile, i))
+    return labels, _standardize(np.array(rows), axis=1)
+
+
+# Compiled once at import
+KEY_LABELS, KEY_PROFILE_MATRIX = compile_key_profiles()
+
+
+def score_keys(chroma):
+    """
+    Correlate chroma with all 24 key profiles in one matrix product.
     
-    # Apply perceptual weighting to refine tempo
-    # Get frequency domain representation
-    stft = librosa.stft(y, hop_length=512)
-    frequencies = librosa.fft_frequencies(sr=sr, n_fft=stft.shape[0] * 2 - 1)
+    Args:
+        chroma: Chroma vector (12,) or one chroma vector per column (12, N)
     
-    # Apply perceptual weighting
-    weights = perceptual_weighting_filter(frequencies, sr)
+    Returns:
+        Pearson correlations in KEY_LABELS order, shape (24,) or (24, N)
+    """
+    return KEY_PROFILE_MATRIX @ _standardize(np.asarray(chroma, dtype=float), axis=0)
+
+
+def key_timeline(chroma, sr=22050, hop_length=512, window_seconds=KEY_WINDOW_SECONDS):
+    """
+    Key per window of a chroma matrix, with consecutive windows in the same key
+    merged into sections.
     
-    # Weight the magnitude spectrogram
-    magnitude = np.abs(stft)
-    weighted_magnitude = magnitude * weights[:, np.newaxis]
+    Args:
+        chroma: Chroma matrix (12, frames)
+        sr: Sample rate
+        hop_length: Hop length of the chroma frames
+        window_seconds: Window length
     
-    # Recompute onset strength with weighted spectrogram
-    onset_strength_weighted = np.sum(weighted_magnitude, axis=0)
+    Returns:
+        List of sections: dictionaries with start and end (seconds), key and
+        confidence (mean correlation of the section's windows)
+    """
+    n_frames = chroma.shape[1]
+    if n_frames == 0:
+        return []
+    window_frames = max(1, int(round(window_seconds * sr / hop_length)))
+    starts = np.arange(0, n_frames, window_frames)
+    lengths = np.diff(np.append(starts, n_frames))
+    window_chroma = np.add.reduceat(chroma, starts, axis=1) / lengths
+    
+    scores = score_keys(window_chroma)
+    best = np.argmax(scores, axis=0)
+    best_scores = scores[best, np.arange(len(best))]
+    
+    frame_seconds = hop_length / float(sr)
+    sections = []
+    section_start = 0
+    for i in range(1, len(best) + 1):
+        if i == len(best) or best[i] != best[section_start]:
+            end_frame = starts[i] if i < len(best) else n_frames
+            sections.append({
+                'start': round(float(starts[section_start] * frame_seconds), 2),
+                'end': round(float(end_frame * frame_seconds), 2),
+                'key': KEY_LABELS[best[section_start]],
+                'confidence': round(float(np.mean(best_scores[section_start:i])), 3)
+            })
+            section_start = i
+    return sections
+
+
+def estimate_key(y, sr=22050, ctx=None, window_seconds=KEY_WINDOW_SECONDS):
+    """
+    Global key and key timeline from one chroma computation.
     
-    # Re-estimate tempo with weighted onset strength
-    tempo_refined, _ = librosa.beat.beat_track(
-        onset_envelope=onset_strength_weighted,
-        sr=sr,
-        hop_length=512
-    )
+    Args:
+        y: Audio time series
+        sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
+        window_seconds: Window length of the timeline
     
-    # Use the refined tempo if it's reasonable (60-200 BPM for phonk)
-    # Convert to scalar if array
-    tempo_scalar = float(tempo.item() if hasattr(tempo, 'item') else tempo)
-    tempo_refined_scalar = float(tempo_refined.item() if hasattr(tempo_refined, 'item') else tempo_refined)
+    Returns:
+        Dictionary with key (e.g. "A Minor"), confidence (correlation with the key profile)
+        and timeline (see key_timeline)
+    """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    return key_from_chroma(ctx.chroma, ctx.sr, ctx.hop_length, window_seconds)
+
+
+def key_from_chroma(chroma, sr=22050, hop_length=512, window_seconds=KEY_WINDOW_SECONDS, timeline=True):
+    """
+    Global key (and optionally the key timeline) of a chroma matrix.
+    
+    Args:
+        chroma: Chroma matrix (12, frames)
+        sr: Sample rate
+        hop_length: Hop length of the chroma frames
+        window_seconds: Window length of the timeline
+        timeline: Include the key timeline
     
-    if 60 <= tempo_refined_scalar <= 200:
-        return tempo_refined_scalar
-    else:
-        return tempo_scalar
+    Returns:
+        Dictionary with key, confidence and (optionally) timeline
+    """
+    scores = score_keys(np.mean(chroma, axis=1))
+    best = int(np.argmax(scores))
+    result = {'key': KEY_LABELS[best], 'confidence': round(float(scores[best]), 3)}
+    if timeline:
+        result['timeline'] = key_timeline(chroma, sr, hop_length, window_seconds)
+    return result
 
 
-def detect_key(y, sr=22050):
+def detect_key(y, sr=22050, ctx=None):
     """
     Detect musical key using chroma features.
     
     Args:
         y: Audio time series
         sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Detected key (e.g., "C Minor", "A Major")
     """
-    # Extract chroma features
-    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-    
-    # Average chroma across time
-    chroma_mean = np.mean(chroma, axis=1)
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
     
-    # Key profiles (simplified - can be enhanced with more sophisticated key detection)
-    major_profile = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
-    minor_profile = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
-    
-    # Normalize profiles
-    major_profile = major_profile / np.sum(major_profile)
-    minor_profile = minor_profile / np.sum(minor_profile)
-    
-    # Correlate with all 12 keys
-    keys = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-    best_correlation = -1
-    best_key = 'C'
-    best_mode = 'Major'
-    
-    for i, key in enumerate(keys):
-        # Rotate chroma to match key
-        rotated_chroma = np.roll(chroma_mean, -i)
-        
-        # Correlate with major and minor profiles
-        major_corr_matrix = np.corrcoef(rotated_chroma, major_profile)
-        minor_corr_matrix = np.corrcoef(rotated_chroma, minor_profile)
-        # Extract scalar values
-        major_corr = float(major_corr_matrix[0, 1].item() if hasattr(major_corr_matrix[0, 1], 'item') else major_corr_matrix[0, 1])
-        minor_corr = float(minor_corr_matrix[0, 1].item() if hasattr(minor_corr_matrix[0, 1], 'item') else minor_corr_matrix[0, 1])
-        
-        if major_corr > best_correlation:
-            best_correlation = major_corr
-            best_key = key
-            best_mode = 'Major'
-        
-        if minor_corr > best_correlation:
-            best_correlation = minor_corr
-            best_key = key
-            best_mode = 'Minor'
-    
-    return f"{best_key} {best_mode}"
-
-
-def calculate_energy(y, sr=22050):
+    # Average chroma across time, scored against all 24 keys at once
+    scores = score_keys(np.mean(ctx.chroma, axis=1))
+    return KEY_LABELS[int(np.argmax(scores))]
+
+
+def calculate_energy(y, sr=22050, ctx=None):
     """
     Calculate energy level of the audio.
     
     Args:
         y: Audio time series
         sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Energy value (0-100)
     """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
     # RMS energy
-    rms = librosa.feature.rms(y=y)[0]
-    energy = np.mean(rms)
+    return energy_from_rms(np.mean(ctx.rms))
+
+
+def energy_from_rms(rms_mean):
+    """
+    Energy level (0-100) from the mean frame RMS.
+    
+    Args:
+        rms_mean: Mean of the frame-wise RMS energy
     
+    Returns:
+        Energy value (0-100)
+    """
     # Convert to scalar if array
-    energy_scalar = float(energy.item() if hasattr(energy, 'item') else energy)
+    energy_scalar = float(rms_mean.item() if hasattr(rms_mean, 'item') else rms_mean)
     
     # Normalize to 0-100 scale
     energy_normalized = min(100, max(0, energy_scalar * 1000))
@@ -178,20 +458,35 @@ def calculate_energy(y, sr=22050):
     return float(energy_normalized)
 
 
-def calculate_loudness(y, sr=22050):
+def calculate_loudness(y, sr=22050, ctx=None):
     """
     Calculate loudness (perceptual loudness).
     
     Args:
         y: Audio time series
         sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Loudness value (LUFS approximation)
     """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
     # Simple loudness approximation using RMS
-    rms = librosa.feature.rms(y=y)[0]
-    rms_mean = np.mean(rms)
+    return loudness_from_rms(np.mean(ctx.rms))
+
+
+def loudness_from_rms(rms_mean):
+    """
+    Loudness (0-100, LUFS approximation) from the mean frame RMS.
+    
+    Args:
+        rms_mean: Mean of the frame-wise RMS energy
+    
+    Returns:
+        Loudness value (0-100)
+    """
     # Convert to scalar if array
     rms_mean_scalar = float(rms_mean.item() if hasattr(rms_mean, 'item') else rms_mean)
     loudness_db = 20 * np.log10(rms_mean_scalar + 1e-10)
@@ -202,24 +497,28 @@ def calculate_loudness(y, sr=22050):
     return float(loudness_normalized)
 
 
-def calculate_spectral_centroid(y, sr=22050):
+def calculate_spectral_centroid(y, sr=22050, ctx=None):
     """
     Calculate spectral centroid (brightness indicator).
     
     Args:
         y: Audio time series
         sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Spectral centroid value
     """
-    centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
+    centroid = librosa.feature.spectral_centroid(S=ctx.magnitude, sr=sr, n_fft=ctx.n_fft)[0]
     centroid_mean = np.mean(centroid)
     # Convert to scalar if array
     return float(centroid_mean.item() if hasattr(centroid_mean, 'item') else centroid_mean)
 
 
-def extract_mfcc(y, sr=22050, n_mfcc=13):
+def extract_mfcc(y, sr=22050, n_mfcc=13, ctx=None, include_full=False):
     """
     Extract MFCC (Mel-Frequency Cepstral Coefficients) features.
     MFCC captures timbre characteristics of the audio.
@@ -228,25 +527,32 @@ def extract_mfcc(y, sr=22050, n_mfcc=13):
         y: Audio time series
         sr: Sample rate
         n_mfcc: Number of MFCC coefficients (default: 13)
+        ctx: Optional FeatureContext for y (created if not given)
+        include_full: Also return the per-frame matrix (float32 array, for binary sidecars)
     
     Returns:
-        Dictionary with MFCC features (mean, std, and full array)
+        Dictionary with MFCC features (mean, std, and the full array if requested)
     """
-    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
+    mfcc = librosa.feature.mfcc(S=ctx.mel_db, sr=sr, n_mfcc=n_mfcc)
     
     # Calculate statistics
     mfcc_mean = np.mean(mfcc, axis=1)
     mfcc_std = np.std(mfcc, axis=1)
     
     # Convert to Python native types
-    return {
+    features = {
         'mean': [float(v.item() if hasattr(v, 'item') else v) for v in mfcc_mean],
-        'std': [float(v.item() if hasattr(v, 'item') else v) for v in mfcc_std],
-        'full': mfcc.tolist()
+        'std': [float(v.item() if hasattr(v, 'item') else v) for v in mfcc_std]
     }
+    if include_full:
+        features['full'] = mfcc.astype(np.float32)
+    return features
 
 
-def calculate_spectral_rolloff(y, sr=22050, roll_percent=0.85):
+def calculate_spectral_rolloff(y, sr=22050, roll_percent=0.85, ctx=None):
     """
     Calculate spectral rolloff - frequency below which a roll_percent of the spectral energy is contained.
     Indicates brightness and high-frequency content.
@@ -255,11 +561,15 @@ def calculate_spectral_rolloff(y, sr=22050, roll_percent=0.85):
         y: Audio time series
         sr: Sample rate
         roll_percent: Rolloff percentage (default: 0.85)
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Spectral rolloff value in Hz
     """
-    rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=roll_percent)[0]
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
+    rolloff = librosa.feature.spectral_rolloff(S=ctx.magnitude, sr=sr, n_fft=ctx.n_fft, roll_percent=roll_percent)[0]
     rolloff_mean = np.mean(rolloff)
     return float(rolloff_mean.item() if hasattr(rolloff_mean, 'item') else rolloff_mean)
 
@@ -280,7 +590,7 @@ def calculate_zero_crossing_rate(y):
     return float(zcr_mean.item() if hasattr(zcr_mean, 'item') else zcr_mean)
 
 
-def extract_chroma_features(y, sr=22050):
+def extract_chroma_features(y, sr=22050, ctx=None, include_full=False):
     """
     Extract chroma features - harmonic structure analysis.
     Captures chord progressions and harmonic differences between genres.
@@ -288,12 +598,17 @@ def extract_chroma_features(y, sr=22050):
     Args:
         y: Audio time series
         sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
+        include_full: Also return the per-frame matrix (float32 array, for binary sidecars)
     
     Returns:
-        Dictionary with chroma features (mean, std, and variance)
+        Dictionary with chroma features (mean, std, variance, and the full array if requested)
     """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
     # Extract chroma features
-    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+    chroma = ctx.chroma
     
     # Calculate statistics
     chroma_mean = np.mean(chroma, axis=1)
@@ -301,9 +616,39 @@ def extract_chroma_features(y, sr=22050):
     chroma_var = np.var(chroma, axis=1)
     
     # Convert to Python native types
-    return {
+    features = {
         'mean': [float(v.item() if hasattr(v, 'item') else v) for v in chroma_mean],
         'std': [float(v.item() if hasattr(v, 'item') else v) for v in chroma_std],
-        'variance': [float(v.item() if hasattr(v, 'item') else v) for v in chroma_var],
-        'full': chroma.tolist()
+        'variance': [float(v.item() if hasattr(v, 'item') else v) for v in chroma_var]
     }
+    if include_full:
+        features['full'] = chroma.astype(np.float32)
+    return features
+
+
+def save_full_features(path, y, sr=22050, ctx=None):
+    """
+    Write the per-frame MFCC and chroma matrices to a compressed .npz sidecar (float32),
+    so the JSON result only has to carry summary statistics.
+    
+    Args:
+        path: Destination .npz path
+        y: Audio time series
+        sr: Sample rate
+        ctx: Optional FeatureContext for y (created if not given)
+    
+    Returns:
+        Path written
+    """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
+    np.savez_compressed(
+        path,
+        mfcc=extract_mfcc(y, sr, ctx=ctx, include_full=True)['full'],
+        chroma=extract_chroma_features(y, sr, ctx=ctx, include_full=True)['full'],
+        sr=np.int32(sr),
+        hop_length=np.int32(ctx.hop_length)
+    )
+    # np.savez adds .npz when missing
+    return path if path.endswith('.npz') else path + '.npz'
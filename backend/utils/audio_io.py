@@ -0,0 +1,385 @@
+"""
+Audio decoding utilities:
+- Single native-rate decode shared by every analysis stage
+- Seek-based window reads for formats soundfile can seek in (WAV, FLAC, OGG, AIFF, ...);
+  librosa's generic decoder for the rest (MP3, M4A)
+- Derived sample-rate views (22.05 kHz analysis excerpt, mastering rate)
+- Optional decoded-PCM cache: float32 .npy files memory-mapped on later runs
+- Sequential block decoding of whole files (soundfile, or audioread for formats
+  libsndfile cannot read) and mono streams at the analysis rate built on it
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from functools import cached_property
+
+import audioread
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+
+from utils import result_cache
+
+
+# Sample rate and excerpt length used by the feature extractors and classifier
+ANALYSIS_SR = 22050
+ANALYSIS_DURATION = 60
+
+# Mastering analysis runs at the native rate when it is one of these,
+# otherwise the signal is resampled to MASTERING_SR (ITU-R BS.1770 reference rate)
+MASTERING_SR = 48000
+MASTERING_NATIVE_RATES = (44100, 48000)
+
+# Files longer than this are not decoded in full; mastering streams them instead
+STREAMING_MIN_DURATION = 600
+
+# Container formats (soundfile names) read directly with seeking; others, including
+# MP3 where libsndfile seeking is only frame-accurate, go through librosa.load
+SEEKABLE_FORMATS = ('WAV', 'WAVEX', 'W64', 'RF64', 'AIFF', 'CAF', 'FLAC', 'OGG')
+# Their decoders return the first few thousand samples after a seek as silence,
+# so windows of those formats are decoded from this much earlier
+SEEK_LEAD_IN_SECONDS = 0.5
+# libsndfile's MP3 decoder also restarts at every read/seek (the silent stretch
+# depends on frame alignment); read_blocks re-reads this many samples before
+# each block and drops them
+BLOCK_LEAD_IN_SAMPLES = 8192
+
+# Decoded-PCM cache (opt-in: AKIBEAT_PCM_CACHE=1). Entries are directories in the
+# 'pcm' cache namespace holding pcm.npy (float32) and meta.json; they are
+# memory-mapped read-only, so worker processes share the same pages.
+PCM_CACHE_ENV = 'AKIBEAT_PCM_CACHE'
+PCM_NAMESPACE = 'pcm'
+
+
+def get_duration(file_path):
+    """
+    Duration of an audio file in seconds, read from the file header when possible.
+
+    Args:
+        file_path: Path to audio file
+
+    Returns:
+        Duration in seconds, or None if it cannot be determined without decoding
+    """
+    try:
+        info = sf.info(file_path)
+        return info.frames / float(info.samplerate)
+    except Exception:
+        pass
+    try:
+        return float(librosa.get_duration(path=file_path))
+    except Exception:
+        return None
+
+
+def resample(y, orig_sr, target_sr):
+    """
+    Resample audio, returning the input unchanged when the rates already match.
+
+    Args:
+        y: Audio time series
+        orig_sr: Sample rate of y
+        target_sr: Desired sample rate
+
+    Returns:
+        Audio time series at target_sr
+    """
+    if orig_sr == target_sr:
+        return y
+    return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr)
+
+
+def seekable_info(file_path):
+    """
+    Args:
+        file_path: Path to audio file
+
+    Returns:
+        soundfile info if the file is in one of SEEKABLE_FORMATS, else None
+    """
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        return None
+    return info if info.format in SEEKABLE_FORMATS else None
+
+
+def read_window(file_path, offset=0.0, duration=None):
+    """
+    Decode one window of a file at its native sample rate, keeping all channels.
+    Seekable formats seek straight to the first frame and read only the frames
+    of the window, so the cost does not grow with the file length; other
+    formats fall back to librosa.load, with a short lead-in before the window.
+
+    Args:
+        file_path: Path to audio file
+        offset: Window start in seconds
+        duration: Window length in seconds (None = to the end of the file)
+
+    Returns:
+        Tuple of (float32 signal (n,) or (channels, n), native sample rate)
+    """
+    info = seekable_info(file_path)
+    if info is None:
+        lead_in = min(offset, SEEK_LEAD_IN_SECONDS)
+        y, sr = librosa.load(file_path, sr=None, mono=False, offset=offset - lead_in,
+                             duration=None if duration is None else duration + lead_in)
+        begin = int(round(lead_in * sr))
+        end = None if duration is None else begin + int(round(duration * sr))
+        return y[..., begin:end], sr
+
+    # Same frame arithmetic as librosa.load, so both paths return identical samples
+    with sf.SoundFile(file_path) as f:
+        if offset:
+            f.seek(min(int(offset * f.samplerate), f.frames))
+        frames = int(duration * f.samplerate) if duration is not None else -1
+        y = f.read(frames=frames, dtype='float32', always_2d=False).T
+    return y, info.samplerate
+
+
+def read_blocks(file_path, blocksize, overlap=0):
+    """
+    Read a file with soundfile in consecutive blocks, keeping all channels.
+    Blocks are laid out as with sf.blocks (each starts `overlap` samples before
+    the end of the previous one), but every block is read after a seek to
+    BLOCK_LEAD_IN_SAMPLES before its start, and the lead-in is dropped. Every
+    sample is therefore exact, even for decoders that are not sample-accurate
+    across reads (MP3).
+
+    Args:
+        file_path: Path to audio file (any format soundfile can read)
+        blocksize: Samples per block
+        overlap: Samples shared with the previous block
+
+    Yields:
+        float32 blocks of shape (n, channels); the last one may be shorter
+    """
+    with sf.SoundFile(file_path) as f:
+        start = 0
+        while start < f.frames:
+            lead_in = min(start, BLOCK_LEAD_IN_SAMPLES)
+            f.seek(start - lead_in)
+            block = f.read(frames=lead_in + blocksize, dtype='float32', always_2d=True)
+            yield block[lead_in:]
+            if start + blocksize >= f.frames:
+                break
+            start += blocksize - overlap
+
+
+def _audioread_blocks(audio_file, blocksize):
+    """float32 blocks (n, channels) of about `blocksize` samples from an open audioread file (closed at the end)."""
+    with audio_file:
+        buffers, samples = [], 0
+        for buffer in audio_file:
+            buffers.append(buffer)
+            samples += len(buffer) // (2 * audio_file.channels)
+            if samples >= blocksize:
+                yield _audioread_samples(b''.join(buffers), audio_file.channels)
+                buffers, samples = [], 0
+        if buffers:
+            yield _audioread_samples(b''.join(buffers), audio_file.channels)
+
+
+def _audioread_samples(buffer, channels):
+    """16-bit interleaved PCM bytes to a float32 (n, channels) array."""
+    return librosa.util.buf_to_float(buffer, n_bytes=2, dtype=np.float32).reshape(-1, channels)
+
+
+def decode_blocks(file_path, block_seconds):
+    """
+    Decode a whole file from start to end in blocks, with memory bounded by the
+    block size: read_blocks where libsndfile can read the format, audioread
+    otherwise (e.g. MP3 on older libsndfile, M4A).
+
+    Args:
+        file_path: Path to audio file
+        block_seconds: Approximate block length
+
+    Returns:
+        Tuple of (native sample rate, iterator of float32 blocks (n, channels))
+    """
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        audio_file = audioread.audio_open(file_path)
+        blocksize = max(1, int(block_seconds * audio_file.samplerate))
+        return audio_file.samplerate, _audioread_blocks(audio_file, blocksize)
+    return info.samplerate, read_blocks(file_path, max(1, int(block_seconds * info.samplerate)))
+
+
+def pcm_cache_enabled():
+    """
+    Returns:
+        True if the decoded-PCM cache is switched on (AKIBEAT_PCM_CACHE=1)
+    """
+    return os.environ.get(PCM_CACHE_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _read_pcm_entry(entry_dir):
+    """
+    Memory-map a cached decode.
+
+    Returns:
+        Tuple of (read-only float32 memmap, sample rate), or None on a miss or an unreadable entry
+    """
+    try:
+        with open(os.path.join(entry_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        y = np.load(os.path.join(entry_dir, 'pcm.npy'), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    result_cache.touch(entry_dir)
+    return y, meta['sr']
+
+
+def _write_pcm_entry(entry_dir, y, sr):
+    """
+    Store a decode; written into a temp directory and renamed into place so
+    concurrent workers never map a half-written file.
+    """
+    os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry_dir), prefix='.tmp-')
+    try:
+        np.save(os.path.join(tmp_dir, 'pcm.npy'), np.ascontiguousarray(y, dtype=np.float32))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'sr': sr, 'shape': list(y.shape)}, f)
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Another worker stored the same decode first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(entry_dir):
+            raise
+    result_cache.evict(PCM_NAMESPACE)
+
+
+def _decode(file_path, sr=None, max_duration=None):
+    """Decode from the start of the file, then convert to sr if given."""
+    y, file_sr = read_window(file_path, duration=max_duration)
+    if sr is not None and sr != file_sr:
+        return resample(y, file_sr, sr), sr
+    return y, file_sr
+
+
+def load_pcm(file_path, sr=None, max_duration=None, use_cache=True):
+    """
+    Decode an audio file to float32 PCM, keeping all channels.
+    With the decoded-PCM cache enabled, full decodes are stored keyed by file
+    content and sample rate and memory-mapped on later calls, so re-analysis
+    skips decoding entirely.
+
+    Args:
+        file_path: Path to audio file
+        sr: Target sample rate (None = native rate)
+        max_duration: Only return this many seconds from the start (None = whole file).
+            Truncated decodes are served from a cached full decode but never stored.
+        use_cache: Allow the decoded-PCM cache (when enabled)
+
+    Returns:
+        Tuple of (signal (n,) or (channels, n), sample rate); a read-only memmap on a cache hit
+    """
+    if not (use_cache and pcm_cache_enabled()):
+        return _decode(file_path, sr, max_duration)
+
+    key = result_cache.make_key(file_path, {'sr': sr}, include_code_version=False)
+    entry_dir = result_cache.entry_path(key, PCM_NAMESPACE, suffix='')
+
+    cached = _read_pcm_entry(entry_dir)
+    if cached is not None:
+        sys.stderr.write("Çözülmüş ses önbellekten yüklendi\n")
+        y, file_sr = cached
+        if max_duration is not None:
+            y = y[..., :int(max_duration * file_sr)]
+        return y, file_sr
+
+    if max_duration is not None:
+        return _decode(file_path, sr, max_duration)
+
+    y, file_sr = _decode(file_path, sr)
+    try:
+        _write_pcm_entry(entry_dir, y, file_sr)
+    except OSError as e:
+        sys.stderr.write(f"Çözülmüş ses önbelleğe yazılamadı: {str(e)}\n")
+    return y, file_sr
+
+
+class DecodedAudio:
+    """
+    One decode of an audio file at its native sample rate.
+    Rate-converted views are derived from that buffer on first access and
+    cached, so analysis and mastering never decode the same file twice.
+    `y` is the mono mix; `channels` keeps the original channels for
+    per-channel measurements (loudness).
+
+    Args:
+        file_path: Path to audio file (MP3, WAV, etc.)
+        max_duration: Only decode this many seconds from the start (None = whole file).
+            The mastering view is unavailable for a truncated decode.
+        use_cache: Allow the decoded-PCM cache (when enabled, see load_pcm)
+    """
+
+    def __init__(self, file_path, max_duration=None, use_cache=True):
+        self.file_path = file_path
+        self.max_duration = max_duration
+        # Native sample rate, original channels plus a mono mix
+        self.channels, self.sr = load_pcm(file_path, max_duration=max_duration, use_cache=use_cache)
+        self.y = librosa.to_mono(self.channels) if self.channels.ndim > 1 else self.channels
+
+    @property
+    def duration(self):
+        """Length of the decoded audio in seconds."""
+        return len(self.y) / float(self.sr)
+
+    @cached_property
+    def analysis(self):
+        """(y, sr) of the whole decoded mono signal at ANALYSIS_SR."""
+        return resample(self.y, self.sr, ANALYSIS_SR), ANALYSIS_SR
+
+    @cached_property
+    def excerpt(self):
+        """(y, sr) of the first ANALYSIS_DURATION seconds at ANALYSIS_SR."""
+        y = self.y[:int(ANALYSIS_DURATION * self.sr)]
+        return resample(y, self.sr, ANALYSIS_SR), ANALYSIS_SR
+
+    @cached_property
+    def mastering(self):
+        """(y, sr) of the full file, all channels, at the mastering rate (native rate when it is 44.1/48 kHz)."""
+        if self.max_duration is not None:
+            raise ValueError('Mastering view needs a full decode (max_duration was set)')
+        if self.sr in MASTERING_NATIVE_RATES:
+            return self.channels, self.sr
+        return resample(self.channels, self.sr, MASTERING_SR), MASTERING_SR
+
+
+def stream_analysis_blocks(file_path, block_seconds=30.0, decoded=None):
+    """
+    Mono blocks of a whole file at ANALYSIS_SR, in order, for single-pass analyses.
+    A full decode that is already in memory is reused; otherwise the file is
+    decoded block by block (decode_blocks) and resampled with a streaming
+    resampler, so memory stays bounded for every format.
+
+    Args:
+        file_path: Path to audio file
+        block_seconds: Approximate block length
+        decoded: Optional DecodedAudio of the whole file (max_duration None)
+
+    Yields:
+        float32 mono blocks at ANALYSIS_SR
+    """
+    if decoded is not None and decoded.max_duration is None:
+        y, sr = decoded.analysis
+        block = int(block_seconds * sr)
+        for start in range(0, len(y), block):
+            yield y[start:start + block]
+        return
+
+    sr, blocks = decode_blocks(file_path, block_seconds)
+    resampler = soxr.ResampleStream(sr, ANALYSIS_SR, 1, dtype='float32')
+    for block in blocks:
+        yield resampler.resample_chunk(block.mean(axis=1))
+    tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+    if len(tail):
+        yield tail
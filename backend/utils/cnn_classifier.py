@@ -3,22 +3,175 @@ CNN-based genre classifier for phonk music.
 Classifies audio into: Dark Phonk, Drift Phonk, Ambient
 """
 
+import importlib.util
+import threading
 import numpy as np
 import librosa
 import os
 
-# Try to import TensorFlow (optional - only needed for CNN model)
-try:
-    import tensorflow as tf
+from utils.audio_features import FeatureContext
+
+# TensorFlow is optional - only needed for the CNN model. Its presence is checked
+# without importing it; get_keras() imports it on first use.
+TENSORFLOW_AVAILABLE = importlib.util.find_spec('tensorflow') is not None
+
+# Lightweight TFLite interpreters, in order of preference. Either can run an exported
+# .tflite model without the full TensorFlow package (tf.lite is the last resort).
+TFLITE_RUNTIMES = ('ai_edge_litert.interpreter', 'tflite_runtime.interpreter')
+TFLITE_RUNTIME_AVAILABLE = TENSORFLOW_AVAILABLE or any(
+    importlib.util.find_spec(name.split('.')[0]) is not None for name in TFLITE_RUNTIMES
+)
+
+# Quantization modes supported by export_tflite_model
+TFLITE_QUANTIZATIONS = ('int8', 'float16', 'dynamic', 'none')
+# CPU threads used by the TFLite interpreter
+TFLITE_NUM_THREADS = 2
+
+# CNN input: 128 mel bands x 128 frames (~3 s at 22.05 kHz, hop 512)
+CNN_INPUT_SHAPE = (128, 128, 1)
+# Windows advance by half a window (50% overlap)
+CNN_WINDOW_HOP_FRAMES = 64
+# Windows per forward pass
+CNN_BATCH_SIZE = 32
+
+CNN_GENRES = ['Dark Phonk', 'Drift Phonk', 'Ambient']
+
+# Band edges (Hz) of the low/mid/high energy estimate used when no mastering data is given
+GENRE_BAND_EDGES = (200, 5000)
+
+# Loaded CNN models keyed by (path, mtime), kept resident for the life of the process
+_cnn_models = {}
+_cnn_lock = threading.Lock()
+
+
+def get_keras():
+    """
+    Import Keras on first use, so runs that never reach the CNN skip the TensorFlow import.
+
+    Returns:
+        The tensorflow.keras module
+    """
     from tensorflow import keras
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
-    tf = None
-    keras = None
+    return keras
+
+
+def get_tflite_interpreter_class():
+    """
+    Import the first available TFLite interpreter on first use.
+
+    Returns:
+        Interpreter class
+    """
+    for name in TFLITE_RUNTIMES:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        return module.Interpreter
+    if TENSORFLOW_AVAILABLE:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+    raise ImportError('No TFLite runtime available (install ai-edge-litert or tflite-runtime)')
+
+
+def model_available(model_path):
+    """
+    Whether a runtime for the model file's format is installed.
+
+    Args:
+        model_path: Path to model file (.tflite or Keras)
+
+    Returns:
+        True if the model can be loaded
+    """
+    if model_path and model_path.endswith('.tflite'):
+        return TFLITE_RUNTIME_AVAILABLE
+    return TENSORFLOW_AVAILABLE
 
 
-def create_cnn_model(input_shape=(128, 128, 1), num_classes=3):
+class TFLiteModel:
+    """
+    Exported (optionally quantized) CNN running on a TFLite interpreter.
+    Called like a Keras model: model(windows) -> class probabilities.
+    Integer-quantized inputs and outputs are converted with the model's
+    own scale and zero point.
+
+    Args:
+        model_path: Path to .tflite file
+        num_threads: Interpreter CPU threads
+    """
+
+    def __init__(self, model_path, num_threads=TFLITE_NUM_THREADS):
+        self.interpreter = get_tflite_interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self.input['shape'][0])
+
+    def __call__(self, windows, training=False):
+        windows = np.asarray(windows, dtype=np.float32)
+        if len(windows) != self._batch_size:
+            self.interpreter.resize_tensor_input(self.input['index'], [len(windows), *windows.shape[1:]])
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+            self._batch_size = len(windows)
+
+        if np.issubdtype(self.input['dtype'], np.integer):
+            scale, zero_point = self.input['quantization']
+            info = np.iinfo(self.input['dtype'])
+            windows = np.clip(np.round(windows / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input['index'], windows.astype(self.input['dtype']))
+        self.interpreter.invoke()
+
+        output = self.interpreter.get_tensor(self.output['index'])
+        if np.issubdtype(self.output['dtype'], np.integer):
+            scale, zero_point = self.output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+def export_tflite_model(model_path, output_path, quantization='int8', calibration_windows=None):
+    """
+    Convert a trained Keras model (built by create_cnn_model) to TFLite.
+    Needs full TensorFlow; the exported file then only needs a TFLite runtime.
+    
+    Args:
+        model_path: Path to trained Keras model
+        output_path: Destination .tflite path
+        quantization: 'int8' (full integer, needs calibration windows), 'float16',
+            'dynamic' (int8 weights, float activations) or 'none'
+        calibration_windows: Representative windows from preprocess_spectrogram, shape (N, 128, 128, 1)
+    
+    Returns:
+        Size of the exported model in bytes
+    """
+    if quantization not in TFLITE_QUANTIZATIONS:
+        raise ValueError(f"Unsupported quantization: {quantization}")
+    import tensorflow as tf
+    
+    model = get_keras().models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if calibration_windows is None or len(calibration_windows) == 0:
+            raise ValueError('int8 quantization needs calibration windows')
+        calibration_windows = np.asarray(calibration_windows, dtype=np.float32)
+        converter.representative_dataset = lambda: ([window[np.newaxis]] for window in calibration_windows)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    
+    data = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def create_cnn_model(input_shape=CNN_INPUT_SHAPE, num_classes=len(CNN_GENRES)):
     """
     Create a lightweight CNN model for genre classification.
     Similar to MESSENGER architecture - optimized for speed.
@@ -33,6 +186,7 @@ def create_cnn_model(input_shape=(128, 128, 1), num_classes=3):
     if not TENSORFLOW_AVAILABLE:
         return None
     
+    keras = get_keras()
     model = keras.Sequential([
         # First conv block
         keras.layers.Conv2D(32, (3, 3), activation='relu', input_shape=input_shape),
@@ -68,45 +222,104 @@ def create_cnn_model(input_shape=(128, 128, 1), num_classes=3):
     return model
 
 
-def preprocess_spectrogram(y, sr=22050, target_shape=(128, 128)):
+def load_cnn_model(model_path):
     """
-    Convert audio to mel-spectrogram and preprocess for CNN.
+    Load a trained model once per process and reuse it on later calls.
+    The model is reloaded if the file changes.
+    
+    Args:
+        model_path: Path to trained model file (.tflite export or Keras model)
+    
+    Returns:
+        Loaded model (TFLiteModel or Keras model)
+    """
+    key = (os.path.abspath(model_path), os.path.getmtime(model_path))
+    with _cnn_lock:
+        model = _cnn_models.get(key)
+        if model is None:
+            if model_path.endswith('.tflite'):
+                model = TFLiteModel(model_path)
+            else:
+                model = get_keras().models.load_model(model_path)
+            # Drop models loaded from an older version of the file
+            _cnn_models.clear()
+            _cnn_models[key] = model
+    return model
+
+
+def preprocess_spectrogram(y, sr=22050, target_shape=(128, 128), hop_frames=CNN_WINDOW_HOP_FRAMES, ctx=None):
+    """
+    Convert audio to a mel-spectrogram and cut it into fixed-length CNN windows.
+    Windows keep the native frame rate (no time-axis resizing); a signal shorter
+    than one window is padded with silence.
     
     Args:
         y: Audio time series
         sr: Sample rate
-        target_shape: Target shape for spectrogram (height, width)
+        target_shape: Window shape (mel bands, frames)
+        hop_frames: Frames between the starts of consecutive windows
+        ctx: Optional FeatureContext for y (its mel spectrogram is reused when it has target_shape[0] bands)
     
     Returns:
-        Preprocessed spectrogram array
+        Array of windows, shape (num_windows, bands, frames, 1), each normalized to [0, 1]
     """
     # Compute mel-spectrogram
-    mel_spec = librosa.feature.melspectrogram(
-        y=y,
-        sr=sr,
-        n_mels=target_shape[0],
-        hop_length=512
-    )
+    if ctx is not None and ctx.mel.shape[0] == target_shape[0]:
+        mel_spec = ctx.mel
+    else:
+        mel_spec = librosa.feature.melspectrogram(
+            y=y,
+            sr=sr,
+            n_mels=target_shape[0],
+            hop_length=512
+        )
     
     # Convert to dB
     mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
     
-    # Normalize to [0, 1]
-    mel_spec_normalized = (mel_spec_db - mel_spec_db.min()) / (mel_spec_db.max() - mel_spec_db.min() + 1e-10)
+    # Pad short signals up to one window with the floor level
+    window_frames = target_shape[1]
+    if mel_spec_db.shape[1] < window_frames:
+        pad = window_frames - mel_spec_db.shape[1]
+        mel_spec_db = np.pad(mel_spec_db, ((0, 0), (0, pad)), constant_values=mel_spec_db.min())
     
-    # Resize to target shape if needed
-    if mel_spec_normalized.shape[1] != target_shape[1]:
-        from scipy.ndimage import zoom
-        zoom_factor = target_shape[1] / mel_spec_normalized.shape[1]
-        mel_spec_normalized = zoom(mel_spec_normalized, (1, zoom_factor))
+    # (num_windows, bands, frames) strided view; the last window is aligned to the end of the signal
+    windows = np.lib.stride_tricks.sliding_window_view(mel_spec_db, window_frames, axis=1)[:, ::hop_frames]
+    windows = np.moveaxis(windows, 1, 0)
+    last_start = mel_spec_db.shape[1] - window_frames
+    if last_start % hop_frames:
+        windows = np.concatenate([windows, mel_spec_db[np.newaxis, :, last_start:]])
+    
+    # Normalize each window to [0, 1]
+    low = windows.min(axis=(1, 2), keepdims=True)
+    high = windows.max(axis=(1, 2), keepdims=True)
+    windows = (windows - low) / (high - low + 1e-10)
     
     # Add channel dimension
-    mel_spec_normalized = np.expand_dims(mel_spec_normalized, axis=-1)
+    return windows[..., np.newaxis].astype(np.float32)
+
+
+def predict_windows(model, windows, batch_size=CNN_BATCH_SIZE):
+    """
+    Predict genre probabilities for every window and average them.
+    
+    Args:
+        model: Keras model or TFLiteModel
+        windows: Array of shape (num_windows, bands, frames, 1)
+        batch_size: Windows per forward pass
     
-    return mel_spec_normalized
+    Returns:
+        Mean class probabilities over all windows
+    """
+    # Calling the model directly avoids model.predict's per-call setup overhead
+    probabilities = [
+        np.asarray(model(windows[start:start + batch_size], training=False))
+        for start in range(0, len(windows), batch_size)
+    ]
+    return np.concatenate(probabilities).mean(axis=0)
 
 
-def classify_genre(y, sr=22050, model_path=None, mastering_data=None):
+def classify_genre(y, sr=22050, model_path=None, mastering_data=None, ctx=None):
     """
     Classify audio genre using CNN model or rule-based classification.
     
@@ -115,21 +328,22 @@ def classify_genre(y, sr=22050, model_path=None, mastering_data=None):
         sr: Sample rate
         model_path: Path to trained model file (optional)
         mastering_data: Optional mastering analysis data for better classification
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Dictionary with genre classification results
     """
-    # If TensorFlow is not available, use rule-based classification
-    if not TENSORFLOW_AVAILABLE:
-        return classify_genre_rule_based(y, sr, mastering_data)
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
     
-    # Preprocess audio
-    spectrogram = preprocess_spectrogram(y, sr)
+    # If no runtime for the model is available, use rule-based classification
+    if not model_available(model_path):
+        return classify_genre_rule_based(y, sr, mastering_data, ctx=ctx)
     
-    # If model path is provided and exists, load it
+    # If model path is provided and exists, load it (once per process)
     if model_path and os.path.exists(model_path):
         try:
-            model = keras.models.load_model(model_path)
+            model = load_cnn_model(model_path)
         except Exception as e:
             print(f"Error loading model: {e}. Using default classification.")
             model = None
@@ -139,13 +353,14 @@ def classify_genre(y, sr=22050, model_path=None, mastering_data=None):
     # If no model available, use rule-based classification as fallback
     # This now supports all major genres via genre signatures
     if model is None:
-        return classify_genre_rule_based(y, sr, mastering_data)
+        return classify_genre_rule_based(y, sr, mastering_data, ctx=ctx)
     
-    # Predict with model (legacy CNN model - only supports Phonk genres)
-    spectrogram_batch = np.expand_dims(spectrogram, axis=0)
-    predictions = model.predict(spectrogram_batch, verbose=0)[0]
+    # Predict with model (legacy CNN model - only supports Phonk genres),
+    # all windows of the excerpt in one batch
+    windows = preprocess_spectrogram(y, sr, target_shape=CNN_INPUT_SHAPE[:2], ctx=ctx)
+    predictions = predict_windows(model, windows)
     
-    genres = ['Dark Phonk', 'Drift Phonk', 'Ambient']
+    genres = CNN_GENRES
     genre_idx = np.argmax(predictions)
     # Convert to scalar if array
     confidence_value = predictions[genre_idx]
@@ -155,7 +370,7 @@ def classify_genre(y, sr=22050, model_path=None, mastering_data=None):
     # But we can enhance with rule-based if confidence is low
     if confidence < 0.7:
         # Low confidence - try rule-based as backup
-        rule_based = classify_genre_rule_based(y, sr, mastering_data)
+        rule_based = classify_genre_rule_based(y, sr, mastering_data, ctx=ctx)
         # Merge probabilities
         merged_probs = {}
         for genre in genres:
@@ -180,7 +395,7 @@ def classify_genre(y, sr=22050, model_path=None, mastering_data=None):
     }
 
 
-def classify_genre_rule_based(y, sr=22050, mastering_data=None):
+def classify_genre_rule_based(y, sr=22050, mastering_data=None, ctx=None):
     """
     Rule-based genre classification using genre signatures.
     Now supports: Rock, Pop, EDM, Hip-Hop, Jazz, Classical, Techno, Metal, Trap, Dark Phonk, Drift Phonk, Ambient
@@ -189,20 +404,24 @@ def classify_genre_rule_based(y, sr=22050, mastering_data=None):
         y: Audio time series
         sr: Sample rate
         mastering_data: Optional mastering analysis data for better classification
+        ctx: Optional FeatureContext for y (created if not given)
     
     Returns:
         Dictionary with genre classification results
     """
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
     # Import genre signatures
     try:
         from utils.genre_signatures import match_genre_by_features_advanced, GENRE_SIGNATURES
     except ImportError:
         # Fallback to old classification if signatures not available
-        return classify_genre_rule_based_legacy(y, sr)
+        return classify_genre_rule_based_legacy(y, sr, ctx=ctx)
     
     # Extract features for classification
-    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-    spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
+    tempo = ctx.tempo['bpm']
+    spectral_centroid = np.mean(librosa.feature.spectral_centroid(S=ctx.magnitude, sr=sr, n_fft=ctx.n_fft))
     
     # Convert NumPy scalars to Python native types
     def to_scalar(value):
@@ -222,37 +441,22 @@ def classify_genre_rule_based(y, sr=22050, mastering_data=None):
     
     # Get frequency balance and transient data from mastering analysis if available
     if mastering_data:
-        low_db_diff = to_scalar(mastering_data.get('frequency_balance', {}).get('low_db_diff', 0))
-        mid_db_diff = to_scalar(mastering_data.get('frequency_balance', {}).get('mid_db_diff', 0))
-        high_db_diff = to_scalar(mastering_data.get('frequency_balance', {}).get('high_db_diff', 0))
-        crest_factor = to_scalar(mastering_data.get('transients', {}).get('crest_factor_db', 10))
+        low_db_diff, mid_db_diff, high_db_diff, crest_factor = mastering_genre_features(mastering_data)
     else:
         # Estimate from spectral analysis
-        stft = librosa.stft(y, n_fft=2048, hop_length=512)
-        magnitude = np.abs(stft)
-        frequencies = librosa.fft_frequencies(sr=sr, n_fft=2048)
+        magnitude = ctx.magnitude
+        frequencies = ctx.frequencies
         
         # Calculate energy in different bands
-        low_mask = frequencies < 200
-        mid_mask = (frequencies >= 200) & (frequencies < 5000)
-        high_mask = frequencies >= 5000
-        
-        low_energy = np.mean(magnitude[low_mask, :])
-        mid_energy = np.mean(magnitude[mid_mask, :])
-        high_energy = np.mean(magnitude[high_mask, :])
-        
-        # Pink noise reference (1/f)
-        pink_ref_low = 1.0 / (200 + 1)
-        pink_ref_mid = 1.0 / (2500 + 1)
-        pink_ref_high = 1.0 / (12500 + 1)
-        
-        # Calculate dB differences
-        low_db_diff = to_scalar(10 * np.log10((low_energy + 1e-10) / (pink_ref_low + 1e-10)))
-        mid_db_diff = to_scalar(10 * np.log10((mid_energy + 1e-10) / (pink_ref_mid + 1e-10)))
-        high_db_diff = to_scalar(10 * np.log10((high_energy + 1e-10) / (pink_ref_high + 1e-10)))
+        low_mask, mid_mask, high_mask = genre_band_masks(frequencies)
+        low_db_diff, mid_db_diff, high_db_diff = pink_noise_db_diffs(
+            np.mean(magnitude[low_mask, :]),
+            np.mean(magnitude[mid_mask, :]),
+            np.mean(magnitude[high_mask, :])
+        )
         
         # Estimate crest factor from RMS and peak
-        rms = np.mean(librosa.feature.rms(y=y))
+        rms = np.mean(ctx.rms)
         peak = np.max(np.abs(y))
         if rms > 0:
             crest_factor = to_scalar(20 * np.log10(peak / (rms + 1e-10)))
@@ -263,16 +467,104 @@ def classify_genre_rule_based(y, sr=22050, mastering_data=None):
     try:
         from utils.audio_features import extract_mfcc, calculate_spectral_rolloff, calculate_zero_crossing_rate, extract_chroma_features
         
-        mfcc_features = extract_mfcc(y, sr)
-        spectral_rolloff = calculate_spectral_rolloff(y, sr)
+        mfcc_features = extract_mfcc(y, sr, ctx=ctx)
+        spectral_rolloff = calculate_spectral_rolloff(y, sr, ctx=ctx)
         zcr = calculate_zero_crossing_rate(y)
-        chroma_features = extract_chroma_features(y, sr)
+        chroma_features = extract_chroma_features(y, sr, ctx=ctx)
     except ImportError:
         mfcc_features = None
         spectral_rolloff = 0
         zcr = 0
         chroma_features = None
     
+    result = classify_genre_from_features(
+        tempo, spectral_centroid, low_db_diff, mid_db_diff, high_db_diff, crest_factor,
+        spectral_rolloff=spectral_rolloff, zcr=zcr, mfcc_features=mfcc_features, chroma_features=chroma_features
+    )
+    if result is None:
+        # Fallback
+        return classify_genre_rule_based_legacy(y, sr, ctx=ctx)
+    return result
+
+
+def mastering_genre_features(mastering_data):
+    """
+    Band balance and crest factor for genre matching, taken from mastering analysis results.
+    
+    Args:
+        mastering_data: analyze_mastering / analyze_mastering_streaming result
+    
+    Returns:
+        Tuple of (low_db_diff, mid_db_diff, high_db_diff, crest_factor)
+    """
+    balance = mastering_data.get('frequency_balance', {})
+    return (
+        float(balance.get('low_db_diff', 0)),
+        float(balance.get('mid_db_diff', 0)),
+        float(balance.get('high_db_diff', 0)),
+        float(mastering_data.get('transients', {}).get('crest_factor_db', 10))
+    )
+
+
+def genre_band_masks(frequencies):
+    """
+    Returns:
+        Boolean masks (low, mid, high) over frequencies, split at GENRE_BAND_EDGES
+    """
+    low_edge, high_edge = GENRE_BAND_EDGES
+    return frequencies < low_edge, (frequencies >= low_edge) & (frequencies < high_edge), frequencies >= high_edge
+
+
+def pink_noise_db_diffs(low_energy, mid_energy, high_energy):
+    """
+    Band energies relative to a pink noise (1/f) reference.
+    
+    Args:
+        low_energy: Mean magnitude below 200 Hz
+        mid_energy: Mean magnitude between 200 Hz and 5 kHz
+        high_energy: Mean magnitude above 5 kHz
+    
+    Returns:
+        Tuple of (low, mid, high) dB differences
+    """
+    # Pink noise reference (1/f)
+    pink_ref_low = 1.0 / (200 + 1)
+    pink_ref_mid = 1.0 / (2500 + 1)
+    pink_ref_high = 1.0 / (12500 + 1)
+    
+    return (
+        float(10 * np.log10((low_energy + 1e-10) / (pink_ref_low + 1e-10))),
+        float(10 * np.log10((mid_energy + 1e-10) / (pink_ref_mid + 1e-10))),
+        float(10 * np.log10((high_energy + 1e-10) / (pink_ref_high + 1e-10)))
+    )
+
+
+def classify_genre_from_features(tempo, spectral_centroid, low_db_diff, mid_db_diff, high_db_diff, crest_factor,
+                                 spectral_rolloff=0, zcr=0, mfcc_features=None, chroma_features=None):
+    """
+    Genre signature matching on already extracted features (used for excerpts,
+    whole tracks and individual sections alike).
+    
+    Args:
+        tempo: BPM
+        spectral_centroid: Spectral centroid in Hz
+        low_db_diff: Low band energy relative to pink noise (dB)
+        mid_db_diff: Mid band energy relative to pink noise (dB)
+        high_db_diff: High band energy relative to pink noise (dB)
+        crest_factor: Crest factor in dB
+        spectral_rolloff: Spectral rolloff in Hz
+        zcr: Zero crossing rate
+        mfcc_features: Optional MFCC features dictionary
+        chroma_features: Optional chroma features dictionary
+    
+    Returns:
+        Dictionary with genre, confidence and probabilities, or None if nothing matched
+    """
+    from utils.genre_signatures import match_genre_by_features_advanced
+    
+    def to_scalar(value):
+        return float(value.item() if hasattr(value, 'item') else value)
+    
     # Match to genre signatures with mathematical matching
     matches = match_genre_by_features_advanced(
         bpm=tempo,
@@ -319,18 +611,19 @@ def classify_genre_rule_based(y, sr=22050, mastering_data=None):
             'confidence': top_confidence,
             'probabilities': probabilities
         }
-    else:
-        # Fallback
-        return classify_genre_rule_based_legacy(y, sr)
+    return None
 
 
-def classify_genre_rule_based_legacy(y, sr=22050):
+def classify_genre_rule_based_legacy(y, sr=22050, ctx=None):
     """
     Legacy rule-based classification (fallback).
     """
-    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-    spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-    rms = np.mean(librosa.feature.rms(y=y))
+    if ctx is None:
+        ctx = FeatureContext(y, sr)
+    
+    tempo = ctx.tempo['bpm']
+    spectral_centroid = np.mean(librosa.feature.spectral_centroid(S=ctx.magnitude, sr=sr, n_fft=ctx.n_fft))
+    rms = np.mean(ctx.rms)
     
     if tempo > 140 and spectral_centroid > 2000:
         genre = 'Drift Phonk'
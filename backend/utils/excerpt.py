@@ -0,0 +1,176 @@
+"""
+Representative excerpt selection:
+- One cheap scan of the whole file: RMS level of short frames at the native rate
+  (no STFT, no resampling), decoded sequentially in blocks so memory stays bounded
+- The loudest, most onset-dense windows are picked as representative
+- Only those windows are decoded and resampled to ANALYSIS_SR; together they
+  are as long as the usual ANALYSIS_DURATION excerpt
+"""
+
+import librosa
+import numpy as np
+
+from utils.audio_io import ANALYSIS_DURATION, ANALYSIS_SR, decode_blocks, read_window, resample
+
+# Excerpt selection modes: the first ANALYSIS_DURATION seconds, or representative windows
+EXCERPT_MODES = ('start', 'representative')
+# Windows per representative excerpt (ANALYSIS_DURATION is split between them)
+REPRESENTATIVE_WINDOWS = 4
+# Level scan: frame length, and the step between candidate window starts
+SCAN_FRAME_SECONDS = 0.05
+SCAN_STEP_SECONDS = 1.0
+SCAN_BLOCK_SECONDS = 30.0
+# Short fades at each window edge, so the joins do not read as onsets
+JOIN_FADE_SECONDS = 0.01
+
+
+def _frame_levels(y, frame_length):
+    """Level in dB of consecutive non-overlapping frames (a trailing partial frame is dropped)."""
+    n_frames = len(y) // frame_length
+    frames = np.asarray(y[:n_frames * frame_length], dtype=np.float32).reshape(n_frames, frame_length)
+    return 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+
+def _block_levels(blocks, frame_length):
+    """Frame levels over consecutive blocks; samples past the last whole frame carry over."""
+    levels = []
+    carry = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        if len(carry):
+            block = np.concatenate([carry, block])
+        levels.append(_frame_levels(block, frame_length))
+        carry = block[len(levels[-1]) * frame_length:]
+    return np.concatenate(levels) if levels else np.zeros(0)
+
+
+def scan_levels(file_path, decoded=None):
+    """
+    Frame levels of the whole file in one pass. Without a whole-file decode the
+    file is decoded block by block (audio_io.decode_blocks), so memory does not
+    grow with its length.
+
+    Args:
+        file_path: Path to audio file
+        decoded: Optional DecodedAudio of the whole file (scanned in memory)
+
+    Returns:
+        Tuple of (level per frame in dB, frame length in seconds)
+    """
+    if decoded is not None and decoded.max_duration is None:
+        frame_length = max(1, int(round(SCAN_FRAME_SECONDS * decoded.sr)))
+        return _frame_levels(decoded.y, frame_length), frame_length / float(decoded.sr)
+
+    sr, blocks = decode_blocks(file_path, SCAN_BLOCK_SECONDS)
+    frame_length = max(1, int(round(SCAN_FRAME_SECONDS * sr)))
+    levels = _block_levels((block.mean(axis=1) for block in blocks), frame_length)
+    return levels, frame_length / float(sr)
+
+
+def representative_windows(levels_db, frame_seconds, n_windows=REPRESENTATIVE_WINDOWS,
+                           window_seconds=ANALYSIS_DURATION / REPRESENTATIVE_WINDOWS):
+    """
+    Pick the most representative windows of a track from its frame levels:
+    loud (mean level) and busy (mean level rise per frame, i.e. onset density),
+    each standardized over all candidate windows. Windows do not overlap.
+
+    Args:
+        levels_db: Frame levels from scan_levels
+        frame_seconds: Frame length in seconds
+        n_windows: Number of windows
+        window_seconds: Length of each window
+
+    Returns:
+        Sorted window start times in seconds (fewer than n_windows if the track is short)
+    """
+    window_frames = max(1, int(round(window_seconds / frame_seconds)))
+    if len(levels_db) <= window_frames:
+        return [0.0]
+    step = max(1, int(round(SCAN_STEP_SECONDS / frame_seconds)))
+    starts = np.arange(0, len(levels_db) - window_frames + 1, step)
+
+    rise = np.maximum(0.0, np.diff(levels_db, prepend=levels_db[0]))
+    cumulative_level = np.concatenate([[0.0], np.cumsum(levels_db)])
+    cumulative_rise = np.concatenate([[0.0], np.cumsum(rise)])
+    level = (cumulative_level[starts + window_frames] - cumulative_level[starts]) / window_frames
+    density = (cumulative_rise[starts + window_frames] - cumulative_rise[starts]) / window_frames
+    score = ((level - level.mean()) / (level.std() + 1e-9)
+             + (density - density.mean()) / (density.std() + 1e-9))
+
+    chosen = []
+    for index in np.argsort(score)[::-1]:
+        start = starts[index]
+        if all(abs(start - other) >= window_frames for other in chosen):
+            chosen.append(start)
+            if len(chosen) == n_windows:
+                break
+    return sorted(float(start * frame_seconds) for start in chosen)
+
+
+def representative_excerpt(file_path, decoded=None, n_windows=REPRESENTATIVE_WINDOWS, duration=ANALYSIS_DURATION):
+    """
+    Excerpt made of the most representative windows of the whole track, at
+    ANALYSIS_SR, as a drop-in replacement for the first `duration` seconds.
+    A whole-file decode already in memory is scanned and sliced; otherwise the
+    file is scanned block by block and only the chosen windows are decoded
+    (read_window: a seek for seekable formats, a decode up to the window end
+    for the others), so memory stays bounded for long files of any format.
+
+    Args:
+        file_path: Path to audio file
+        decoded: Optional DecodedAudio of the file
+        n_windows: Number of windows
+        duration: Total excerpt length in seconds
+
+    Returns:
+        Tuple of (mono float32 excerpt, ANALYSIS_SR, windows as [(start, end)] in track seconds,
+        in excerpt order)
+    """
+    if decoded is not None and decoded.max_duration is not None:
+        decoded = None
+
+    window_seconds = duration / float(n_windows)
+    levels, frame_seconds = scan_levels(file_path, decoded)
+    starts = representative_windows(levels, frame_seconds, n_windows, window_seconds)
+    if starts == [0.0]:
+        # Short track: the whole track (up to `duration`) as one window
+        window_seconds = duration
+
+    fade = int(JOIN_FADE_SECONDS * ANALYSIS_SR)
+    ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+    parts, windows = [], []
+    for start in starts:
+        if decoded is not None:
+            begin = int(start * decoded.sr)
+            y, sr = decoded.y[begin:begin + int(window_seconds * decoded.sr)], decoded.sr
+        else:
+            y, sr = read_window(file_path, offset=start, duration=window_seconds)
+            y = librosa.to_mono(y) if y.ndim > 1 else y
+        y = np.array(resample(y, sr, ANALYSIS_SR), dtype=np.float32)
+        if len(starts) > 1 and len(y) > 2 * fade:
+            y[:fade] *= ramp
+            y[-fade:] *= ramp[::-1]
+        parts.append(y)
+        windows.append((start, start + len(y) / float(ANALYSIS_SR)))
+    return np.concatenate(parts), ANALYSIS_SR, windows
+
+
+def to_track_time(times, windows, ends=False):
+    """
+    Map times in a representative excerpt back to track time.
+
+    Args:
+        times: Times in seconds within the excerpt
+        windows: Windows from representative_excerpt
+        ends: The times end intervals (a time on a join maps to the end of the
+            earlier window instead of the start of the next one)
+
+    Returns:
+        List of track times in seconds (rounded to ms)
+    """
+    starts = np.array([start for start, _ in windows])
+    lengths = np.array([end - start for start, end in windows])
+    offsets = np.concatenate([[0.0], np.cumsum(lengths)[:-1]])
+    times = np.asarray(times, dtype=float)
+    side = 'left' if ends else 'right'
+    index = np.clip(np.searchsorted(offsets, times, side=side) - 1, 0, len(windows) - 1)
+    return [round(float(t), 3) for t in starts[index] + (times - offsets[index])]
@@ -3,6 +3,8 @@ Genre Signatures Database
 Mathematical signatures for all major music genres
 """
 
+import numpy as np
+
 GENRE_SIGNATURES = {
     'EDM': {
         'bpm_range': (120, 130),
@@ -387,6 +389,105 @@ def match_genre_by_features(bpm, spectral_centroid, low_db_diff, mid_db_diff, hi
     )
 
 
+# Order of the columns in the compiled signature matrix and in feature batches
+GENRE_FEATURES = ('bpm', 'spectral_centroid', 'low_db_diff', 'mid_db_diff', 'high_db_diff', 'crest_factor')
+
+# Feature weights for the weighted Euclidean distance
+GENRE_FEATURE_WEIGHTS = np.array([0.25, 0.15, 0.20, 0.15, 0.10, 0.15])
+
+# Normalization to similar scales: (value - offset) / scale
+# BPM 60-200 -> 0-1, centroid / 5000 Hz, dB differences -5..+5 -> 0-1, crest factor / 20 dB
+GENRE_FEATURE_OFFSETS = np.array([60.0, 0.0, -5.0, -5.0, -5.0, 0.0])
+GENRE_FEATURE_SCALES = np.array([200.0 - 60.0, 5000.0, 10.0, 10.0, 10.0, 20.0])
+
+# Distance -> confidence: exp(-distance * scale), smaller distance = higher confidence
+GENRE_CONFIDENCE_SCALE = 2.0
+
+# Expected raw feature values for each signature level
+_CENTROID_BY_HIGH_RANGE = {'very_high': 3500, 'high': 2500, 'medium': 2000}
+_LOW_DB_BY_LEVEL = {'very_high': 5.0, 'high': 2.0, 'medium': 0.0}
+_MID_DB_BY_LEVEL = {'very_high': 5.0, 'high': 2.0, 'balanced': 0.0}
+_HIGH_DB_BY_LEVEL = {'very_high': 5.0, 'high': 2.0, 'medium': 0.0}
+_CREST_BY_DYNAMIC_RANGE = {'very_high': 18.0, 'high': 15.0, 'medium': 12.0, 'low': 10.0}
+
+
+def normalize_genre_features(features):
+    """
+    Normalize raw feature vectors to the common 0-1 scale used for matching.
+    
+    Args:
+        features: Array of shape (len(GENRE_FEATURES),) or (N, len(GENRE_FEATURES))
+    
+    Returns:
+        Normalized array of the same shape
+    """
+    return (np.asarray(features, dtype=np.float64) - GENRE_FEATURE_OFFSETS) / GENRE_FEATURE_SCALES
+
+
+def compile_genre_signatures(signatures=None):
+    """
+    Compile genre signatures into a genres x features matrix of expected values.
+    String levels ('very_high', 'medium', ...) are resolved and normalized once.
+    
+    Args:
+        signatures: Signature dictionary (defaults to GENRE_SIGNATURES)
+    
+    Returns:
+        Tuple of (genre names, normalized expected-value matrix of shape (genres, features))
+    """
+    if signatures is None:
+        signatures = GENRE_SIGNATURES
+    
+    names = list(signatures.keys())
+    expected = np.empty((len(names), len(GENRE_FEATURES)))
+    for i, name in enumerate(names):
+        signature = signatures[name]
+        bpm_min, bpm_max = signature['bpm_range']
+        expected[i] = [
+            (bpm_min + bpm_max) / 2,
+            _CENTROID_BY_HIGH_RANGE.get(signature['high_range_energy'], 1500),
+            _LOW_DB_BY_LEVEL.get(signature['sub_bass_energy'], -2.0),
+            _MID_DB_BY_LEVEL.get(signature['mid_range_energy'], -2.0),
+            _HIGH_DB_BY_LEVEL.get(signature['high_range_energy'], -2.0),
+            _CREST_BY_DYNAMIC_RANGE.get(signature['dynamic_range'], 7.0)
+        ]
+    
+    return names, normalize_genre_features(expected)
+
+
+# Compiled once at import
+GENRE_NAMES, GENRE_MATRIX = compile_genre_signatures()
+_WEIGHTS_SQ = GENRE_FEATURE_WEIGHTS ** 2
+_WEIGHTED_MATRIX_NORM = np.sum(_WEIGHTS_SQ * GENRE_MATRIX ** 2, axis=1)
+
+
+def score_genre_features(features):
+    """
+    Score one track or a batch of tracks against every genre signature at once.
+    The weighted squared distance is expanded into a single matrix product
+    against the compiled signature matrix.
+    
+    Args:
+        features: Raw feature values in GENRE_FEATURES order, shape (F,) or (N, F)
+    
+    Returns:
+        Confidences (0.0-1.0) in GENRE_NAMES order, shape (G,) or (N, G)
+    """
+    x = normalize_genre_features(features)
+    single = x.ndim == 1
+    x = np.atleast_2d(x)
+    
+    # ||w * (x - m)||^2 = sum(w^2 x^2) - 2 (w^2 x) . m + sum(w^2 m^2)
+    distance_sq = (
+        np.sum(_WEIGHTS_SQ * x ** 2, axis=1)[:, np.newaxis]
+        - 2.0 * (x * _WEIGHTS_SQ) @ GENRE_MATRIX.T
+        + _WEIGHTED_MATRIX_NORM[np.newaxis, :]
+    )
+    confidences = np.exp(-np.sqrt(np.maximum(distance_sq, 0.0)) * GENRE_CONFIDENCE_SCALE)
+    
+    return confidences[0] if single else confidences
+
+
 def match_genre_by_features_advanced(bpm, spectral_centroid, low_db_diff, mid_db_diff, high_db_diff, 
                                       crest_factor, spectral_rolloff=0, zcr=0, mfcc_features=None, chroma_features=None):
     """
@@ -408,127 +509,10 @@ def match_genre_by_features_advanced(bpm, spectral_centroid, low_db_diff, mid_db
     Returns:
         List of (genre, confidence) tuples sorted by confidence (0.0-1.0)
     """
-    import numpy as np
-    
-    matches = []
-    
-    for genre, signature in GENRE_SIGNATURES.items():
-        # Feature vector for current audio
-        audio_features = []
-        signature_features = []
-        weights = []
-        
-        # 1. BPM feature (normalized 0-1)
-        bpm_min, bpm_max = signature['bpm_range']
-        bpm_center = (bpm_min + bpm_max) / 2
-        bpm_range = bpm_max - bpm_min
-        audio_features.append(bpm)
-        signature_features.append(bpm_center)
-        weights.append(0.25)  # 25% weight
-        
-        # 2. Spectral Centroid (normalized by typical range 0-5000 Hz)
-        audio_features.append(spectral_centroid)
-        # Estimate expected centroid from signature
-        if signature['high_range_energy'] == 'very_high':
-            expected_centroid = 3500
-        elif signature['high_range_energy'] == 'high':
-            expected_centroid = 2500
-        elif signature['high_range_energy'] == 'medium':
-            expected_centroid = 2000
-        else:
-            expected_centroid = 1500
-        signature_features.append(expected_centroid)
-        weights.append(0.15)  # 15% weight
-        
-        # 3. Low frequency energy (dB difference)
-        audio_features.append(low_db_diff)
-        if signature['sub_bass_energy'] == 'very_high':
-            expected_low = 5.0
-        elif signature['sub_bass_energy'] == 'high':
-            expected_low = 2.0
-        elif signature['sub_bass_energy'] == 'medium':
-            expected_low = 0.0
-        else:
-            expected_low = -2.0
-        signature_features.append(expected_low)
-        weights.append(0.20)  # 20% weight
-        
-        # 4. Mid frequency energy (dB difference)
-        audio_features.append(mid_db_diff)
-        if signature['mid_range_energy'] == 'very_high':
-            expected_mid = 5.0
-        elif signature['mid_range_energy'] == 'high':
-            expected_mid = 2.0
-        elif signature['mid_range_energy'] == 'balanced':
-            expected_mid = 0.0
-        else:
-            expected_mid = -2.0
-        signature_features.append(expected_mid)
-        weights.append(0.15)  # 15% weight
-        
-        # 5. High frequency energy (dB difference)
-        audio_features.append(high_db_diff)
-        if signature['high_range_energy'] == 'very_high':
-            expected_high = 5.0
-        elif signature['high_range_energy'] == 'high':
-            expected_high = 2.0
-        elif signature['high_range_energy'] == 'medium':
-            expected_high = 0.0
-        else:
-            expected_high = -2.0
-        signature_features.append(expected_high)
-        weights.append(0.10)  # 10% weight
-        
-        # 6. Crest Factor (dynamic range indicator)
-        audio_features.append(crest_factor)
-        if signature['dynamic_range'] == 'very_high':
-            expected_crest = 18.0
-        elif signature['dynamic_range'] == 'high':
-            expected_crest = 15.0
-        elif signature['dynamic_range'] == 'medium':
-            expected_crest = 12.0
-        elif signature['dynamic_range'] == 'low':
-            expected_crest = 10.0
-        else:  # very_low
-            expected_crest = 7.0
-        signature_features.append(expected_crest)
-        weights.append(0.15)  # 15% weight
-        
-        # Convert to numpy arrays for distance calculation
-        audio_vec = np.array(audio_features)
-        sig_vec = np.array(signature_features)
-        weight_vec = np.array(weights)
-        
-        # Normalize features to similar scales
-        # BPM: normalize by range
-        audio_vec[0] = (audio_vec[0] - 60) / (200 - 60)  # Normalize 60-200 BPM to 0-1
-        sig_vec[0] = (sig_vec[0] - 60) / (200 - 60)
-        
-        # Spectral Centroid: normalize by 5000 Hz
-        audio_vec[1] = audio_vec[1] / 5000.0
-        sig_vec[1] = sig_vec[1] / 5000.0
-        
-        # dB differences: normalize by 10 dB range
-        audio_vec[2:5] = (audio_vec[2:5] + 5) / 10.0  # Map -5 to +5 dB to 0-1
-        sig_vec[2:5] = (sig_vec[2:5] + 5) / 10.0
-        
-        # Crest Factor: normalize by 20 dB range
-        audio_vec[5] = audio_vec[5] / 20.0
-        sig_vec[5] = sig_vec[5] / 20.0
-        
-        # Weighted Euclidean distance
-        diff = audio_vec - sig_vec
-        weighted_diff = diff * weight_vec
-        distance = np.sqrt(np.sum(weighted_diff ** 2))
-        
-        # Convert distance to confidence (0.0-1.0)
-        # Smaller distance = higher confidence
-        # Use exponential decay: confidence = exp(-distance * scale_factor)
-        scale_factor = 2.0  # Adjust this to control sensitivity
-        confidence = float(np.exp(-distance * scale_factor))
-        
-        matches.append((genre, confidence))
+    confidences = score_genre_features(
+        [bpm, spectral_centroid, low_db_diff, mid_db_diff, high_db_diff, crest_factor]
+    )
     
-    # Sort by confidence (descending)
-    matches.sort(key=lambda x: x[1], reverse=True)
-    return matches
+    # Sort by confidence (descending), ties keep signature order
+    order = np.argsort(-confidences, kind='stable')
+    return [(GENRE_NAMES[i], float(confidences[i])) for i in order]
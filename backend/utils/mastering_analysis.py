@@ -6,118 +6,343 @@ True Peak detection, Frequency Balance analysis, and Transient Detection.
 
 import numpy as np
 import librosa
+import soundfile as sf
 from scipy import signal
 
+from utils.audio_io import MASTERING_NATIVE_RATES, MASTERING_SR, read_blocks, resample
+from utils.profiling import measure
+
+
+# Block-streaming parameters (frame layout matches the in-memory STFTs)
+STREAM_N_FFT = 2048
+STREAM_HOP_LENGTH = 512
+STREAM_BLOCK_FRAMES = 512  # STFT frames per block (~5.5 s at 48 kHz)
+STREAM_ONSET_SEGMENT_FRAMES = 4096  # Onset envelope frames per peak-picking segment (~44 s at 48 kHz)
+
+# True-peak metering (ITU-R BS.1770-4 Annex 2: 4x oversampling, 48-tap interpolator)
+TRUE_PEAK_OVERSAMPLING = 4
+TRUE_PEAK_FILTER_TAPS = 48
+TRUE_PEAK_CHUNK_SIZE = 65536  # Input samples per chunk for in-memory buffers
+MAX_OVER_POSITIONS = 100  # Inter-sample over positions kept in the result
+
+# Loudness gating (ITU-R BS.1770-4)
+LOUDNESS_BLOCK_SECONDS = 0.4
+LOUDNESS_BLOCK_OVERLAP = 0.75
+LOUDNESS_ABSOLUTE_GATE = -70.0  # LUFS
+LOUDNESS_RELATIVE_GATE = -10.0  # LU below the absolutely gated loudness
+LOUDNESS_HISTOGRAM_MAX = 10.0  # LUFS
+LOUDNESS_HISTOGRAM_STEP = 0.01  # LU per histogram bin
+# Channel weights by channel count, in the WAVE/FLAC channel order; Ls/Rs at
+# about 90 degrees count 1.41, LFE is excluded. Other layouts weight every channel 1.0.
+LOUDNESS_CHANNEL_WEIGHTS = {
+    5: (1.0, 1.0, 1.0, 1.41, 1.41),  # L, R, C, Ls, Rs
+    6: (1.0, 1.0, 1.0, 0.0, 1.41, 1.41),  # 5.1: L, R, C, LFE, Ls, Rs
+    8: (1.0, 1.0, 1.0, 0.0, 1.0, 1.0, 1.41, 1.41)  # 7.1: L, R, C, LFE, Lb, Rb, Ls, Rs
+}
+
+
+def k_weighting_sos(sample_rate=48000):
+    """
+    ITU-R BS.1770 K-weighting as second-order sections for any sample rate.
+    Stage 1 is the high-shelf "head" filter, stage 2 the RLB high-pass. The
+    analog prototypes are mapped with the bilinear transform, which reproduces
+    the 48 kHz coefficients given in the standard.
+    
+    Args:
+        sample_rate: Sample rate in Hz
+    
+    Returns:
+        SOS array of shape (2, 6) for scipy.signal.sosfilt
+    """
+    # Stage 1: high shelf (+4 dB above ~1.7 kHz)
+    f0 = 1681.974450955533
+    gain_db = 3.999843853973347
+    q = 0.7071752369554196
+    k = np.tan(np.pi * f0 / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    shelf = [
+        (vh + vb * k / q + k * k) / a0,
+        2.0 * (k * k - vh) / a0,
+        (vh - vb * k / q + k * k) / a0,
+        1.0,
+        2.0 * (k * k - 1.0) / a0,
+        (1.0 - k / q + k * k) / a0
+    ]
+    
+    # Stage 2: RLB high-pass (~38 Hz)
+    f0 = 38.13547087602444
+    q = 0.5003270373238773
+    k = np.tan(np.pi * f0 / sample_rate)
+    a0 = 1.0 + k / q + k * k
+    highpass = [
+        1.0,
+        -2.0,
+        1.0,
+        1.0,
+        2.0 * (k * k - 1.0) / a0,
+        (1.0 - k / q + k * k) / a0
+    ]
+    
+    return np.array([shelf, highpass])
+
 
 def k_weighting_filter(frequencies, sample_rate=48000):
     """
-    ITU-R BS.1770 K-Weighting filter for LUFS calculation.
-    This is a high-pass filter followed by a shelving filter.
+    Magnitude response of the ITU-R BS.1770 K-weighting filter.
     
     Args:
         frequencies: Frequency array
-        sample_rate: Sample rate (should be 48kHz for accurate LUFS)
+        sample_rate: Sample rate of the audio
     
     Returns:
         K-weighting filter response
     """
-    # K-weighting filter coefficients (simplified approximation)
-    # Full implementation would use proper IIR filter design
-    k_response = np.ones_like(frequencies, dtype=np.complex128)
-    
-    # High-pass filter at 100 Hz
-    f_hp = 100.0
-    for i, f in enumerate(frequencies):
-        if f > 0:
-            # First-order high-pass
-            h_hp = 1j * f / (1j * f + f_hp)
-            # Shelving filter at 4 kHz
-            f_shelf = 4000.0
-            if f < f_shelf:
-                # Low shelf boost
-                h_shelf = 1.0 + 1.5 * (f / f_shelf)
-            else:
-                # High shelf cut
-                h_shelf = 1.0 - 0.5 * (f_shelf / f)
-            k_response[i] = h_hp * h_shelf
+    _, response = signal.sosfreqz(k_weighting_sos(sample_rate), worN=np.asarray(frequencies, dtype=np.float64), fs=sample_rate)
+    return np.abs(response)
+
+
+class LoudnessMeter:
+    """
+    ITU-R BS.1770-4 integrated loudness meter.
+    Audio is K-weighted with sosfilt (filter state carried across blocks),
+    squared and summed over channels (surround channels weighted as in
+    LOUDNESS_CHANNEL_WEIGHTS), then measured in 400 ms gating blocks with 75%
+    overlap. Gated blocks go into a fine loudness histogram, so memory stays
+    constant for any file length and blocks can be any size.
     
-    return np.abs(k_response)
+    The relative gate is an approximation: it is applied to the histogram bin
+    floors (LOUDNESS_HISTOGRAM_STEP apart) rather than to the exact block
+    powers, so blocks within 0.01 LU above the gate can be left out.
+    
+    Args:
+        sr: Sample rate of the input
+    """
+    
+    def __init__(self, sr):
+        self.sr = sr
+        self.sos = k_weighting_sos(sr)
+        self.zi = None
+        self.channel_weights = None
+        # 100 ms steps: a 400 ms block with 75% overlap is the mean of 4 consecutive steps
+        self.step = int(round(sr * LOUDNESS_BLOCK_SECONDS * (1.0 - LOUDNESS_BLOCK_OVERLAP)))
+        self.steps_per_block = int(round(1.0 / (1.0 - LOUDNESS_BLOCK_OVERLAP)))
+        self.partial_sum = 0.0
+        self.partial_count = 0
+        self.previous_steps = np.zeros(0)
+        
+        num_bins = int(round((LOUDNESS_HISTOGRAM_MAX - LOUDNESS_ABSOLUTE_GATE) / LOUDNESS_HISTOGRAM_STEP))
+        self.histogram_counts = np.zeros(num_bins, dtype=np.int64)
+        self.histogram_energy = np.zeros(num_bins)
+    
+    def process(self, block):
+        """
+        Feed the next block of audio.
+        
+        Args:
+            block: Mono samples (n,) or multichannel samples (channels, n)
+        """
+        block = np.asarray(block, dtype=np.float64)
+        if block.shape[-1] == 0:
+            return
+        
+        if self.zi is None:
+            self.zi = np.zeros((self.sos.shape[0],) + block.shape[:-1] + (2,))
+            if block.ndim > 1 and block.shape[0] in LOUDNESS_CHANNEL_WEIGHTS:
+                self.channel_weights = np.array(LOUDNESS_CHANNEL_WEIGHTS[block.shape[0]])
+        filtered, self.zi = signal.sosfilt(self.sos, block, axis=-1, zi=self.zi)
+        
+        # Channel-summed (weighted for surround layouts) mean square
+        squared = filtered ** 2
+        if self.channel_weights is not None:
+            squared = self.channel_weights @ squared
+        elif squared.ndim > 1:
+            squared = np.sum(squared, axis=0)
+        
+        # Complete the pending 100 ms step, then cut whole steps, keep the remainder
+        fill = min(self.step - self.partial_count, len(squared))
+        self.partial_sum += float(np.sum(squared[:fill]))
+        self.partial_count += fill
+        squared = squared[fill:]
+        
+        steps = []
+        if self.partial_count == self.step:
+            steps.append(self.partial_sum / self.step)
+            self.partial_sum = 0.0
+            self.partial_count = 0
+            
+            num_steps = len(squared) // self.step
+            if num_steps:
+                steps.extend(squared[:num_steps * self.step].reshape(num_steps, self.step).mean(axis=1))
+            remainder = squared[num_steps * self.step:]
+            self.partial_sum = float(np.sum(remainder))
+            self.partial_count = len(remainder)
+        
+        if not steps:
+            return
+        
+        # Gating block energies: mean over each run of consecutive steps
+        all_steps = np.concatenate((self.previous_steps, steps))
+        self.previous_steps = all_steps[-(self.steps_per_block - 1):]
+        if len(all_steps) < self.steps_per_block:
+            return
+        block_energy = np.convolve(all_steps, np.ones(self.steps_per_block) / self.steps_per_block, mode='valid')
+        
+        # Absolute gate, then accumulate into the histogram
+        block_loudness = -0.691 + 10 * np.log10(block_energy + 1e-20)
+        gated = block_loudness > LOUDNESS_ABSOLUTE_GATE
+        bins = ((block_loudness[gated] - LOUDNESS_ABSOLUTE_GATE) / LOUDNESS_HISTOGRAM_STEP).astype(np.int64)
+        bins = np.clip(bins, 0, len(self.histogram_counts) - 1)
+        np.add.at(self.histogram_counts, bins, 1)
+        np.add.at(self.histogram_energy, bins, block_energy[gated])
+    
+    def integrated(self):
+        """
+        Returns:
+            Integrated loudness in LUFS, or None if no block passes the gates
+            (silence, under 400 ms, or quieter than LOUDNESS_ABSOLUTE_GATE)
+        """
+        total_count = self.histogram_counts.sum()
+        if total_count == 0:
+            return None
+        
+        # Relative gate: 10 LU below the loudness of all absolutely gated blocks
+        ungated_loudness = -0.691 + 10 * np.log10(self.histogram_energy.sum() / total_count)
+        relative_gate = ungated_loudness + LOUDNESS_RELATIVE_GATE
+        
+        bin_floor = LOUDNESS_ABSOLUTE_GATE + np.arange(len(self.histogram_counts)) * LOUDNESS_HISTOGRAM_STEP
+        selected = bin_floor >= relative_gate
+        count = self.histogram_counts[selected].sum()
+        if count == 0:
+            return None
+        
+        return float(-0.691 + 10 * np.log10(self.histogram_energy[selected].sum() / count))
 
 
 def calculate_lufs(y, sr=22050):
     """
-    Calculate LUFS (Loudness Units relative to Full Scale) using ITU-R BS.1770.
+    Calculate integrated LUFS (Loudness Units relative to Full Scale) using ITU-R BS.1770.
     
     Args:
-        y: Audio time series
+        y: Audio time series, mono (n,) or multichannel (channels, n)
         sr: Sample rate
     
     Returns:
-        LUFS value in dB
+        LUFS value in dB, or None if nothing passes the loudness gates
     """
-    # Resample to 48kHz if needed (ITU-R BS.1770 standard)
-    if sr != 48000:
-        y = librosa.resample(y, orig_sr=sr, target_sr=48000)
-        sr = 48000
-    
-    # Apply K-weighting filter in frequency domain
-    stft = librosa.stft(y, n_fft=2048, hop_length=512)
-    frequencies = librosa.fft_frequencies(sr=sr, n_fft=2048)
-    
-    # Get K-weighting response
-    k_weights = k_weighting_filter(frequencies, sr)
+    meter = LoudnessMeter(sr)
+    meter.process(y)
+    return meter.integrated()
+
+
+class TruePeakMeter:
+    """
+    Streaming true-peak meter with a polyphase FIR oversampler.
+    Each chunk is interpolated phase by phase with the filter state carried over
+    from the previous chunk, so a file can be fed in any chunk sizes and memory
+    stays fixed (no whole-file FFT, no 4x-length copy). Every channel is
+    oversampled with its own filter state and the maximum over channels is
+    reported (a downmix would average out peaks present in one channel only).
     
-    # Apply K-weighting to magnitude spectrogram
-    magnitude = np.abs(stft)
-    weighted_magnitude = magnitude * k_weights[:, np.newaxis]
-    
-    # Convert back to time domain (simplified - using RMS of weighted magnitude)
-    # In practice, we'd inverse STFT, but for LUFS we can use RMS directly
-    rms_weighted = np.sqrt(np.mean(weighted_magnitude ** 2, axis=0))
-    rms_mean = np.mean(rms_weighted)
-    
-    # Convert to LUFS (dB)
-    # LUFS = -0.691 + 10 * log10(mean_squared)
-    rms_mean_scalar = float(rms_mean.item() if hasattr(rms_mean, 'item') else rms_mean)
-    if rms_mean_scalar > 0:
-        lufs = -0.691 + 10 * np.log10(rms_mean_scalar ** 2 + 1e-10)
-    else:
-        lufs = -np.inf
+    Args:
+        sr: Sample rate of the input
+        oversampling: Oversampling factor (4x per ITU-R BS.1770)
+        over_threshold_db: Level (dBTP) above which an interpolated sample counts as an over
+    """
     
-    return float(lufs)
+    def __init__(self, sr, oversampling=TRUE_PEAK_OVERSAMPLING, over_threshold_db=0.0):
+        self.sr = sr
+        self.oversampling = oversampling
+        self.over_threshold = 10 ** (over_threshold_db / 20)
+        
+        # Low-pass at the original Nyquist, split into one sub-filter per output phase
+        num_taps = TRUE_PEAK_FILTER_TAPS * oversampling // 4
+        prototype = signal.firwin(num_taps, 1.0 / oversampling, window=('kaiser', 5.0)) * oversampling
+        self.phases = [prototype[p::oversampling] for p in range(oversampling)]
+        # Filter states per phase, shaped (channels, taps - 1) on the first chunk
+        self.zi = None
+        # Filter group delay in oversampled samples (for over positions)
+        self.delay = (num_taps - 1) / 2.0
+        
+        self.samples_processed = 0
+        self.peak_amplitude = 0.0
+        self.num_overs = 0
+        self.over_positions = []
+    
+    def process(self, block):
+        """
+        Feed the next chunk of audio.
+        
+        Args:
+            block: Audio samples following the previously processed ones, mono (n,)
+                or multichannel (channels, n) with the same channels on every call
+        """
+        block = np.atleast_2d(np.asarray(block, dtype=np.float64))
+        n_samples = block.shape[1]
+        if n_samples == 0:
+            return
+        if self.zi is None:
+            self.zi = [np.zeros((block.shape[0], len(h) - 1)) for h in self.phases]
+        
+        # True peak is never below the sample peak
+        self.peak_amplitude = max(self.peak_amplitude, float(np.max(np.abs(block))))
+        
+        # Loudest channel at every oversampled position
+        upsampled = np.empty((n_samples, self.oversampling))
+        for p, h in enumerate(self.phases):
+            phase, self.zi[p] = signal.lfilter(h, 1.0, block, axis=-1, zi=self.zi[p])
+            upsampled[:, p] = np.max(np.abs(phase), axis=0)
+        upsampled = upsampled.ravel()
+        
+        self.peak_amplitude = max(self.peak_amplitude, float(np.max(upsampled)))
+        
+        overs = np.flatnonzero(upsampled > self.over_threshold)
+        self.num_overs += len(overs)
+        remaining = MAX_OVER_POSITIONS - len(self.over_positions)
+        if remaining > 0 and len(overs) > 0:
+            up_index = overs[:remaining] + self.samples_processed * self.oversampling
+            times = np.maximum(0.0, (up_index - self.delay) / (self.sr * self.oversampling))
+            self.over_positions.extend(float(t) for t in times)
+        
+        self.samples_processed += n_samples
+    
+    def result(self):
+        """
+        Returns:
+            Dictionary with peak_dbtp (also as peak_dbfs; None for all-zero input), peak_amplitude,
+            clipping_detected, num_overs and over_positions (seconds, first MAX_OVER_POSITIONS)
+        """
+        peak_dbtp = None
+        if self.peak_amplitude > 0:
+            peak_dbtp = float(20 * np.log10(self.peak_amplitude))
+        
+        return {
+            'peak_dbfs': peak_dbtp,
+            'peak_dbtp': peak_dbtp,
+            'peak_amplitude': float(self.peak_amplitude),
+            'clipping_detected': peak_dbtp is not None and peak_dbtp > 0.0,
+            'num_overs': int(self.num_overs),
+            'over_positions': self.over_positions
+        }
 
 
 def calculate_true_peak(y, sr=22050):
     """
-    Calculate True Peak (maximum amplitude) in dBFS.
+    Calculate True Peak (maximum inter-sample amplitude over all channels) in dBTP.
     
     Args:
-        y: Audio time series
+        y: Audio time series, mono (n,) or multichannel (channels, n)
         sr: Sample rate
     
     Returns:
-        Dictionary with peak_dbfs, peak_amplitude, and clipping_detected
+        Dictionary with peak_dbfs/peak_dbtp, peak_amplitude, clipping_detected,
+        num_overs and over_positions
     """
-    # Upsample to detect inter-sample peaks (4x oversampling)
-    y_upsampled = signal.resample(y, len(y) * 4)
-    
-    # Find maximum absolute amplitude
-    peak_amplitude = float(np.max(np.abs(y_upsampled)))
-    
-    # Convert to dBFS (0 dBFS = 1.0 amplitude)
-    if peak_amplitude > 0:
-        peak_dbfs = 20 * np.log10(peak_amplitude)
-    else:
-        peak_dbfs = -np.inf
-    
-    # Check for clipping (above 0 dBFS)
-    clipping_detected = bool(peak_dbfs > 0.0)
-    
-    return {
-        'peak_dbfs': float(peak_dbfs),
-        'peak_amplitude': float(peak_amplitude),
-        'clipping_detected': clipping_detected
-    }
+    meter = TruePeakMeter(sr)
+    for start in range(0, y.shape[-1], TRUE_PEAK_CHUNK_SIZE):
+        meter.process(y[..., start:start + TRUE_PEAK_CHUNK_SIZE])
+    return meter.result()
 
 
 def calculate_frequency_balance(y, sr=22050):
@@ -139,6 +364,21 @@ def calculate_frequency_balance(y, sr=22050):
     # Average magnitude across time
     magnitude_mean = np.mean(magnitude, axis=1)
     
+    return frequency_balance_from_spectrum(magnitude_mean, frequencies)
+
+
+def frequency_balance_from_spectrum(magnitude_mean, frequencies):
+    """
+    Frequency balance analysis from a time-averaged magnitude spectrum.
+    Shared by the in-memory and the block-streaming analysis.
+    
+    Args:
+        magnitude_mean: Mean STFT magnitude per frequency bin
+        frequencies: Frequency of each bin in Hz
+    
+    Returns:
+        Dictionary with band analysis and warnings
+    """
     # Define frequency bands
     low_mask = frequencies < 200
     mid_mask = (frequencies >= 200) & (frequencies < 5000)
@@ -287,7 +527,14 @@ def generate_mastering_recommendations(mastering_data, genre=None):
     
     # LUFS recommendations (genre-aware)
     lufs = mastering_data.get('lufs', -20)
-    if lufs < -16:
+    if lufs is None:
+        # Nothing passed the loudness gates (silent, very quiet or shorter than one 400 ms block)
+        recommendations.append({
+            'type': 'warning',
+            'message': 'Ses seviyesi ölçülemedi (sessiz, çok kısa veya -70 LUFS altında).',
+            'action': 'Kaynağı ve gain ayarını kontrol et'
+        })
+    elif lufs < -16:
         if genre_normalized in ['EDM', 'TECHNO', 'TRAP', 'DARK PHONK', 'DRIFT PHONK']:
             recommendations.append({
                 'type': 'warning',
@@ -335,7 +582,10 @@ def generate_mastering_recommendations(mastering_data, genre=None):
     # Peak recommendations
     peak_data = mastering_data.get('peak', {})
     peak_dbfs = peak_data.get('peak_dbfs', -1.0)
-    if peak_data.get('clipping_detected', False):
+    if peak_dbfs is None:
+        # All-zero input; already reported by the loudness check above
+        pass
+    elif peak_data.get('clipping_detected', False):
         recommendations.append({
             'type': 'error',
             'message': f'CLIPPING TESPİT EDİLDİ! Peak: {peak_dbfs:.2f} dBFS. Distortion riski var!',
@@ -432,34 +682,56 @@ def generate_mastering_recommendations(mastering_data, genre=None):
     return recommendations
 
 
-def analyze_mastering(file_path, genre=None):
+def analyze_mastering(file_path, genre=None, y=None, sr=None, timer=None):
     """
     Complete mastering analysis for an audio file.
     
     Args:
         file_path: Path to audio file
         genre: Optional genre for genre-specific recommendations
+        y: Optional already-decoded full-length audio, mono (n,) or multichannel
+            (channels, n) (skips decoding file_path)
+        sr: Sample rate of y
+        timer: Optional StageTimer (records mastering.* sub-steps)
     
     Returns:
         Dictionary with all mastering analysis results
     """
     try:
-        # Load audio (full file for accurate mastering analysis)
-        y, sr = librosa.load(file_path, sr=48000)  # Use 48kHz for accurate LUFS
+        if y is None:
+            # Load audio (full file for accurate mastering analysis)
+            with measure(timer, 'mastering.decode'):
+                y, sr = librosa.load(file_path, sr=None, mono=False)
+        
+        # Native 44.1/48 kHz is used as-is, anything else goes to 48kHz
+        if sr not in MASTERING_NATIVE_RATES:
+            with measure(timer, 'mastering.resample'):
+                y = resample(y, sr, MASTERING_SR)
+            sr = MASTERING_SR
+        
+        # Loudness and true peak are measured over all channels (BS.1770),
+        # everything else on the mono mix
+        with measure(timer, 'mastering.lufs'):
+            lufs = calculate_lufs(y, sr)
+        with measure(timer, 'mastering.true_peak'):
+            peak_data = calculate_true_peak(y, sr)
+        if y.ndim > 1:
+            y = librosa.to_mono(y)
         
         # Perform all analyses
-        lufs = calculate_lufs(y, sr)
-        peak_data = calculate_true_peak(y, sr)
-        freq_balance = calculate_frequency_balance(y, sr)
-        transient_data = detect_transients(y, sr)
+        with measure(timer, 'mastering.frequency_balance'):
+            freq_balance = calculate_frequency_balance(y, sr)
+        with measure(timer, 'mastering.transients'):
+            transient_data = detect_transients(y, sr)
         
         # Generate recommendations with genre awareness
-        recommendations = generate_mastering_recommendations({
-            'lufs': lufs,
-            'peak': peak_data,
-            'frequency_balance': freq_balance,
-            'transients': transient_data
-        }, genre=genre)
+        with measure(timer, 'mastering.recommendations'):
+            recommendations = generate_mastering_recommendations({
+                'lufs': lufs,
+                'peak': peak_data,
+                'frequency_balance': freq_balance,
+                'transients': transient_data
+            }, genre=genre)
         
         # Compile results
         mastering_data = {
@@ -477,8 +749,175 @@ def analyze_mastering(file_path, genre=None):
     except Exception as e:
         return {
             'error': str(e),
-            'lufs': -20.0,
-            'peak': {'peak_dbfs': -1.0, 'clipping_detected': False},
+            'lufs': None,
+            'peak': {'peak_dbfs': None, 'clipping_detected': False},
+            'frequency_balance': {'warnings': []},
+            'transients': {'crest_factor_db': 0.0, 'over_compressed': False},
+            'recommendations': []
+        }
+
+
+def _count_onsets(onset_envelope, sr, hop_length):
+    """
+    Count onsets in a (partial) onset strength envelope.
+    
+    Args:
+        onset_envelope: Onset strength envelope segment
+        sr: Sample rate
+        hop_length: Hop length of the envelope frames
+    
+    Returns:
+        Number of detected onsets
+    """
+    if len(onset_envelope) < 2:
+        return 0
+    onsets = librosa.onset.onset_detect(onset_envelope=onset_envelope, sr=sr, hop_length=hop_length)
+    return len(onsets)
+
+
+def analyze_mastering_streaming(file_path, genre=None, block_frames=STREAM_BLOCK_FRAMES, timer=None):
+    """
+    Block-streaming mastering analysis with bounded memory.
+    Reads the file in fixed-size chunks via soundfile (audio_io.read_blocks, which
+    is sample-exact for MP3 as well) and accumulates LUFS, peak, band energies,
+    crest factor and transient counts incrementally, so peak memory depends on
+    the block size only, not on file length (DJ mixes, long sets).
+    
+    Frames are taken without centering and the onset envelope is peak-picked per
+    segment, so values can differ slightly from analyze_mastering on the same file.
+    Falls back to analyze_mastering if soundfile cannot read the format.
+    
+    Args:
+        file_path: Path to audio file
+        genre: Optional genre for genre-specific recommendations
+        block_frames: Number of STFT frames processed per block
+        timer: Optional StageTimer (records mastering.* sub-steps, summed over blocks)
+    
+    Returns:
+        Dictionary with all mastering analysis results (same layout as analyze_mastering)
+    """
+    try:
+        info = sf.info(file_path)
+    except Exception:
+        # Format not supported by soundfile (e.g. MP3 on older libsndfile)
+        return analyze_mastering(file_path, genre=genre, timer=timer)
+    
+    try:
+        sr = info.samplerate
+        n_fft = STREAM_N_FFT
+        hop_length = STREAM_HOP_LENGTH
+        # Consecutive blocks overlap by n_fft - hop so every frame is seen exactly once
+        overlap = n_fft - hop_length
+        blocksize = n_fft + hop_length * (block_frames - 1)
+        
+        frequencies = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+        window = signal.get_window('hann', n_fft)
+        mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft)
+        
+        # Running accumulators
+        num_frames = 0
+        loudness_meter = LoudnessMeter(sr)
+        magnitude_sum = np.zeros(len(frequencies))
+        rms_sum = 0.0
+        sample_peak = 0.0
+        true_peak_meter = TruePeakMeter(sr)
+        max_energy_diff = 0.0
+        previous_rms = None
+        previous_mel_db = None
+        onset_segment = []
+        num_transients = 0
+        first_block = True
+        
+        for block in read_blocks(file_path, blocksize, overlap=overlap):
+            mono = block.mean(axis=1)
+            # Samples not already covered by the previous block's overlap
+            new_block = block if first_block else block[overlap:]
+            new_samples = mono if first_block else mono[overlap:]
+            first_block = False
+            if len(new_samples) == 0:
+                continue
+            
+            # LUFS: K-weighted, gated loudness over all channels
+            with measure(timer, 'mastering.lufs'):
+                loudness_meter.process(new_block.T)
+            
+            # Sample peak of the mono mix (crest factor) and (4x oversampled) true peak of every channel
+            with measure(timer, 'mastering.true_peak'):
+                sample_peak = max(sample_peak, float(np.max(np.abs(new_samples))))
+                true_peak_meter.process(new_block.T)
+            
+            if len(mono) < n_fft:
+                continue
+            
+            with measure(timer, 'mastering.frequency_balance'):
+                frames = librosa.util.frame(mono, frame_length=n_fft, hop_length=hop_length)
+                magnitude = np.abs(np.fft.rfft(frames * window[:, np.newaxis], axis=0))
+                num_frames += frames.shape[1]
+                
+                # Frequency balance: running sum of the magnitude spectrum
+                magnitude_sum += np.sum(magnitude, axis=1)
+            
+            with measure(timer, 'mastering.transients'):
+                # Crest factor / energy changes from frame RMS
+                rms = np.sqrt(np.mean(frames ** 2, axis=0))
+                rms_sum += float(np.sum(rms))
+                if previous_rms is not None:
+                    rms = np.concatenate(([previous_rms], rms))
+                if len(rms) > 1:
+                    max_energy_diff = max(max_energy_diff, float(np.max(np.abs(np.diff(rms)))))
+                previous_rms = rms[-1]
+                
+                # Transients: spectral flux on the mel spectrogram, peak-picked per segment
+                mel_db = librosa.power_to_db(mel_basis.dot(magnitude ** 2))
+                if previous_mel_db is not None:
+                    mel_db = np.concatenate((previous_mel_db, mel_db), axis=1)
+                onset_segment.append(np.mean(np.maximum(0.0, np.diff(mel_db, axis=1)), axis=0))
+                previous_mel_db = mel_db[:, -1:]
+                if sum(len(env) for env in onset_segment) >= STREAM_ONSET_SEGMENT_FRAMES:
+                    num_transients += _count_onsets(np.concatenate(onset_segment), sr, hop_length)
+                    onset_segment = []
+        
+        if onset_segment:
+            num_transients += _count_onsets(np.concatenate(onset_segment), sr, hop_length)
+        
+        if num_frames == 0:
+            raise ValueError('Audio file is too short for mastering analysis')
+        
+        # LUFS
+        lufs = loudness_meter.integrated()
+        
+        # True peak
+        peak_data = true_peak_meter.result()
+        
+        # Frequency balance
+        freq_balance = frequency_balance_from_spectrum(magnitude_sum / num_frames, frequencies)
+        
+        # Transients and crest factor
+        frame_rms_mean = rms_sum / num_frames
+        crest_factor_db = 20 * np.log10(sample_peak / frame_rms_mean) if frame_rms_mean > 0 else 0.0
+        transient_data = {
+            'crest_factor_db': float(crest_factor_db),
+            'num_transients': int(num_transients),
+            'max_energy_diff': float(max_energy_diff),
+            'over_compressed': bool(crest_factor_db < 10.0)
+        }
+        
+        mastering_data = {
+            'lufs': lufs,
+            'peak': peak_data,
+            'frequency_balance': freq_balance,
+            'transients': transient_data
+        }
+        with measure(timer, 'mastering.recommendations'):
+            mastering_data['recommendations'] = generate_mastering_recommendations(mastering_data, genre=genre)
+        
+        return mastering_data
+        
+    except Exception as e:
+        return {
+            'error': str(e),
+            'lufs': None,
+            'peak': {'peak_dbfs': None, 'clipping_detected': False},
             'frequency_balance': {'warnings': []},
             'transients': {'crest_factor_db': 0.0, 'over_compressed': False},
             'recommendations': []
@@ -0,0 +1,174 @@
+"""
+Per-stage timing and profiling instrumentation:
+- Wall time, CPU time and peak traced memory (tracemalloc) per named stage
+- Optional cProfile collection across stage threads, dumped as one pstats file
+"""
+
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+MB = 1024 * 1024
+# Per-stage peaks need tracemalloc.reset_peak (Python 3.9+); without it the
+# traced peak only ever grows, so peak_mb is not reported
+PEAK_RESET = hasattr(tracemalloc, 'reset_peak')
+
+
+class StageTimer:
+    """
+    Collects timings for named stages of one analysis run.
+    Stages may nest ('mastering' > 'mastering.lufs') and run on several
+    threads at once. A stage measured more than once (per-block work)
+    accumulates its times.
+
+    CPU time is that of the thread running the stage, so work done on
+    BLAS/OpenMP worker threads is not included (the run total is process-wide).
+    Peak memory is the highest traced Python/NumPy allocation above the
+    stage's starting level; stages that overlap in time see each other's
+    allocations. Peak memory needs Python 3.9+ (tracemalloc.reset_peak);
+    on older versions `memory` is ignored.
+
+    Args:
+        memory: Trace allocations with tracemalloc to report peak_mb (slows the
+            run down several times, so wall/CPU times are only comparable between
+            runs with the same setting)
+        profile: Collect a cProfile of every stage wrapped with `wrap`
+    """
+
+    def __init__(self, memory=False, profile=False):
+        self.memory = memory and PEAK_RESET
+        self.profile = profile
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._active = []
+        self._profiles = []
+        self._owns_tracemalloc = self.memory and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+
+    def _fold_peak(self):
+        # Credit the traced peak since the last reset to every running stage
+        peak = tracemalloc.get_traced_memory()[1]
+        for state in self._active:
+            state['peak'] = max(state['peak'], peak)
+        return peak
+
+    @contextmanager
+    def measure(self, name):
+        """Time the enclosed block as stage `name`."""
+        state = None
+        if self.memory:
+            with self._lock:
+                self._fold_peak()
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                state = {'base': current, 'peak': current}
+                self._active.append(state)
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            with self._lock:
+                peak_mb = None
+                if state is not None:
+                    self._fold_peak()
+                    self._active.remove(state)
+                    peak_mb = (state['peak'] - state['base']) / MB
+                record = self.stages.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+                record['wall_s'] += wall
+                record['cpu_s'] += cpu
+                record['calls'] += 1
+                if peak_mb is not None:
+                    record['peak_mb'] = max(record.get('peak_mb', 0.0), peak_mb)
+
+    def wrap(self, name, func):
+        """
+        Wrap a stage function so each call is measured (and profiled when enabled).
+
+        Args:
+            name: Stage name
+            func: Stage callable
+
+        Returns:
+            Wrapped callable with the same signature
+        """
+        def run(*args, **kwargs):
+            with self.measure(name):
+                if not self.profile:
+                    return func(*args, **kwargs)
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+                    with self._lock:
+                        self._profiles.append(profiler)
+        return run
+
+    def report(self):
+        """
+        Returns:
+            JSON-serializable timings: run totals and per-stage wall/CPU time and peak memory
+        """
+        with self._lock:
+            stages = {
+                name: {key: round(value, 4) if isinstance(value, float) else value for key, value in record.items()}
+                for name, record in self.stages.items()
+            }
+        return {
+            'wall_s': round(time.perf_counter() - self._start_wall, 4),
+            'cpu_s': round(time.process_time() - self._start_cpu, 4),
+            'memory_traced': self.memory,
+            'stages': stages
+        }
+
+    def dump_profile(self, path):
+        """
+        Merge the collected stage profiles into one pstats file.
+
+        Args:
+            path: Destination .pstats path
+
+        Returns:
+            True if a profile was written
+        """
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return False
+        stats = pstats.Stats(profiles[0])
+        for profiler in profiles[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        return True
+
+    def close(self):
+        """Stop tracemalloc if this timer started it."""
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+
+def measure(timer, name):
+    """
+    Time a block as stage `name` when a timer is given.
+
+    Args:
+        timer: StageTimer or None (no-op)
+        name: Stage name
+
+    Returns:
+        Context manager
+    """
+    if timer is None:
+        return nullcontext()
+    return timer.measure(name)
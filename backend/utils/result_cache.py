@@ -0,0 +1,395 @@
+"""
+Content-addressed on-disk cache for analysis results:
+- Keys from a hash of the file contents, the analysis parameters and the analysis code version
+- Atomic writes (safe when several workers write at once)
+- LRU eviction under a size cap
+
+Inspect or purge from the command line:
+    python backend/utils/result_cache.py stats
+    python backend/utils/result_cache.py list [--namespace results]
+    python backend/utils/result_cache.py purge [--namespace results] [--older-than DAYS]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from functools import lru_cache
+
+
+# Environment overrides
+CACHE_DIR_ENV = 'AKIBEAT_CACHE_DIR'
+CACHE_MAX_MB_ENV = 'AKIBEAT_CACHE_MAX_MB'
+
+DEFAULT_MAX_MB = 2048
+DEFAULT_NAMESPACE = 'results'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Source files whose contents define the analysis code version
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (path, size, mtime) -> content hash, so a long-lived worker hashes each file once
+_file_hash_memo = {}
+
+# namespace -> estimated size in bytes, so put() only scans the namespace when the cap
+# may have been reached (synced by every evict(); other processes' writes are picked up then)
+_namespace_bytes = {}
+
+
+def default_cache_dir():
+    """
+    Platform cache directory for the application (local only).
+
+    Returns:
+        Absolute path of the cache root
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return os.path.abspath(override)
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+        return os.path.join(base, 'Akibeat', 'Cache')
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser('~'), 'Library', 'Caches', 'Akibeat')
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'akibeat')
+
+
+def max_cache_bytes():
+    """
+    Returns:
+        Size cap per namespace in bytes (AKIBEAT_CACHE_MAX_MB, default 2048 MB)
+    """
+    try:
+        return int(float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+def namespace_dir(namespace=DEFAULT_NAMESPACE):
+    """
+    Args:
+        namespace: Cache namespace (results, lyrics, stems, ...)
+
+    Returns:
+        Directory holding the entries of a namespace
+    """
+    return os.path.join(default_cache_dir(), namespace)
+
+
+def file_hash(file_path):
+    """
+    SHA-256 of a file's contents, memoized per (path, size, mtime) for this process.
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        Hex digest
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_hash_memo.get(memo_key)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        _file_hash_memo[memo_key] = digest
+    return digest
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """
+    Hash of the backend analysis sources, so cached results are invalidated
+    whenever the analysis code changes.
+
+    Returns:
+        Hex digest
+    """
+    hasher = hashlib.sha256()
+    sources = [os.path.join(_BACKEND_DIR, 'analysis.py')]
+    utils_dir = os.path.join(_BACKEND_DIR, 'utils')
+    sources += sorted(os.path.join(utils_dir, name) for name in os.listdir(utils_dir) if name.endswith('.py'))
+    for path in sources:
+        try:
+            with open(path, 'rb') as f:
+                hasher.update(os.path.basename(path).encode('utf-8'))
+                hasher.update(f.read())
+        except OSError:
+            continue
+    return hasher.hexdigest()
+
+
+def make_key(file_path, params=None, include_code_version=True):
+    """
+    Cache key for a file analyzed with the given parameters by the current code.
+
+    Args:
+        file_path: Path to audio file
+        params: JSON-serializable analysis parameters
+        include_code_version: Invalidate the entry when the analysis code changes
+            (disable for expensive results that do not depend on it, e.g. transcripts)
+
+    Returns:
+        Hex digest usable as a cache key
+    """
+    payload = json.dumps({
+        'file': file_hash(file_path),
+        'params': params or {},
+        'code': code_version() if include_code_version else None
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def entry_path(key, namespace=DEFAULT_NAMESPACE, suffix='.json'):
+    """
+    Location of a cache entry (two-level fan-out by key prefix).
+
+    Args:
+        key: Cache key
+        namespace: Cache namespace
+        suffix: File suffix (or '' for directory entries)
+
+    Returns:
+        Path of the entry
+    """
+    return os.path.join(namespace_dir(namespace), key[:2], key + suffix)
+
+
+def touch(path):
+    """Mark an entry as recently used (LRU order is by modification time)."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def get(key, namespace=DEFAULT_NAMESPACE):
+    """
+    Read a cached JSON value.
+
+    Args:
+        key: Cache key
+        namespace: Cache namespace
+
+    Returns:
+        Cached value, or None on a miss or an unreadable entry
+    """
+    path = entry_path(key, namespace)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        return None
+    touch(path)
+    return value
+
+
+def atomic_write_bytes(path, data):
+    """
+    Write a file atomically: write to a temp file in the same directory, then rename.
+    Concurrent writers of the same key simply replace each other's complete file.
+
+    Args:
+        path: Destination path
+        data: Bytes to write
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def put(key, value, namespace=DEFAULT_NAMESPACE, default=None):
+    """
+    Store a JSON-serializable value and enforce the namespace size cap.
+    Only strict JSON is written: NaN/inf values raise ValueError.
+    The namespace is only scanned for eviction on the first write and when the running
+    size estimate goes over the cap, not on every write.
+
+    Args:
+        key: Cache key
+        value: Value to store
+        namespace: Cache namespace
+        default: Optional json `default` hook for values the encoder cannot handle
+    """
+    data = json.dumps(value, separators=(',', ':'), allow_nan=False, default=default).encode('utf-8')
+    atomic_write_bytes(entry_path(key, namespace), data)
+    if namespace not in _namespace_bytes:
+        evict(namespace)
+        return
+    # Overwritten entries are counted twice, which only makes the next scan come sooner
+    _namespace_bytes[namespace] += len(data)
+    if _namespace_bytes[namespace] > max_cache_bytes():
+        evict(namespace)
+
+
+def _entries(namespace):
+    """
+    List the entries of a namespace.
+
+    Returns:
+        List of (path, size in bytes, last used timestamp); directory entries count their total size
+    """
+    root = namespace_dir(namespace)
+    entries = []
+    if not os.path.isdir(root):
+        return entries
+    for shard in os.listdir(root):
+        shard_dir = os.path.join(root, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in os.listdir(shard_dir):
+            if name.startswith('.tmp-'):
+                continue
+            path = os.path.join(shard_dir, name)
+            try:
+                stat = os.stat(path)
+                size = stat.st_size
+                if os.path.isdir(path):
+                    size = sum(
+                        os.path.getsize(os.path.join(dirpath, filename))
+                        for dirpath, _, filenames in os.walk(path) for filename in filenames
+                    )
+                entries.append((path, size, stat.st_mtime))
+            except OSError:
+                # Removed by another worker in the meantime
+                continue
+    return entries
+
+
+def remove_entry(path):
+    """Delete a file or directory entry, ignoring entries already removed by another process."""
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def evict(namespace=DEFAULT_NAMESPACE, max_bytes=None):
+    """
+    Remove least recently used entries until the namespace fits under the size cap.
+
+    Args:
+        namespace: Cache namespace
+        max_bytes: Size cap (defaults to max_cache_bytes())
+
+    Returns:
+        Number of entries removed
+    """
+    if max_bytes is None:
+        max_bytes = max_cache_bytes()
+    entries = _entries(namespace)
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+        if total <= max_bytes:
+            break
+        remove_entry(path)
+        total -= size
+        removed += 1
+    _namespace_bytes[namespace] = total
+    return removed
+
+
+def list_namespaces():
+    """
+    Returns:
+        Names of the namespaces present in the cache root
+    """
+    root = default_cache_dir()
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def stats(namespace=None):
+    """
+    Args:
+        namespace: Limit to one namespace (default: all)
+
+    Returns:
+        Dictionary with cache root, size cap and per-namespace entry counts and sizes
+    """
+    namespaces = [namespace] if namespace else list_namespaces()
+    result = {'cache_dir': default_cache_dir(), 'max_bytes_per_namespace': max_cache_bytes(), 'namespaces': {}}
+    for name in namespaces:
+        entries = _entries(name)
+        result['namespaces'][name] = {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries)
+        }
+    return result
+
+
+def purge(namespace=None, older_than_days=None):
+    """
+    Delete cache entries.
+
+    Args:
+        namespace: Limit to one namespace (default: all)
+        older_than_days: Only delete entries not used for this many days
+
+    Returns:
+        Number of entries removed
+    """
+    namespaces = [namespace] if namespace else list_namespaces()
+    cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+    removed = 0
+    for name in namespaces:
+        for path, _, last_used in _entries(name):
+            if cutoff is None or last_used < cutoff:
+                remove_entry(path)
+                removed += 1
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or purge the Akibeat analysis cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stats_parser = subparsers.add_parser('stats', help='Show entry counts and sizes')
+    stats_parser.add_argument('--namespace')
+
+    list_parser = subparsers.add_parser('list', help='List entries, most recently used first')
+    list_parser.add_argument('--namespace', default=DEFAULT_NAMESPACE)
+
+    purge_parser = subparsers.add_parser('purge', help='Delete entries')
+    purge_parser.add_argument('--namespace')
+    purge_parser.add_argument('--older-than', type=float, metavar='DAYS')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        print(json.dumps(stats(args.namespace), indent=2))
+    elif args.command == 'list':
+        for path, size, last_used in sorted(_entries(args.namespace), key=lambda entry: entry[2], reverse=True):
+            used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))
+            print(f"{used}  {size:>12}  {os.path.basename(path)}")
+    elif args.command == 'purge':
+        removed = purge(args.namespace, args.older_than)
+        print(f"Removed {removed} entries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
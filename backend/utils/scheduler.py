@@ -0,0 +1,85 @@
+"""
+Dependency-graph stage scheduler:
+- Stages declare the stages they depend on
+- Independent stages run concurrently on a thread pool
+- A stage starts as soon as all of its dependencies have finished
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def stage_order(stages):
+    """
+    Topological order of a stage graph (validates the graph).
+
+    Args:
+        stages: Dictionary of stage name -> (callable, dependency names)
+
+    Returns:
+        List of stage names, every stage after its dependencies
+    """
+    order = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = 'visiting'
+        for dep in stages[name][1]:
+            if dep not in stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+            visit(dep, path + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for name in stages:
+        visit(name, [])
+    return order
+
+
+def run_stages(stages, max_workers=None, on_complete=None):
+    """
+    Run a stage graph, each stage as soon as its dependencies are done.
+    Each callable receives its dependencies' results as keyword arguments
+    named after the dependency stages.
+
+    If a stage raises, no further stages are started and the exception is
+    re-raised without waiting for stages that are still running.
+
+    Args:
+        stages: Dictionary of stage name -> (callable, dependency names)
+        max_workers: Thread pool size (default: one thread per stage)
+        on_complete: Optional callback(name, result), called on the calling thread as each
+            stage finishes and before any stage that depends on it is started
+
+    Returns:
+        Dictionary of stage name -> result
+    """
+    order = stage_order(stages)
+    results = {}
+    running = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(stages)), thread_name_prefix='stage')
+    try:
+        while len(results) < len(stages):
+            started = set(running.values())
+            for name in order:
+                func, deps = stages[name]
+                if name in results or name in started or not all(dep in results for dep in deps):
+                    continue
+                future = executor.submit(func, **{dep: results[dep] for dep in deps})
+                running[future] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if on_complete is not None:
+                    on_complete(name, results[name])
+    finally:
+        # Drop queued stages (shutdown(cancel_futures=True) needs Python 3.9+)
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=not running)
+    return results
@@ -0,0 +1,419 @@
+"""
+Time-resolved section analysis over the whole track:
+- One streaming pass at the analysis rate collects compact per-frame features
+  (chroma, weighted onset flux, RMS/peak, spectral centroid, band energies)
+- A novelty curve over those features is segmented into sections
+  (intro, build, drop, break, outro)
+- The excerpt features (BPM, key, energy, loudness, spectral centroid, genre)
+  are computed per section and for the whole track from the stored frames
+"""
+
+import librosa
+import numpy as np
+
+from utils.audio_features import (
+    energy_from_rms,
+    key_from_chroma,
+    loudness_from_rms,
+    perceptual_weighting_filter,
+    tempo_from_envelope,
+    tempogram_strength
+)
+from utils.audio_io import ANALYSIS_SR
+from utils.cnn_classifier import (
+    classify_genre_from_features,
+    genre_band_masks,
+    mastering_genre_features,
+    pink_noise_db_diffs
+)
+from utils.profiling import measure
+
+# Audio per streamed block
+SECTION_BLOCK_SECONDS = 30.0
+# Novelty curve resolution and the context compared on either side of each point
+NOVELTY_HOP_SECONDS = 0.5
+NOVELTY_CONTEXT_SECONDS = 8.0
+# Feature differences worth one novelty unit: chroma (0-1 per pitch class),
+# band levels in dB (summed over three bands), RMS level in dB, spectral centroid
+# in octaves and the weighted onset flux (mean dB rise per frame)
+NOVELTY_SCALES = {'chroma': 1.0, 'bands_db': 9.0, 'rms_db': 3.0, 'centroid_octaves': 1.0, 'onset': 1.0}
+# Minimum novelty of a section boundary (steady tracks stay below ~1)
+NOVELTY_THRESHOLD = 2.0
+# Shortest section and most sections per track
+MIN_SECTION_SECONDS = 8.0
+MAX_SECTIONS = 16
+# Sections within this many dB of the loudest one count as drops
+DROP_MARGIN_DB = 3.0
+# Log-magnitude floor of the onset flux (absolute, so blocks are comparable)
+ONSET_FLOOR_DB = -40.0
+
+
+class SectionFrameStream:
+    """
+    Per-frame features of one signal fed in consecutive blocks.
+    Frames continue seamlessly across blocks (the STFT carries the last
+    n_fft - hop samples over) and the first frame is centered as in librosa,
+    so the frame grid matches a FeatureContext over the whole signal.
+
+    Args:
+        sr: Sample rate of the blocks
+        n_fft: FFT size
+        hop_length: Hop length
+    """
+
+    def __init__(self, sr=ANALYSIS_SR, n_fft=2048, hop_length=512):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.frequencies = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+        self.onset_weights = perceptual_weighting_filter(self.frequencies, sr)
+        self.band_masks = genre_band_masks(self.frequencies)
+        self.tuning = None
+        self._carry = np.zeros(n_fft // 2, dtype=np.float32)
+        self._previous_db = None
+        self._parts = {name: [] for name in ('chroma', 'onset', 'rms', 'peak', 'centroid', 'bands')}
+
+    def add(self, block):
+        """Process the next block of samples."""
+        buffer = np.concatenate([self._carry, np.asarray(block, dtype=np.float32)])
+        if len(buffer) < self.n_fft:
+            self._carry = buffer
+            return
+        n_frames = 1 + (len(buffer) - self.n_fft) // self.hop_length
+        used = buffer[:self.n_fft + (n_frames - 1) * self.hop_length]
+        self._carry = buffer[n_frames * self.hop_length:]
+        self._process(used)
+
+    def finish(self):
+        """
+        Flush the remaining samples (end padding as with a centered STFT).
+
+        Returns:
+            Dictionary of per-frame arrays: chroma (12, F), onset, rms, peak, centroid (F,)
+            and bands (3, F) mean magnitude below 200 Hz / 200 Hz-5 kHz / above 5 kHz
+        """
+        n_samples = len(self._carry)
+        tail = np.concatenate([self._carry, np.zeros(self.n_fft // 2, dtype=np.float32)])
+        if len(tail) >= self.n_fft:
+            n_frames = 1 + (len(tail) - self.n_fft) // self.hop_length
+            self._process(tail[:self.n_fft + (n_frames - 1) * self.hop_length])
+            # A window cut off by the end padding reads as a broadband onset; drop it
+            padded = n_frames - max(0, 1 + (n_samples - self.n_fft) // self.hop_length)
+            if padded > 0:
+                self._parts['onset'][-1][-padded:] = 0.0
+        self._carry = np.zeros(0, dtype=np.float32)
+
+        frames = {}
+        empty_shapes = {'chroma': (12, 0), 'bands': (3, 0)}
+        for name, parts in self._parts.items():
+            if parts:
+                frames[name] = np.concatenate(parts, axis=-1)
+            else:
+                frames[name] = np.zeros(empty_shapes.get(name, 0), dtype=np.float32)
+        return frames
+
+    def _process(self, samples):
+        framed = librosa.util.frame(samples, frame_length=self.n_fft, hop_length=self.hop_length)
+        magnitude = np.abs(librosa.stft(samples, n_fft=self.n_fft, hop_length=self.hop_length, center=False))
+        power = magnitude ** 2
+        if self.tuning is None:
+            # Estimated once (first block) so chroma bins are consistent along the track
+            self.tuning = librosa.estimate_tuning(S=power, sr=self.sr, n_fft=self.n_fft)
+
+        # Spectral flux of the log magnitude, bins weighted as in the excerpt tempo engine
+        log_magnitude = librosa.amplitude_to_db(magnitude, amin=10 ** (ONSET_FLOOR_DB / 20), top_db=None)
+        previous = log_magnitude[:, :1] if self._previous_db is None else self._previous_db
+        flux = np.maximum(0.0, np.diff(np.concatenate([previous, log_magnitude], axis=1), axis=1))
+        self._previous_db = log_magnitude[:, -1:]
+
+        low_mask, mid_mask, high_mask = self.band_masks
+        parts = self._parts
+        parts['chroma'].append(
+            librosa.feature.chroma_stft(S=power, sr=self.sr, n_fft=self.n_fft, tuning=self.tuning).astype(np.float32)
+        )
+        parts['onset'].append((self.onset_weights @ flux / np.sum(self.onset_weights)).astype(np.float32))
+        parts['rms'].append(np.sqrt(np.mean(framed ** 2, axis=0)).astype(np.float32))
+        parts['peak'].append(np.max(np.abs(framed), axis=0).astype(np.float32))
+        parts['centroid'].append(
+            librosa.feature.spectral_centroid(S=magnitude, sr=self.sr, n_fft=self.n_fft)[0].astype(np.float32)
+        )
+        parts['bands'].append(np.stack([
+            np.mean(magnitude[low_mask], axis=0),
+            np.mean(magnitude[mid_mask], axis=0),
+            np.mean(magnitude[high_mask], axis=0)
+        ]).astype(np.float32))
+
+
+def novelty_curve(frames, frames_per_bin, context_bins):
+    """
+    Novelty of the pooled frame features: distance between the mean feature
+    vectors of the context before and after each point (a box-kernel version
+    of Foote's checkerboard novelty, linear in track length). Features are on
+    fixed perceptual scales (see NOVELTY_SCALES), so the curve reads the same
+    on every track and a steady track stays near zero.
+
+    Args:
+        frames: SectionFrameStream.finish() output
+        frames_per_bin: Frames pooled into one novelty point
+        context_bins: Points compared on each side
+
+    Returns:
+        Novelty per point (point i starts at frame i * frames_per_bin)
+    """
+    n_frames = len(frames['rms'])
+    starts = np.arange(0, n_frames, frames_per_bin)
+    counts = np.diff(np.append(starts, n_frames))[:, np.newaxis]
+
+    def pool(x):
+        return np.add.reduceat(np.atleast_2d(x), starts, axis=1).T / counts
+
+    bands = pool(frames['bands'])
+    features = np.hstack([
+        pool(frames['chroma']) / NOVELTY_SCALES['chroma'],
+        librosa.amplitude_to_db(bands, ref=np.max(bands), top_db=60.0) / NOVELTY_SCALES['bands_db'],
+        librosa.amplitude_to_db(pool(frames['rms']), ref=1.0, top_db=None) / NOVELTY_SCALES['rms_db'],
+        np.log2(pool(frames['centroid']) + 1.0) / NOVELTY_SCALES['centroid_octaves'],
+        pool(frames['onset']) / NOVELTY_SCALES['onset']
+    ])
+
+    n = len(features)
+    cumulative = np.vstack([np.zeros((1, features.shape[1])), np.cumsum(features, axis=0)])
+    points = np.arange(n + 1)
+    lo = np.maximum(0, points - context_bins)
+    hi = np.minimum(n, points + context_bins)
+    before = (cumulative[points] - cumulative[lo]) / np.maximum(1, points - lo)[:, np.newaxis]
+    after = (cumulative[hi] - cumulative[points]) / np.maximum(1, hi - points)[:, np.newaxis]
+    novelty = np.sum(np.abs(after - before), axis=1)
+    novelty[(points == 0) | (points == n)] = 0.0
+    return novelty[:n]
+
+
+def section_boundaries(novelty, min_bins, max_sections=MAX_SECTIONS, threshold=NOVELTY_THRESHOLD):
+    """
+    Pick section boundaries at novelty peaks.
+
+    Args:
+        novelty: Novelty curve
+        min_bins: Minimum section length in novelty points
+        max_sections: Upper bound on the number of sections
+        threshold: Minimum novelty of a boundary
+
+    Returns:
+        Sorted boundary indices into the novelty curve, including 0 and len(novelty)
+    """
+    n = len(novelty)
+    if n < 2 * min_bins:
+        return [0, n]
+    half = max(1, min_bins // 2)
+    peaks = librosa.util.peak_pick(novelty, pre_max=half, post_max=half, pre_avg=half, post_avg=half,
+                                   delta=0.0, wait=half)
+    # Strongest peaks first; keep those far enough from the ends and from each other
+    chosen = []
+    for peak in sorted(peaks, key=lambda i: novelty[i], reverse=True):
+        if len(chosen) >= max_sections - 1 or novelty[peak] < threshold:
+            break
+        if peak < min_bins or n - peak < min_bins:
+            continue
+        if all(abs(peak - other) >= min_bins for other in chosen):
+            chosen.append(int(peak))
+    return [0] + sorted(chosen) + [n]
+
+
+def label_sections(levels_db):
+    """
+    Label sections by their level and position.
+    Drops are the loudest sections; the section right before a drop is its build
+    (unless it opens the track); quiet sections before the first drop are the
+    intro, those after the last drop the outro, and quiet sections between drops
+    are breaks.
+
+    Args:
+        levels_db: RMS level of each section in dB
+
+    Returns:
+        List of labels
+    """
+    if len(levels_db) == 1:
+        return ['full']
+    loudest = max(levels_db)
+    drops = [level >= loudest - DROP_MARGIN_DB for level in levels_db]
+    first_drop = drops.index(True)
+    last_drop = len(drops) - 1 - drops[::-1].index(True)
+    labels = []
+    for i, is_drop in enumerate(drops):
+        if is_drop:
+            labels.append('drop')
+        elif i == 0:
+            labels.append('intro')
+        elif i < len(drops) - 1 and drops[i + 1]:
+            labels.append('build')
+        elif i < first_drop:
+            labels.append('intro')
+        elif i > last_drop:
+            labels.append('outro')
+        else:
+            labels.append('break')
+    return labels
+
+
+def merge_sections(bounds, labels):
+    """
+    Merge neighbouring sections with the same label, so a long steady passage
+    split at several small changes (an evolving beatless intro) is one section.
+
+    Args:
+        bounds: Section boundaries, including the start and end
+        labels: Label of each section
+
+    Returns:
+        Tuple of (merged boundaries, merged labels); a single section is labelled 'full'
+    """
+    merged_bounds, merged_labels = [bounds[0]], []
+    for end, label in zip(bounds[1:], labels):
+        if merged_labels and merged_labels[-1] == label:
+            merged_bounds[-1] = end
+        else:
+            merged_bounds.append(end)
+            merged_labels.append(label)
+    if len(merged_labels) == 1:
+        merged_labels = ['full']
+    return merged_bounds, merged_labels
+
+
+def frame_features(frames, start, end, sr, hop_length, key_timeline=False, beats=False, tempo_strength=None):
+    """
+    Excerpt features over a frame range, from the stored per-frame features.
+
+    Args:
+        frames: SectionFrameStream.finish() output
+        start: First frame
+        end: End frame (exclusive)
+        sr: Sample rate
+        hop_length: Hop length
+        key_timeline: Include the key timeline
+        beats: Include beat positions
+        tempo_strength: Optional tempogram_strength over the range (computed if not given)
+
+    Returns:
+        Dictionary with bpm, tempo, key, key_confidence, energy, loudness, spectral_centroid,
+        genre, genre_confidence, plus level_db, the band balance and crest factor used for the genre
+    """
+    rms = frames['rms'][start:end]
+    rms_mean = float(np.mean(rms)) if len(rms) else 0.0
+    tempo = tempo_from_envelope(frames['onset'][start:end], sr, hop_length, beats=beats, strength=tempo_strength)
+    key = key_from_chroma(frames['chroma'][:, start:end], sr, hop_length, timeline=key_timeline)
+    if beats:
+        offset = start * hop_length / float(sr)
+        tempo['beats'] = [round(t + offset, 3) for t in tempo['beats']]
+
+    low_db_diff, mid_db_diff, high_db_diff = pink_noise_db_diffs(*np.mean(frames['bands'][:, start:end], axis=1))
+    peak = float(np.max(frames['peak'][start:end])) if len(rms) else 0.0
+    crest_factor = 20 * np.log10(peak / (rms_mean + 1e-10)) if rms_mean > 0 else 10.0
+    spectral_centroid = float(np.mean(frames['centroid'][start:end])) if len(rms) else 0.0
+    genre = classify_genre_from_features(tempo['bpm'], spectral_centroid, low_db_diff, mid_db_diff, high_db_diff,
+                                         crest_factor)
+
+    features = {
+        'bpm': round(tempo['bpm'], 1),
+        'tempo': {name: value for name, value in tempo.items() if name != 'bpm'},
+        'key': key['key'],
+        'key_confidence': key['confidence'],
+        'energy': round(energy_from_rms(rms_mean), 1),
+        'loudness': round(loudness_from_rms(rms_mean), 1),
+        'spectral_centroid': round(spectral_centroid, 1),
+        'genre': genre['genre'] if genre else 'Unknown',
+        'genre_confidence': round(genre['confidence'], 2) if genre else 0,
+        'level_db': round(float(20 * np.log10(rms_mean + 1e-10)), 1),
+        'genre_features': {
+            'low_db_diff': low_db_diff,
+            'mid_db_diff': mid_db_diff,
+            'high_db_diff': high_db_diff,
+            'crest_factor': float(crest_factor)
+        }
+    }
+    if key_timeline:
+        features['key_timeline'] = key['timeline']
+    return features
+
+
+def analyze_sections(blocks, sr=ANALYSIS_SR, hop_length=512, timer=None):
+    """
+    Segment a whole track and describe each section, in one pass over its samples.
+
+    Args:
+        blocks: Iterable of consecutive mono blocks at sr (see audio_io.stream_analysis_blocks)
+        sr: Sample rate of the blocks
+        hop_length: Hop length of the feature frames
+        timer: Optional StageTimer (records sections.* sub-steps)
+
+    Returns:
+        Dictionary with 'track' (features of the whole track, with key timeline and beats)
+        and 'sections' (start, end, label and features of each section)
+    """
+    stream = SectionFrameStream(sr=sr, hop_length=hop_length)
+    with measure(timer, 'sections.frames'):
+        for block in blocks:
+            stream.add(block)
+        frames = stream.finish()
+
+    frame_seconds = hop_length / float(sr)
+    n_frames = len(frames['rms'])
+    if n_frames == 0:
+        return {'track': {}, 'sections': []}
+
+    with measure(timer, 'sections.segmentation'):
+        frames_per_bin = max(1, int(round(NOVELTY_HOP_SECONDS / frame_seconds)))
+        bin_seconds = frames_per_bin * frame_seconds
+        novelty = novelty_curve(frames, frames_per_bin, max(1, int(round(NOVELTY_CONTEXT_SECONDS / bin_seconds))))
+        boundaries = section_boundaries(novelty, max(1, int(round(MIN_SECTION_SECONDS / bin_seconds))))
+        frame_bounds = [min(n_frames, b * frames_per_bin) for b in boundaries]
+        # Labels come from the section levels alone, so sections can be merged before their features
+        levels_db = [float(20 * np.log10(np.mean(frames['rms'][start:end]) + 1e-10))
+                     for start, end in zip(frame_bounds[:-1], frame_bounds[1:])]
+        frame_bounds, labels = merge_sections(frame_bounds, label_sections(levels_db))
+
+    with measure(timer, 'sections.features'):
+        # One tempogram pass over the track gives every section's (and the track's) tempo strength
+        strengths = tempogram_strength(frames['onset'], sr, hop_length, bounds=frame_bounds)
+        lengths = np.diff(frame_bounds)[:, np.newaxis]
+        track = frame_features(frames, 0, n_frames, sr, hop_length, key_timeline=True, beats=True,
+                               tempo_strength=np.sum(strengths * lengths, axis=0) / max(1, n_frames))
+        sections = []
+        for (start, end), strength, label in zip(zip(frame_bounds[:-1], frame_bounds[1:]), strengths, labels):
+            features = frame_features(frames, start, end, sr, hop_length, tempo_strength=strength)
+            features['tempo'] = {'confidence': features['tempo']['confidence']}
+            del features['genre_features']
+            sections.append({
+                'start': round(start * frame_seconds, 2),
+                'end': round(end * frame_seconds, 2),
+                **features,
+                'label': label
+            })
+
+    return {'track': track, 'sections': sections}
+
+
+def track_genre(sections_result, mastering_data=None):
+    """
+    Whole-track genre: the track's tempo and spectral centroid with the mastering
+    band balance and crest factor when available (as for excerpts), otherwise
+    (no mastering data, or a failed mastering stage) the section pass's own
+    band estimates.
+
+    Args:
+        sections_result: analyze_sections() output
+        mastering_data: Optional mastering analysis of the whole file
+
+    Returns:
+        Dictionary with genre, confidence and probabilities (None if nothing matched)
+    """
+    track = sections_result['track']
+    if not track:
+        return None
+    if (mastering_data and 'error' not in mastering_data
+            and 'low_db_diff' in mastering_data.get('frequency_balance', {})):
+        band_features = mastering_genre_features(mastering_data)
+    else:
+        band_features = tuple(track['genre_features'][name]
+                              for name in ('low_db_diff', 'mid_db_diff', 'high_db_diff', 'crest_factor'))
+    return classify_genre_from_features(track['bpm'], track['spectral_centroid'], *band_features)
@@ -0,0 +1,132 @@
+"""
+Source separation utilities (Demucs):
+- Resident in-process Demucs model
+- Content-addressed stem cache in the managed cache area, with LRU eviction
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import librosa
+import soundfile as sf
+
+from utils import result_cache
+
+
+DEMUCS_MODEL_NAME = 'htdemucs'
+STEMS_NAMESPACE = 'stems'
+
+# Stems written for every separated track; accompaniment is the sum of all non-vocal sources
+STEM_NAMES = ('vocals', 'accompaniment')
+
+# Loaded Demucs models, kept resident for the life of the process
+_demucs_models = {}
+_demucs_lock = threading.Lock()
+
+
+def get_demucs_model(model_name=DEMUCS_MODEL_NAME):
+    """
+    Load a pretrained Demucs model once per process and reuse it on later calls.
+
+    Args:
+        model_name: Pretrained model name (default: htdemucs)
+
+    Returns:
+        Demucs model in eval mode (CPU)
+    """
+    with _demucs_lock:
+        model = _demucs_models.get(model_name)
+        if model is None:
+            from demucs.pretrained import get_model
+            sys.stderr.write(f"Demucs modeli yükleniyor ({model_name})...\n")
+            model = get_model(model_name)
+            model.cpu()
+            model.eval()
+            _demucs_models[model_name] = model
+    return model
+
+
+def _run_demucs(file_path, model):
+    """
+    Separate a file into the model's sources.
+
+    Args:
+        file_path: Path to audio file
+        model: Demucs model
+
+    Returns:
+        Dictionary of source name -> array (channels, samples) at model.samplerate
+    """
+    import torch
+    from demucs.apply import apply_model
+
+    y, _ = librosa.load(file_path, sr=model.samplerate, mono=False)
+    if y.ndim == 1:
+        y = np.stack([y] * model.audio_channels)
+    y = y[:model.audio_channels]
+
+    wav = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32))
+    # Same normalization as the demucs CLI
+    ref = wav.mean(0)
+    mean, std = ref.mean(), ref.std() + 1e-8
+    wav = (wav - mean) / std
+
+    with torch.no_grad():
+        sources = apply_model(model, wav[None], device='cpu', split=True, overlap=0.25, progress=False)[0]
+    sources = sources * std + mean
+
+    return {name: sources[i].numpy() for i, name in enumerate(model.sources)}
+
+
+def separate_stems(file_path, use_cache=True, model_name=DEMUCS_MODEL_NAME):
+    """
+    Separate vocals and accompaniment in-process, caching the stems by audio content.
+    Stems live in the 'stems' cache namespace (never next to the user's files) and
+    are shared by every stage that needs vocals or accompaniment.
+
+    Args:
+        file_path: Path to audio file
+        use_cache: Reuse and store cached stems
+        model_name: Pretrained Demucs model name
+
+    Returns:
+        Dictionary of stem name ('vocals', 'accompaniment') -> WAV file path
+    """
+    key = result_cache.make_key(file_path, {'model': model_name}, include_code_version=False)
+    stem_dir = result_cache.entry_path(key, STEMS_NAMESPACE, suffix='')
+    stem_paths = {name: os.path.join(stem_dir, f"{name}.wav") for name in STEM_NAMES}
+
+    if use_cache and all(os.path.exists(path) for path in stem_paths.values()):
+        result_cache.touch(stem_dir)
+        sys.stderr.write("Ayrıştırılmış kanallar önbellekten yüklendi\n")
+        return stem_paths
+
+    model = get_demucs_model(model_name)
+    sources = _run_demucs(file_path, model)
+    stems = {
+        'vocals': sources['vocals'],
+        'accompaniment': sum(audio for name, audio in sources.items() if name != 'vocals')
+    }
+
+    # Write into a temp directory and rename it into place, so concurrent
+    # workers never see a half-written stem set
+    os.makedirs(os.path.dirname(stem_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(stem_dir), prefix='.tmp-')
+    try:
+        for name, audio in stems.items():
+            sf.write(os.path.join(tmp_dir, f"{name}.wav"), audio.T, model.samplerate, subtype='PCM_16')
+        if os.path.isdir(stem_dir):
+            shutil.rmtree(stem_dir, ignore_errors=True)
+        os.replace(tmp_dir, stem_dir)
+    except OSError:
+        # Another worker finished the same track first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not all(os.path.exists(path) for path in stem_paths.values()):
+            raise
+
+    result_cache.evict(STEMS_NAMESPACE)
+    return stem_paths
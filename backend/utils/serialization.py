@@ -0,0 +1,71 @@
+"""
+Compact JSON serialization for analysis results:
+- Minified separators (no indentation or spaces)
+- NumPy scalars and arrays converted by a `default` hook instead of a
+  recursive pre-pass over the whole result
+- Strict JSON: non-finite floats (NaN, +/-inf) become null, so every message
+  parses with JSON.parse; the clean-up pass only runs when one is present
+"""
+
+import json
+import math
+
+COMPACT_SEPARATORS = (',', ':')
+
+
+def json_default(obj):
+    """
+    `default` hook for json.dump(s): converts NumPy scalars and arrays
+    (anything with .tolist()) to Python native types. Only called for
+    objects the encoder cannot handle itself.
+
+    Args:
+        obj: Object the JSON encoder could not serialize
+
+    Returns:
+        JSON-serializable equivalent
+    """
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def finite(value):
+    """
+    Copy of a result with NumPy types converted to Python types and
+    non-finite floats (NaN, +/-inf) replaced by None.
+
+    Args:
+        value: Result (dicts, lists, tuples, scalars, NumPy values)
+
+    Returns:
+        Strict-JSON-serializable equivalent
+    """
+    if isinstance(value, dict):
+        return {key: finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [finite(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return finite(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def dumps(value, pretty=False):
+    """
+    Serialize a result to strict JSON (non-finite floats become null).
+
+    Args:
+        value: Result to serialize (may contain NumPy types)
+        pretty: Indent for human reading instead of the compact form
+
+    Returns:
+        JSON string
+    """
+    options = {'indent': 2} if pretty else {'separators': COMPACT_SEPARATORS}
+    try:
+        return json.dumps(value, allow_nan=False, default=json_default, **options)
+    except ValueError:
+        # A NaN/inf somewhere: clean the whole value once and encode again
+        return json.dumps(finite(value), allow_nan=False, **options)
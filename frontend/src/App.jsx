@@ -132,7 +132,7 @@ function App() {
       <main className="w-full max-w-[100%] p-4 space-y-4">
         {/* Satır 1: Ses Dosyası Yükleme - TAM YATAY */}
         <div className="w-full">
-          <AudioAnalyzer onAnalysisComplete={handleAnalysisComplete} />
+          <AudioAnalyzer onAnalysisComplete={handleAnalysisComplete} onPartialResult={handleAnalysisComplete} />
         </div>
 
         {/* Satır 2: Analiz Sonuçları - TAM YATAY */}
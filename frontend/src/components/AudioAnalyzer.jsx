@@ -2,7 +2,7 @@ import React, { useState, useCallback } from 'react';
 import { motion } from 'framer-motion';
 import { electronAPI } from '../utils/electronAPI';
 
-function AudioAnalyzer({ onAnalysisComplete }) {
+function AudioAnalyzer({ onAnalysisComplete, onPartialResult }) {
   const [isDragging, setIsDragging] = useState(false);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [selectedFile, setSelectedFile] = useState(null);
@@ -82,8 +82,19 @@ function AudioAnalyzer({ onAnalysisComplete }) {
         setProgress(progressMessage);
       };
       
+      // Show each stage's results as soon as it finishes (BPM/key first)
+      let partialData = { genre: 'Analiz ediliyor...', genre_confidence: 0, spectral_centroid: 0 };
+      const partialListener = ({ stage, data }) => {
+        console.log('[AudioAnalyzer] Partial result:', stage);
+        partialData = { ...partialData, ...data };
+        if (onPartialResult) {
+          onPartialResult(partialData);
+        }
+      };
+      
       if (electronAPI.isAvailable()) {
         electronAPI.onProgress(progressListener);
+        electronAPI.onPartialResult(partialListener);
       }
 
       console.log('[AudioAnalyzer] Starting full analysis (with lyrics) for:', filePath);
@@ -128,6 +139,7 @@ function AudioAnalyzer({ onAnalysisComplete }) {
       console.error('[AudioAnalyzer] Exception during analysis:', err);
       setError(`Hata: ${err.message}`);
     } finally {
+      electronAPI.removePartialResultListener();
       setIsAnalyzing(false);
       setTimeout(() => setProgress(''), 2000);
     }
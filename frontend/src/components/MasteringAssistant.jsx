@@ -6,8 +6,13 @@ function MasteringAssistant({ masteringData, genre }) {
     return null;
   }
 
-  const lufs = masteringData.lufs || -20;
+  // null when nothing passed the loudness gates (silence, too short or below -70 LUFS)
+  const lufs = Number.isFinite(masteringData.lufs) ? masteringData.lufs : null;
+  const lufsMeasured = lufs !== null;
   const peak = masteringData.peak || {};
+  // null for all-zero input (no signal)
+  const peakDbfs = Number.isFinite(peak.peak_dbfs) ? peak.peak_dbfs : null;
+  const peakMeasured = peakDbfs !== null;
   const freqBalance = masteringData.frequency_balance || {};
   const transients = masteringData.transients || {};
   const recommendations = masteringData.recommendations || [];
@@ -15,22 +20,24 @@ function MasteringAssistant({ masteringData, genre }) {
 
   // CSS Variables for dynamic colors
   const peakColor = useMemo(() => {
-    const peakDbfs = peak.peak_dbfs || -1;
+    if (!peakMeasured) return '#6b7280';
     return peakDbfs > -0.3 ? '#ff0055' : '#00ffcc';
-  }, [peak.peak_dbfs]);
+  }, [peakDbfs, peakMeasured]);
 
   // LUFS bar calculation
   const lufsWidth = useMemo(() => {
+    if (!lufsMeasured) return 0;
     const normalized = ((lufs + 24) / 24) * 100;
     return Math.max(0, Math.min(100, normalized));
-  }, [lufs]);
+  }, [lufs, lufsMeasured]);
 
   const lufsBarColor = useMemo(() => {
+    if (!lufsMeasured) return 'from-gray-600 via-gray-500 to-gray-600';
     if (lufs < -16) return 'from-green-500 via-emerald-400 to-green-500';
     if (lufs < -14) return 'from-green-400 via-yellow-400 to-yellow-500';
     if (lufs < -12) return 'from-yellow-500 via-pink-500 to-pink-600';
     return 'from-pink-600 via-red-500 to-red-600';
-  }, [lufs]);
+  }, [lufs, lufsMeasured]);
 
   // Get actual FFT spectrum data
   const spectrumData = useMemo(() => {
@@ -131,18 +138,17 @@ function MasteringAssistant({ masteringData, genre }) {
   // Smart Tips Logic Gate
   const smartTips = useMemo(() => {
     const tips = [];
-    const peakDbfs = peak.peak_dbfs || -1;
     const lowEnergyBalance = freqBalance.low_db_diff || 0;
     const midEnergyBalance = freqBalance.mid_db_diff || 0;
     const highEnergyBalance = freqBalance.high_db_diff || 0;
     
-    if (peakDbfs > -0.1) {
+    if (peakMeasured && peakDbfs > -0.1) {
       tips.push({
         type: 'error',
         message: '⚠️ Peak çok yüksek, -1dB True Peak limiter kullan.',
         priority: 1
       });
-    } else if (lufs > -8) {
+    } else if (lufsMeasured && lufs > -8) {
       tips.push({
         type: 'warning',
         message: '🔥 Parça çok sıcak (loud)! Phonk için uygun ama dinamik ezilmiş.',
@@ -175,7 +181,7 @@ function MasteringAssistant({ masteringData, genre }) {
     }
     
     return tips.sort((a, b) => a.priority - b.priority);
-  }, [peak, lufs, freqBalance]);
+  }, [peakDbfs, peakMeasured, lufs, lufsMeasured, freqBalance]);
 
   // Crest Factor Gauge
   const crestFactor = transients.crest_factor_db || 0;
@@ -238,18 +244,22 @@ function MasteringAssistant({ masteringData, genre }) {
             </div>
             <div className="flex justify-between items-center mb-2">
               <span className={`text-2xl font-bold font-mono ${
+                !lufsMeasured ? 'text-gray-500' :
                 lufs < -16 ? 'text-green-400' : 
                 lufs < -12 ? 'text-yellow-400' : 
                 'text-pink-400'
               }`}>
-                {lufs.toFixed(1)} LUFS
+                {lufsMeasured ? lufs.toFixed(1) : '—'} LUFS
               </span>
+              {!lufsMeasured && (
+                <span className="text-xs text-gray-500">Ölçülemedi</span>
+              )}
             </div>
             <div className="relative h-6 bg-[#0a0a0a] rounded-full overflow-hidden border border-purple-500/20">
               <motion.div
                 className={`h-full bg-gradient-to-r ${lufsBarColor} rounded-full`}
                 initial={{ width: 0 }}
-                animate={{ width: `calc(100% * (${lufs} + 24) / 24)` }}
+                animate={{ width: `${lufsWidth}%` }}
                 transition={{ duration: 1, ease: 'easeOut' }}
               />
             </div>
@@ -272,7 +282,7 @@ function MasteringAssistant({ masteringData, genre }) {
                 animate={peak.clipping_detected ? { scale: [1, 1.05, 1] } : {}}
                 transition={{ duration: 1, repeat: peak.clipping_detected ? Infinity : 0 }}
               >
-                {peak.peak_dbfs ? peak.peak_dbfs.toFixed(2) : '-1.00'} dBFS
+                {peakMeasured ? `${peakDbfs.toFixed(2)} dBFS` : 'Sinyal yok'}
               </motion.div>
             </div>
             {peak.clipping_detected && (
@@ -36,6 +36,22 @@ export const electronAPI = {
     }
   },
 
+  onPartialResult: (callback) => {
+    if (!electronAPI.isAvailable() || !window.electronAPI.onPartialResult) {
+      return;
+    }
+    window.electronAPI.onPartialResult(callback);
+  },
+
+  removePartialResultListener: () => {
+    if (!electronAPI.isAvailable()) {
+      return;
+    }
+    if (window.electronAPI.removePartialResultListener) {
+      window.electronAPI.removePartialResultListener();
+    }
+  },
+
   generatePrompt: async (analysisData, userRequest) => {
     if (!electronAPI.isAvailable()) {
       throw new Error('Electron API yüklenemedi. Lütfen uygulamayı yeniden başlatın.');
@@ -130,11 +130,31 @@ app.whenReady().then(async () => {
   try {
     const pythonBridge = await import('./src/main/pythonBridge.js');
     
+    // Progress messages for partial results, by analysis stage
+    const stageMessages = {
+      technical: 'Teknik veriler hazır (BPM, ton)',
+      mastering: 'Mastering analizi hazır',
+      genre: 'Tür sınıflandırması hazır',
+      lyrics: 'Söz çıkarma tamamlandı',
+    };
+    
+    // Forward partial results to the renderer as each stage finishes
+    const partialResultSender = (sender) => (stage, data) => {
+      if (sender && !sender.isDestroyed()) {
+        sender.send('analysis-partial', { stage, data });
+        if (stageMessages[stage]) {
+          sender.send('analysis-progress', stageMessages[stage]);
+        }
+      }
+    };
+    
     // Standard audio analysis (without lyrics - faster)
     ipcMain.handle('analyze-audio', async (event, filePath) => {
       try {
         console.log('[Main] Starting audio analysis for:', filePath);
-        const result = await pythonBridge.analyzeAudio(filePath);
+        const result = await pythonBridge.analyzeAudio(filePath, {
+          onPartial: partialResultSender(event.sender),
+        });
         console.log('[Main] Analysis completed successfully');
         return { success: true, data: result };
       } catch (error) {
@@ -149,7 +169,9 @@ app.whenReady().then(async () => {
         // Send progress updates
         event.sender.send('analysis-progress', 'Audio analiz ediliyor...');
         
-        const result = await pythonBridge.analyzeAudio(filePath);
+        const result = await pythonBridge.analyzeAudio(filePath, {
+          onPartial: partialResultSender(event.sender),
+        });
         
         // Check if lyrics extraction was successful
         if (result.lyrics && result.lyrics.trim()) {
@@ -248,6 +270,15 @@ app.whenReady().then(async () => {
   });
 });
 
+app.on('will-quit', async () => {
+  try {
+    const pythonBridge = await import('./src/main/pythonBridge.js');
+    pythonBridge.shutdownWorker();
+  } catch (error) {
+    // Bridge was never loaded
+  }
+});
+
 app.on('window-all-closed', () => {
   if (process.platform !== 'darwin') {
     app.quit();
@@ -12,6 +12,13 @@ contextBridge.exposeInMainWorld('electronAPI', {
   removeProgressListener: () => {
     ipcRenderer.removeAllListeners('analysis-progress');
   },
+  // Partial results ({ stage, data }) as each analysis stage finishes
+  onPartialResult: (callback) => {
+    ipcRenderer.on('analysis-partial', (event, value) => callback(value));
+  },
+  removePartialResultListener: () => {
+    ipcRenderer.removeAllListeners('analysis-partial');
+  },
   
   // Prompt Generation
   generatePrompt: (analysisData, userRequest) => 
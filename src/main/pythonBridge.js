@@ -171,114 +171,255 @@ function findPythonExecutable() {
   throw new Error('Python executable not found. Please install Python 3.8+ and ensure it is in your PATH.');
 }
 
+// Persistent analysis worker (analysis.py --worker), shared by all jobs
+let worker = null;
+// Jobs are dispatched one at a time so each timeout only covers its own run
+let jobQueue = Promise.resolve();
+let nextJobId = 1;
+// Bumped when the worker fails to start, so jobs queued behind it fail instead of
+// each waiting for another startup
+let queueEpoch = 0;
+
+const ANALYSIS_TIMEOUT_MS = 300000; // 5 minutes
+const WORKER_STARTUP_TIMEOUT_MS = 120000; // 2 minutes (model imports included)
+
+/**
+ * Start the long-lived Python worker if it is not already running
+ * @returns {Object} Worker state ({ process, ready, pending })
+ */
+function getWorker() {
+  if (worker) {
+    return worker;
+  }
+
+  const pythonExec = findPythonExecutable();
+  const scriptPath = join(__dirname, '../../backend/analysis.py');
+
+  if (!existsSync(scriptPath)) {
+    throw new Error(`Analysis script not found: ${scriptPath}`);
+  }
+
+  console.log('[PythonBridge] Starting analysis worker');
+
+  const pythonProcess = spawn(pythonExec, [scriptPath, '--worker'], {
+    cwd: join(__dirname, '../../'),
+    stdio: ['pipe', 'pipe', 'pipe'],
+  });
+
+  const state = {
+    process: pythonProcess,
+    pending: new Map(),
+    stdoutBuffer: '',
+    stderr: '',
+    ready: null,
+  };
+
+  state.ready = new Promise((resolve, reject) => {
+    state.resolveReady = resolve;
+    state.rejectReady = reject;
+  });
+
+  pythonProcess.stdout.on('data', (data) => {
+    state.stdoutBuffer += data.toString();
+
+    // One JSON message per line
+    let newlineIndex;
+    while ((newlineIndex = state.stdoutBuffer.indexOf('\n')) !== -1) {
+      const line = state.stdoutBuffer.substring(0, newlineIndex).trim();
+      state.stdoutBuffer = state.stdoutBuffer.substring(newlineIndex + 1);
+      if (!line) {
+        continue;
+      }
+
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (parseError) {
+        console.error('[PythonBridge] Invalid worker output:', line.substring(0, 200));
+        // Only one job runs at a time: its result can no longer be trusted, fail it now
+        // instead of waiting for the timeout
+        for (const job of state.pending.values()) {
+          job.reject(new Error(`Invalid worker output: ${parseError.message}`));
+        }
+        state.pending.clear();
+        continue;
+      }
+
+      if (message.event === 'ready') {
+        console.log('[PythonBridge] Analysis worker ready');
+        clearTimeout(state.startupTimeout);
+        state.resolveReady();
+        continue;
+      }
+
+      const job = state.pending.get(message.id);
+      if (!job) {
+        continue;
+      }
+
+      // Partial result: a stage finished, the job is still running
+      if (message.event === 'partial') {
+        if (job.onPartial) {
+          try {
+            job.onPartial(message.stage, message.data);
+          } catch (error) {
+            console.error('[PythonBridge] Partial result handler failed:', error);
+          }
+        }
+        continue;
+      }
+
+      state.pending.delete(message.id);
+
+      if (message.error) {
+        job.reject(new Error(message.error));
+      } else if (message.result && message.result.error) {
+        job.reject(new Error(message.result.error));
+      } else {
+        job.resolve(message.result);
+      }
+    }
+  });
+
+  pythonProcess.stderr.on('data', (data) => {
+    const stderrData = data.toString();
+    // Keep only the tail so a long-lived worker does not grow without bound
+    state.stderr = (state.stderr + stderrData).slice(-4000);
+    // Log stderr to console for debugging
+    console.log('[PythonBridge] stderr:', stderrData.trim());
+  });
+
+  const failPending = (error) => {
+    clearTimeout(state.startupTimeout);
+    state.rejectReady(error);
+    for (const job of state.pending.values()) {
+      job.reject(error);
+    }
+    state.pending.clear();
+    if (worker === state) {
+      worker = null;
+    }
+  };
+
+  // EPIPE etc. when writing to a worker that is exiting
+  pythonProcess.stdin.on('error', (error) => {
+    console.error('[PythonBridge] Worker stdin error:', error);
+    failPending(new Error(`Python worker stdin error: ${error.message}`));
+  });
+
+  pythonProcess.on('close', (code) => {
+    console.log('[PythonBridge] Worker closed with code:', code);
+    failPending(new Error(`Python worker exited (code ${code}): ${state.stderr || 'Unknown error'}`));
+  });
+
+  pythonProcess.on('error', (error) => {
+    console.error('[PythonBridge] Process error:', error);
+    failPending(new Error(`Failed to spawn Python process: ${error.message}`));
+  });
+
+  // The per-job timeout only starts once the worker is ready, so a worker that hangs
+  // while starting up (e.g. importing TensorFlow) needs its own limit
+  state.startupTimeout = setTimeout(() => {
+    console.error('[PythonBridge] Worker startup timeout - restarting worker');
+    queueEpoch++;
+    failPending(new Error('Analiz motoru başlatılamadı (2 dakika içinde hazır olmadı). Python ortamı veya TensorFlow yüklemesi takılmış olabilir.'));
+    pythonProcess.kill();
+  }, WORKER_STARTUP_TIMEOUT_MS);
+
+  worker = state;
+  return state;
+}
+
 /**
- * Analyze audio file using Python analysis script
+ * Stop the analysis worker (called on app shutdown)
+ */
+export function shutdownWorker() {
+  if (!worker) {
+    return;
+  }
+  const state = worker;
+  worker = null;
+  try {
+    state.process.stdin.write(JSON.stringify({ command: 'shutdown' }) + '\n');
+    state.process.stdin.end();
+  } catch (error) {
+    state.process.kill();
+  }
+}
+
+/**
+ * Send a single job to the worker and wait for its result
  * @param {string} filePath - Path to audio file
+ * @param {Function} [onPartial] - Called with (stage, data) as each stage finishes
  * @returns {Promise<Object>} Analysis results
  */
-export async function analyzeAudio(filePath) {
+async function runWorkerJob(filePath, onPartial) {
+  const state = getWorker();
+  await state.ready;
+
+  const id = String(nextJobId++);
+
   return new Promise((resolve, reject) => {
-    try {
-      const pythonExec = findPythonExecutable();
-      const scriptPath = join(__dirname, '../../backend/analysis.py');
-      
-      if (!existsSync(scriptPath)) {
-        reject(new Error(`Analysis script not found: ${scriptPath}`));
-        return;
-      }
-      
-      if (!existsSync(filePath)) {
-        reject(new Error(`Audio file not found: ${filePath}`));
-        return;
+    // Set timeout (5 minutes for audio analysis)
+    const timeout = setTimeout(() => {
+      console.error('[PythonBridge] Analysis timeout - restarting worker');
+      state.pending.delete(id);
+      // Detach before killing, so the next job starts a new worker instead of
+      // writing to this one while it exits
+      if (worker === state) {
+        worker = null;
       }
-      
-      console.log('[PythonBridge] Starting analysis for:', filePath);
-      
-      // Spawn Python process
-      const pythonProcess = spawn(pythonExec, [scriptPath, filePath], {
-        cwd: join(__dirname, '../../'),
-        stdio: ['ignore', 'pipe', 'pipe'],
-      });
-      
-      let stdout = '';
-      let stderr = '';
-      
-      // Set timeout (5 minutes for audio analysis)
-      const timeout = setTimeout(() => {
-        console.error('[PythonBridge] Analysis timeout - killing process');
-        pythonProcess.kill();
-        reject(new Error('Analiz zaman aşımına uğradı (5 dakika). Dosya çok büyük olabilir veya Python scripti takılmış olabilir.'));
-      }, 300000); // 5 minutes
-      
-      pythonProcess.stdout.on('data', (data) => {
-        stdout += data.toString();
-      });
-      
-      pythonProcess.stderr.on('data', (data) => {
-        const stderrData = data.toString();
-        stderr += stderrData;
-        // Log stderr to console for debugging
-        console.log('[PythonBridge] stderr:', stderrData.trim());
-      });
-      
-      pythonProcess.on('close', (code) => {
+      state.process.kill();
+      reject(new Error('Analiz zaman aşımına uğradı (5 dakika). Dosya çok büyük olabilir veya Python scripti takılmış olabilir.'));
+    }, ANALYSIS_TIMEOUT_MS);
+
+    state.pending.set(id, {
+      onPartial,
+      resolve: (result) => {
         clearTimeout(timeout);
-        
-        console.log('[PythonBridge] Process closed with code:', code);
-        console.log('[PythonBridge] stdout length:', stdout.length);
-        console.log('[PythonBridge] stderr length:', stderr.length);
-        
-        if (code !== 0) {
-          reject(new Error(`Python script failed (code ${code}): ${stderr || 'Unknown error'}`));
-          return;
-        }
-        
-        try {
-          // Clean stdout - remove any non-JSON content (warnings, etc.)
-          // Find the JSON object in stdout (it should start with {)
-          const jsonStart = stdout.indexOf('{');
-          if (jsonStart === -1) {
-            throw new Error('No JSON found in Python output');
-          }
-          
-          // Extract only the JSON part
-          const jsonOutput = stdout.substring(jsonStart);
-          
-          // Try to find the end of JSON (last })
-          let jsonEnd = jsonOutput.lastIndexOf('}');
-          if (jsonEnd === -1) {
-            throw new Error('Invalid JSON format - no closing brace');
-          }
-          
-          // Extract the complete JSON
-          const cleanJson = jsonOutput.substring(0, jsonEnd + 1);
-          
-          console.log('[PythonBridge] Parsing JSON, length:', cleanJson.length);
-          const result = JSON.parse(cleanJson);
-          
-          if (result.error) {
-            reject(new Error(result.error));
-          } else {
-            console.log('[PythonBridge] Analysis successful');
-            resolve(result);
-          }
-        } catch (parseError) {
-          console.error('[PythonBridge] Parse error:', parseError);
-          console.error('[PythonBridge] stdout:', stdout);
-          console.error('[PythonBridge] stderr:', stderr);
-          reject(new Error(`Failed to parse Python output: ${parseError.message}\nOutput: ${stdout.substring(0, 500)}\nStderr: ${stderr.substring(0, 500)}`));
-        }
-      });
-      
-      pythonProcess.on('error', (error) => {
+        console.log('[PythonBridge] Analysis successful');
+        resolve(result);
+      },
+      reject: (error) => {
         clearTimeout(timeout);
-        console.error('[PythonBridge] Process error:', error);
-        reject(new Error(`Failed to spawn Python process: ${error.message}`));
-      });
-      
-    } catch (error) {
-      console.error('[PythonBridge] Setup error:', error);
-      reject(error);
+        reject(error);
+      },
+    });
+
+    state.process.stdin.write(JSON.stringify({ id, file_path: filePath }) + '\n', (error) => {
+      const job = state.pending.get(id);
+      if (error && job) {
+        state.pending.delete(id);
+        job.reject(new Error(`Failed to send job to Python worker: ${error.message}`));
+      }
+    });
+  });
+}
+
+/**
+ * Analyze audio file using the persistent Python analysis worker
+ * @param {string} filePath - Path to audio file
+ * @param {Object} [options]
+ * @param {Function} [options.onPartial] - Called with (stage, data) as each stage finishes;
+ *   stage is 'technical', 'mastering', 'genre' or 'lyrics' and data holds that stage's result fields
+ *   (not called when the result comes from the cache)
+ * @returns {Promise<Object>} Analysis results
+ */
+export async function analyzeAudio(filePath, { onPartial } = {}) {
+  if (!existsSync(filePath)) {
+    throw new Error(`Audio file not found: ${filePath}`);
+  }
+
+  console.log('[PythonBridge] Starting analysis for:', filePath);
+
+  const epoch = queueEpoch;
+  const run = jobQueue.then(() => {
+    if (epoch !== queueEpoch) {
+      throw new Error('Analiz motoru başlatılamadı. Lütfen analizi tekrar deneyin.');
     }
+    return runWorkerJob(filePath, onPartial);
   });
+  // Keep the queue going even if this job fails
+  jobQueue = run.catch(() => {});
+  return run;
 }